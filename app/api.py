@@ -1,16 +1,97 @@
-from fastapi import FastAPI
+import json
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from datetime import date
+from pathlib import Path
+
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
 
 from app.settings import settings
 from app.version import __version__
-from app.rag import answer
+from app.index_manager import index_manager
+from app.llm import cache_info, circuit_info, pool_info
+from app.profiling import profile_call, start_continuous
+from app.rag import answer, answer_stream
+from app.request_log import start_request_log
+from app.retrieval import RetrievalFilters, warm_up
+from app.suggest import suggest_service
+
+
+_continuous_profiler = None
+_request_log = None
+_warmup: dict = {"status": "off", "ms": None, "error": None}
+
+
+def _run_warmup() -> None:
+    _warmup["status"] = "running"
+    t0 = time.perf_counter()
+    try:
+        warm_up()
+        suggest_service.get()
+        _warmup["status"] = "done"
+    except Exception as e:
+        # not fatal: the first /ask loads lazily and reports the real error
+        _warmup.update(status="failed", error=f"{type(e).__name__}: {e}"[:300])
+    _warmup["ms"] = round((time.perf_counter() - t0) * 1000.0)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    global _continuous_profiler, _request_log
+    if settings.index_pointer_file:
+        index_manager.watch(settings.index_pointer_file, interval_sec=settings.index_watch_interval_sec)
+    _continuous_profiler = start_continuous()
+    _request_log = start_request_log()
+    if settings.warmup_on_startup:
+        threading.Thread(target=_run_warmup, name="warmup", daemon=True).start()
+    yield
+    index_manager.stop()
+    if _continuous_profiler is not None:
+        _continuous_profiler.stop()
+    if _request_log is not None:
+        _request_log.stop()
 
-app = FastAPI(title="InfoHub RAG", version=__version__)
+
+app = FastAPI(title="InfoHub RAG", version=__version__, lifespan=lifespan)
 
 
 class AskRequest(BaseModel):
     question: str
     k: int = 6
+    # Optional metadata filters (pushed down into the vector query)
+    species: str | list[str] | None = None
+    date_from: date | None = None
+    date_to: date | None = None
+
+    def filters(self) -> RetrievalFilters | None:
+        species = [self.species] if isinstance(self.species, str) else list(self.species or [])
+        filters = RetrievalFilters(species=species, date_from=self.date_from, date_to=self.date_to)
+        return None if filters.is_empty() else filters
+
+
+class ReloadIndexRequest(BaseModel):
+    # Index directory to load. Must differ from the served one: Chroma caches one in-memory index per directory,
+    # so "re-opening" the same path would keep serving the old data.
+    path: str
+
+
+def _log_request(endpoint: str, req: AskRequest, result: dict | None, t0: float, error: str | None = None) -> None:
+    if _request_log is not None:
+        filters = req.filters()
+        total_ms = (time.perf_counter() - t0) * 1000.0
+        filters_meta = filters.as_dict() if filters else None
+        _request_log.record(endpoint, req.question, req.k, filters_meta, result, total_ms, error)
+
+
+def _require_admin(token: str | None) -> None:
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if token != settings.admin_token:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
 
 
 @app.get("/")
@@ -18,7 +99,7 @@ def root():
     return {
         "name": "InfoHub RAG",
         "version": __version__,
-        "endpoints": ["/health", "/info", "/ask", "/docs"],
+        "endpoints": ["/health", "/info", "/ask", "/ask/stream", "/suggest", "/docs"],
     }
 
 
@@ -39,10 +120,93 @@ def info():
             "fallback_model": settings.llm_fallback_model,
             "ollama_base_url": settings.ollama_base_url,
             "ollama_model": settings.ollama_model,
+            "cache": cache_info(),
+            "endpoints": pool_info(),
+            "circuits": circuit_info(),
         },
+        "index": index_manager.info(),
+        "suggest": suggest_service.info(),
+        "warmup": _warmup,
+        "profiling": _continuous_profiler.info() if _continuous_profiler else None,
+        "request_log": _request_log.info() if _request_log else None,
     }
 
 
 @app.post("/ask")
-def ask(req: AskRequest):
-    return answer(req.question, k=req.k)
+def ask(
+    req: AskRequest,
+    x_profile: str | None = Header(default=None),
+    x_admin_token: str | None = Header(default=None),
+):
+    t0 = time.perf_counter()
+    result, error = None, None
+    try:
+        if not x_profile:
+            result = answer(req.question, k=req.k, filters=req.filters())
+            return result
+
+        # Profile this one request (admin only); the stored file can be fetched from /admin/profiles/{name}
+        _require_admin(x_admin_token)
+        fmt = "collapsed" if x_profile.strip().lower() == "collapsed" else "speedscope"
+        result, prof = profile_call(lambda: answer(req.question, k=req.k, filters=req.filters()), fmt=fmt)
+        result["meta"]["profile"] = {**prof, "name": Path(prof["path"]).name}
+        return result
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"[:300]
+        raise
+    finally:
+        # every outcome is recorded, profiled requests included
+        _log_request("/ask", req, result, t0, error=error)
+
+
+@app.post("/ask/stream")
+def ask_stream(req: AskRequest):
+    # Newline-delimited JSON events (see rag.answer_stream); the last line carries the full /ask response
+    def lines():
+        t0 = time.perf_counter()
+        try:
+            for e in answer_stream(req.question, k=req.k, filters=req.filters()):
+                if e["type"] == "done":
+                    _log_request("/ask/stream", req, e, t0)
+                yield json.dumps(e, ensure_ascii=False, default=str) + "\n"
+        except Exception as e:
+            _log_request("/ask/stream", req, None, t0, error=f"{type(e).__name__}: {e}"[:300])
+            raise
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.get("/suggest")
+def suggest(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(default=10, ge=1, le=50),
+    species: list[str] | None = Query(default=None),
+):
+    # Prefix completions over titles and document numbers; no embedding or LLM call
+    t0 = time.perf_counter()
+    items = suggest_service.get().lookup(q, limit=limit, species=species)
+    return {
+        "q": q,
+        "suggestions": [asdict(s) for s in items],
+        "ms": round((time.perf_counter() - t0) * 1000.0, 3),
+    }
+
+
+@app.post("/admin/index/reload", status_code=202)
+def reload_index(req: ReloadIndexRequest, x_admin_token: str | None = Header(default=None)):
+    _require_admin(x_admin_token)
+    path = req.path
+    if Path(path).resolve() == Path(index_manager.current().path).resolve():
+        raise HTTPException(status_code=409, detail=f"{path} is already being served; load updates from a new directory")
+    if not index_manager.load_async(path):
+        raise HTTPException(status_code=409, detail="An index load is already in progress")
+    return {"status": "loading", "path": path, "index": index_manager.info()}
+
+
+@app.get("/admin/profiles/{name}")
+def get_profile(name: str, x_admin_token: str | None = Header(default=None)):
+    _require_admin(x_admin_token)
+    path = Path(settings.profile_dir) / Path(name).name
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path)
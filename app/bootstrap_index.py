@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import json
+import logging
 import os
 import shutil
 import tempfile
@@ -7,6 +9,10 @@ import urllib.request
 import zipfile
 from pathlib import Path
 
+from app.snapshots import apply_delta_pack, delta_chain, read_local_version, sha256_file, write_local_version
+
+logger = logging.getLogger(__name__)
+
 
 def _find_chroma_root(extracted_dir: Path) -> Path | None:
     # Case 1: zip root contains chroma.sqlite3
@@ -25,23 +31,7 @@ def _find_chroma_root(extracted_dir: Path) -> Path | None:
     return None
 
 
-def ensure_chroma_index() -> bool:
-    """
-    Ensure CHROMA_DIR exists and contains chroma.sqlite3.
-    If missing, download INDEX_URL (zip) and extract into CHROMA_DIR.
-    """
-    chroma_dir = Path(os.getenv("CHROMA_DIR", "./data/index"))
-    index_url = os.getenv("INDEX_URL", "").strip()
-
-    sqlite_file = chroma_dir / "chroma.sqlite3"
-    MIN_SIZE = 5_000_000  # 5MB; your real one is ~82MB
-
-    if sqlite_file.exists() and sqlite_file.stat().st_size >= MIN_SIZE:
-        return True
-
-    if not index_url:
-        return False
-
+def _download_full(index_url: str, chroma_dir: Path, sha256: str | None = None) -> bool:
     chroma_dir.parent.mkdir(parents=True, exist_ok=True)
 
     with tempfile.TemporaryDirectory() as tmp:
@@ -49,6 +39,8 @@ def ensure_chroma_index() -> bool:
         zip_path = tmp_path / "index.zip"
 
         urllib.request.urlretrieve(index_url, zip_path)
+        if sha256 and sha256_file(zip_path) != sha256:
+            return False
 
         extract_dir = tmp_path / "extracted"
         extract_dir.mkdir(parents=True, exist_ok=True)
@@ -70,4 +62,124 @@ def ensure_chroma_index() -> bool:
             else:
                 shutil.copy2(item, dest)
 
-    return sqlite_file.exists()
+    return (chroma_dir / "chroma.sqlite3").exists()
+
+
+def _fetch_manifest(url: str) -> dict | None:
+    try:
+        with urllib.request.urlopen(url, timeout=30) as r:
+            return json.loads(r.read().decode("utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _apply_deltas(chain: list[dict], chroma_dir: Path, local_version: str) -> bool:
+    """
+    Apply the chain to a staging copy of chroma_dir and swap it in only once every pack succeeded, so a
+    failure part-way leaves the live index and its INDEX_VERSION.json as they were.
+    """
+    staging = Path(tempfile.mkdtemp(prefix=f".{chroma_dir.name}-staging-", dir=chroma_dir.parent))
+    try:
+        shutil.copytree(chroma_dir, staging, dirs_exist_ok=True)
+        version = local_version
+        with tempfile.TemporaryDirectory() as tmp:
+            for i, d in enumerate(chain):
+                pack = Path(tmp) / f"delta-{i}.zip"
+                urllib.request.urlretrieve(d["url"], pack)
+                if d.get("sha256") and sha256_file(pack) != d["sha256"]:
+                    raise RuntimeError(f"sha256 mismatch for delta {d.get('from')} -> {d.get('to')}")
+                version = apply_delta_pack(pack, staging, expected_from=version)
+        write_local_version(staging, version)
+
+        # two renames on the same filesystem; the old directory is kept until the new one is in place
+        backup = chroma_dir.with_name(f".{chroma_dir.name}-previous")
+        shutil.rmtree(backup, ignore_errors=True)
+        chroma_dir.rename(backup)
+        try:
+            staging.rename(chroma_dir)
+        except OSError:
+            backup.rename(chroma_dir)
+            raise
+        shutil.rmtree(backup, ignore_errors=True)
+        return True
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def _ensure_from_manifest(manifest_url: str, chroma_dir: Path, index_url: str) -> bool:
+    sqlite_file = chroma_dir / "chroma.sqlite3"
+
+    manifest = _fetch_manifest(manifest_url)
+    if manifest is None:
+        # Manifest unreachable: keep serving whatever we have
+        return sqlite_file.exists()
+
+    full = manifest.get("full") or {}
+    latest = manifest.get("latest") or full.get("version")
+    local_version = read_local_version(chroma_dir) if sqlite_file.exists() else None
+
+    if latest and local_version == latest:
+        return True
+
+    # Known local version: roll forward with deltas
+    if _roll_forward(manifest, chroma_dir, local_version, latest):
+        return True
+
+    full_url = full.get("url") or index_url
+    if not full_url:
+        return sqlite_file.exists()
+
+    if not _download_full(full_url, chroma_dir, sha256=full.get("sha256")):
+        return False
+    if read_local_version(chroma_dir) is None and full.get("version"):
+        write_local_version(chroma_dir, full["version"])
+
+    # The full archive may lag behind the latest deltas
+    _roll_forward(manifest, chroma_dir, read_local_version(chroma_dir), latest)
+    return True
+
+
+def _roll_forward(manifest: dict, chroma_dir: Path, local_version: str | None, latest: str | None) -> bool:
+    if not latest or not local_version:
+        return False
+    if local_version == latest:
+        return True
+
+    chain = delta_chain(manifest, local_version, latest)
+    if not chain:
+        return False
+    try:
+        return _apply_deltas(chain, chroma_dir, local_version)
+    except Exception:
+        versions = " -> ".join([local_version] + [d["to"] for d in chain])
+        logger.exception("Delta chain %s failed; index left at %s", versions, local_version)
+        return False
+
+
+def ensure_chroma_index() -> bool:
+    """
+    Ensure CHROMA_DIR exists and contains chroma.sqlite3.
+
+    With INDEX_MANIFEST_URL set, the local INDEX_VERSION.json is compared to the manifest:
+    up to date -> nothing to do; known older version -> apply delta packs (on a staging copy, swapped in
+    once the whole chain applied);
+    otherwise download the full archive.
+    Without a manifest, download INDEX_URL (zip) only if the index is missing.
+    """
+    chroma_dir = Path(os.getenv("CHROMA_DIR", "./data/index"))
+    index_url = os.getenv("INDEX_URL", "").strip()
+    manifest_url = os.getenv("INDEX_MANIFEST_URL", "").strip()
+
+    if manifest_url:
+        return _ensure_from_manifest(manifest_url, chroma_dir, index_url)
+
+    sqlite_file = chroma_dir / "chroma.sqlite3"
+    MIN_SIZE = 5_000_000  # 5MB; your real one is ~82MB
+
+    if sqlite_file.exists() and sqlite_file.stat().st_size >= MIN_SIZE:
+        return True
+
+    if not index_url:
+        return False
+
+    return _download_full(index_url, chroma_dir)
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    closed: calls pass; outcomes over the last `window_sec` are tracked. Once at least `min_calls` were seen
+            and the share of failures (transient errors or calls slower than `slow_call_ms`) reaches
+            `failure_rate`, the circuit opens.
+    open: calls are refused immediately for `open_sec`.
+    half_open: one probe call at a time is let through; success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        min_calls: int = 5,
+        window_sec: float = 60.0,
+        open_sec: float = 30.0,
+        slow_call_ms: float = 30000.0,
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window_sec = window_sec
+        self.open_sec = open_sec
+        self.slow_call_ms = slow_call_ms
+
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._probe_in_flight = False
+        self._calls: deque[tuple[float, bool]] = deque()  # (timestamp, failed)
+        self._lock = threading.Lock()
+
+    def _trim(self, now: float) -> None:
+        while self._calls and self._calls[0][0] < now - self.window_sec:
+            self._calls.popleft()
+
+    def _open(self, now: float) -> None:
+        self.state = OPEN
+        self.opened_at = now
+        self.times_opened += 1
+        self._calls.clear()
+
+    def allow(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN and now - self.opened_at >= self.open_sec:
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def release(self) -> None:
+        """
+        An admitted call that never reached the provider (e.g. no free endpoint slot): counts neither way,
+        but frees the half-open probe slot.
+        """
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+
+    def record(self, failed: bool, latency_ms: float) -> None:
+        failed = failed or latency_ms > self.slow_call_ms
+        with self._lock:
+            now = time.monotonic()
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+                if failed:
+                    self._open(now)
+                else:
+                    self.state = CLOSED
+                    self._calls.clear()
+                return
+            if self.state == OPEN:
+                # a call admitted before the circuit opened; it changes nothing
+                return
+
+            self._calls.append((now, failed))
+            self._trim(now)
+            n = len(self._calls)
+            if n >= self.min_calls and sum(f for _, f in self._calls) / n >= self.failure_rate:
+                self._open(now)
+
+    def info(self) -> dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            n = len(self._calls)
+            return {
+                "state": self.state,
+                "calls_in_window": n,
+                "failure_rate": round(sum(f for _, f in self._calls) / n, 3) if n else 0.0,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+                "retry_in_sec": round(max(0.0, self.open_sec - (now - self.opened_at)), 1) if self.state == OPEN else None,
+            }
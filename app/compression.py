@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from app.lexical import chunk_stems, extract_keywords, make_stems, stems_score
+
+# Query-focused extractive compression of retrieved chunks before the LLM call:
+# split every chunk into sentences, score them against the question, keep the best ones within a budget.
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?;])\s+|\n+")
+_MIN_SENTENCE_CHARS = 20
+_GAP = " … "
+_MIN_SHARE_CHARS = 160
+
+
+@dataclass
+class CompressedSnippet:
+    text: str
+    chunk_pos: int  # index into the retrieved list, so each snippet stays attributed to its source
+    kept: int
+    total: int
+
+
+def split_sentences(text: str) -> list[str]:
+    parts = [p.strip() for p in _SENTENCE_RE.split(text or "")]
+    # glue fragments (list numbers, headings) onto the next sentence so they aren't scored alone
+    out: list[str] = []
+    carry = ""
+    for p in parts:
+        if not p:
+            continue
+        p = f"{carry} {p}".strip() if carry else p
+        if len(p) < _MIN_SENTENCE_CHARS:
+            carry = p
+            continue
+        out.append(p)
+        carry = ""
+    if carry:
+        if out:
+            out[-1] = f"{out[-1]} {carry}"
+        else:
+            out.append(carry)
+    return out
+
+
+def _truncate(text: str, limit: int) -> str:
+    cut = text[:limit].rsplit(" ", 1)[0] if " " in text[:limit] else text[:limit]
+    return cut.rstrip() + " …"
+
+
+def compress(
+    question: str,
+    texts: list[str],
+    budget_chars: int,
+    query_embedding: list[float] | None = None,
+    embed_passages: Callable[[list[str]], Any] | None = None,
+    lexical_weight: float = 0.5,
+) -> tuple[list[CompressedSnippet], dict[str, Any]]:
+    """
+    Score = cosine(query, sentence) when embeddings are given, plus lexical_weight * share of the
+    question stems the sentence contains. Every chunk keeps its best sentence (attribution); remaining
+    budget goes to the best sentences overall. Kept sentences stay in document order, gaps marked with "…".
+    """
+    t0 = time.perf_counter()
+    stems = make_stems(extract_keywords(question))
+    max_lex = sum(2 if s.isdigit() else 1 for s in stems) or 1
+
+    sentences: list[tuple[int, int, str]] = []  # (chunk_pos, sentence_pos, text)
+    for ci, text in enumerate(texts):
+        for si, s in enumerate(split_sentences(text)):
+            sentences.append((ci, si, s))
+
+    if not sentences:
+        return [], {"chars_before": 0, "chars_after": 0, "sentences_total": 0, "sentences_kept": 0, "ms": 0.0}
+
+    scores = [
+        lexical_weight * stems_score(chunk_stems(s), stems) / max_lex
+        for _, _, s in sentences
+    ]
+    if query_embedding is not None and embed_passages is not None:
+        import numpy as np
+
+        embs = np.asarray(embed_passages([s for _, _, s in sentences]))
+        sims = embs @ np.asarray(query_embedding, dtype=embs.dtype)
+        scores = [a + float(b) for a, b in zip(scores, sims)]
+
+    order = sorted(range(len(sentences)), key=lambda i: -scores[i])
+    keep: set[int] = set()
+    used = 0
+
+    # 1) best sentence of each chunk, in retrieval order; an overlong one is cut to the chunk's share of the budget
+    best_by_chunk: dict[int, int] = {}
+    for i in order:
+        best_by_chunk.setdefault(sentences[i][0], i)
+    share = max(_MIN_SHARE_CHARS, budget_chars // max(1, len(best_by_chunk)))
+    for ci in sorted(best_by_chunk):
+        i = best_by_chunk[ci]
+        ci_, si, text = sentences[i]
+        if len(text) > share:
+            sentences[i] = (ci_, si, _truncate(text, share))
+        keep.add(i)
+        used += len(sentences[i][2]) + len(_GAP)
+
+    # 2) fill the rest of the budget with the globally best sentences
+    for i in order:
+        if i in keep:
+            continue
+        cost = len(sentences[i][2]) + len(_GAP)
+        if used + cost > budget_chars:
+            continue
+        keep.add(i)
+        used += cost
+
+    snippets: list[CompressedSnippet] = []
+    for ci in range(len(texts)):
+        idx = [i for i in range(len(sentences)) if sentences[i][0] == ci]
+        kept = [i for i in idx if i in keep]
+        if not kept:
+            continue
+        parts: list[str] = []
+        prev = None
+        for i in kept:
+            si = sentences[i][1]
+            if parts and prev is not None and si != prev + 1:
+                parts.append("…")
+            parts.append(sentences[i][2])
+            prev = si
+        snippets.append(CompressedSnippet(text=" ".join(parts), chunk_pos=ci, kept=len(kept), total=len(idx)))
+
+    meta = {
+        "chars_before": sum(len(t) for t in texts),
+        "chars_after": sum(len(s.text) for s in snippets),
+        "sentences_total": len(sentences),
+        "sentences_kept": len(keep),
+        "ms": round((time.perf_counter() - t0) * 1000.0, 1),
+    }
+    return snippets, meta
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import re
+from typing import Any
+
+# Embedding-model conventions shared by ingest, retrieval and the benchmarks: input prefixes, and the
+# collection metadata tag that records which model built an index.
+
+EMBEDDING_MODEL_KEY = "embedding_model"
+
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+
+class EmbeddingModelMismatch(RuntimeError):
+    pass
+
+
+def make_passage(text: str, model_name: str) -> str:
+    # e5-style models work best with prefixes
+    if "e5" in model_name.lower():
+        return "passage: " + text
+    return text
+
+
+def make_query(text: str, model_name: str) -> str:
+    if "e5" in model_name.lower():
+        return "query: " + text
+    return text
+
+
+def model_slug(model_name: str) -> str:
+    """
+    "intfloat/multilingual-e5-small" -> "multilingual-e5-small" (safe in Chroma collection names).
+    """
+    name = (model_name or "").rstrip("/").rsplit("/", 1)[-1].lower()
+    slug = _SLUG_RE.sub("-", name).strip("-")
+    if not slug:
+        raise ValueError(f"Cannot build a slug from model name {model_name!r}")
+    return slug
+
+
+def collection_base(base: str, model_name: str, per_model: bool) -> str:
+    """
+    Collection (or shard prefix) name for a model: "infohub_docs.multilingual-e5-small" when every model gets
+    its own collections, so indexes for several models can live in one directory.
+    """
+    return f"{base}.{model_slug(model_name)}" if per_model else base
+
+
+def collection_model(collection) -> str | None:
+    return (collection.metadata or {}).get(EMBEDDING_MODEL_KEY)
+
+
+def tag_collection(collection, model_name: str) -> None:
+    """
+    Record the model on an existing collection. hnsw:* keys are left out: Chroma keeps them in the collection
+    configuration and refuses a modify() that repeats hnsw:space.
+    """
+    meta: dict[str, Any] = {k: v for k, v in (collection.metadata or {}).items() if not k.startswith("hnsw:")}
+    collection.modify(metadata={**meta, EMBEDDING_MODEL_KEY: model_name})
+
+
+def check_model(collection, model_name: str) -> None:
+    """
+    Raise if the collection was built with another model. Untagged (older) collections are accepted.
+    """
+    tagged = collection_model(collection)
+    if tagged and tagged != model_name:
+        raise EmbeddingModelMismatch(
+            f"Collection {collection.name} was built with {tagged}, but EMBEDDING_MODEL is {model_name}"
+        )
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from typing import Any
+
+from app.settings import settings
+
+# Chroma collection metadata in one place, so the indexer, the API and the sweep tool build the same graph.
+# M and construction_ef are fixed when a collection is created; search_ef can be changed on an existing one.
+
+CHROMA_DEFAULTS = {"M": 16, "construction_ef": 100, "search_ef": 100}
+
+
+def collection_metadata(m: int = 0, construction_ef: int = 0, search_ef: int = 0) -> dict[str, Any]:
+    """
+    Metadata for get_or_create_collection; 0 leaves a parameter at Chroma's default.
+    """
+    meta: dict[str, Any] = {"hnsw:space": "cosine"}
+    if m:
+        meta["hnsw:M"] = m
+    if construction_ef:
+        meta["hnsw:construction_ef"] = construction_ef
+    if search_ef:
+        meta["hnsw:search_ef"] = search_ef
+    return meta
+
+
+def settings_metadata() -> dict[str, Any]:
+    return collection_metadata(settings.hnsw_m, settings.hnsw_construction_ef, settings.hnsw_search_ef)
+
+
+def hnsw_params(collection) -> dict[str, Any]:
+    """
+    Effective graph parameters of an existing collection.
+    """
+    conf = (getattr(collection, "configuration", None) or {}).get("hnsw") or {}
+    meta = collection.metadata or {}
+    return {
+        "M": conf.get("max_neighbors", meta.get("hnsw:M", CHROMA_DEFAULTS["M"])),
+        "construction_ef": conf.get("ef_construction", meta.get("hnsw:construction_ef", CHROMA_DEFAULTS["construction_ef"])),
+        "search_ef": conf.get("ef_search", meta.get("hnsw:search_ef", CHROMA_DEFAULTS["search_ef"])),
+    }
+
+
+def apply_search_ef(collection, search_ef: int) -> bool:
+    """
+    Set search_ef on an existing collection (persisted in the index). Returns True if it changed.
+    """
+    if not search_ef or hnsw_params(collection)["search_ef"] == search_ef:
+        return False
+    # through the configuration: modify(metadata=...) would replace the whole metadata dict
+    collection.modify(configuration={"hnsw": {"ef_search": search_ef}})
+    return True
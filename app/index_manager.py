@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator
+
+from app.embeddings import EMBEDDING_MODEL_KEY, check_model, collection_base, collection_model
+from app.hnsw import apply_search_ef, hnsw_params, settings_metadata
+from app.lexsig import LEXSIG_FILENAME, LexSigStore
+from app.projection import PROJECTION_FILENAME, VECTORS_FILENAME, Projection, VectorStore, load_projection
+from app.settings import settings
+from app.shards import parse_shard_list, shard_collection_name
+from app.snapshots import read_local_version
+
+
+@dataclass
+class Shard:
+    name: str  # Chroma collection name
+    species: str | None  # None for the legacy single-collection layout
+    collection: Any
+    lexsig: LexSigStore | None = None
+    # compressed index (ingest.compress_index): queries are projected, candidates optionally rescored
+    projection: Projection | None = None
+    vectors: VectorStore | None = None
+    embedding_model: str | None = None  # from the collection tag; None for indexes built before tagging
+
+
+@dataclass
+class IndexHandle:
+    """
+    Everything a query needs from one index directory. Never mutated after load, so a request that grabbed a
+    handle keeps using it even if a newer one is swapped in. Once replaced, the handle closes its Chroma
+    client when the last query holding it is done (Chroma keeps one in-memory system per directory).
+    """
+    path: str
+    version: str | None
+    shards: list[Shard]
+    loaded_at: float = field(default_factory=time.time)
+    client: Any = None
+    _users: int = field(default=0, repr=False)
+    _retired: bool = field(default=False, repr=False)
+    _closed: bool = field(default=False, repr=False)
+    _guard: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def acquire(self) -> bool:
+        """
+        Register a user; False if the handle was already closed (the caller should take the current one).
+        """
+        with self._guard:
+            if self._closed:
+                return False
+            self._users += 1
+            return True
+
+    def release(self) -> None:
+        with self._guard:
+            self._users -= 1
+            close = self._retired and self._users == 0 and not self._closed
+            self._closed = self._closed or close
+        if close:
+            self._close()
+
+    def retire(self) -> None:
+        with self._guard:
+            self._retired = True
+            close = self._users == 0 and not self._closed
+            self._closed = self._closed or close
+        if close:
+            self._close()
+
+    def _close(self) -> None:
+        if self.client is not None:
+            # drops Chroma's cached system for this directory: HNSW segments, SQLite connections
+            self.client.close()
+
+    def info(self) -> dict[str, Any]:
+        return {
+            "path": self.path,
+            "version": self.version,
+            "shards": [s.name for s in self.shards],
+            "embedding_model": self.shards[0].embedding_model if self.shards else None,
+            "lexsig": any(s.lexsig is not None for s in self.shards),
+            "hnsw": hnsw_params(self.shards[0].collection) if self.shards else None,
+            "projection_dims": self.shards[0].projection.dims if self.shards and self.shards[0].projection else None,
+            "rescore_vectors": self.shards[0].vectors.dtype if self.shards and self.shards[0].vectors else None,
+            "loaded_at": self.loaded_at,
+        }
+
+
+def open_index(path: str) -> IndexHandle:
+    import chromadb  # heavy; deferred so importing the API stays fast
+
+    client = chromadb.PersistentClient(path=path)
+    lexsig_path = Path(path) / LEXSIG_FILENAME
+    lexsig = LexSigStore(lexsig_path) if lexsig_path.exists() else None
+    projection = load_projection(Path(path) / PROJECTION_FILENAME)
+    vectors_path = Path(path) / VECTORS_FILENAME
+    vectors = VectorStore(vectors_path) if projection is not None and vectors_path.exists() else None
+    extra = {"lexsig": lexsig, "projection": projection, "vectors": vectors}
+    species_list = parse_shard_list(settings.chroma_shards)
+    base = collection_base(settings.chroma_collection, settings.embedding_model, settings.embedding_index_per_model)
+    # only used when the collection doesn't exist yet
+    metadata = {**settings_metadata(), EMBEDDING_MODEL_KEY: settings.embedding_model}
+
+    def get_collection(name: str):
+        # a read-only replica never writes to the (shared) index directory
+        if settings.index_read_only:
+            return client.get_collection(name=name)
+        return client.get_or_create_collection(name=name, metadata=metadata)
+
+    if not species_list:
+        col = get_collection(base)
+        shards = [Shard(name=base, species=None, collection=col, embedding_model=collection_model(col), **extra)]
+    else:
+        shards = []
+        for species in species_list:
+            name = shard_collection_name(base, species)
+            col = get_collection(name)
+            shards.append(Shard(name=name, species=species, collection=col, embedding_model=collection_model(col), **extra))
+
+    # an index built with other defaults still gets the configured query-time beam width. Chroma only takes it
+    # from the persisted configuration, so this writes to the index - only when it differs, never when read-only.
+    if not settings.index_read_only:
+        for shard in shards:
+            apply_search_ef(shard.collection, settings.hnsw_search_ef)
+
+    return IndexHandle(path=path, version=read_local_version(path), shards=shards, client=client)
+
+
+def warm_up(handle: IndexHandle) -> None:
+    """
+    Touch every shard (HNSW segment load, SQLite pages) so the first real query after a swap is not cold.
+    """
+    for shard in handle.shards:
+        if not shard.collection.count():
+            continue
+        peek = shard.collection.peek(limit=1)
+        emb = peek.get("embeddings")
+        if emb is not None and len(emb):
+            shard.collection.query(query_embeddings=[list(emb[0])], n_results=1, include=["distances"])
+
+
+class IndexManager:
+    """
+    Holds the active IndexHandle and swaps in new ones loaded + warmed in a background thread.
+    Triggered by the admin endpoint (load_async) or by watching settings.index_pointer_file.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._handle: IndexHandle | None = None
+        self._state: dict[str, Any] = {"status": "idle", "error": None, "loading_path": None, "swaps": 0}
+        self._watcher: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def current(self) -> IndexHandle:
+        handle = self._handle
+        if handle is None:
+            with self._lock:
+                if self._handle is None:
+                    self._handle = open_index(settings.chroma_dir)
+                handle = self._handle
+        return handle
+
+    @contextmanager
+    def lease(self) -> Iterator[IndexHandle]:
+        """
+        with index_manager.lease() as handle: ... -- the handle stays open until the block ends, even if a
+        newer index is swapped in meanwhile.
+        """
+        while True:
+            handle = self.current()
+            if handle.acquire():
+                break
+            # lost a race with a swap that already closed this handle; the new one is current now
+        try:
+            yield handle
+        finally:
+            handle.release()
+
+    def load(self, path: str) -> IndexHandle:
+        """
+        Open + warm `path`, then swap it in. In-flight queries finish on the handle they already hold; the
+        replaced handle is closed after them.
+        """
+        if not (Path(path) / "chroma.sqlite3").exists():
+            raise RuntimeError(f"No chroma.sqlite3 in: {path}")
+        current = self._handle
+        if current is not None and Path(current.path).resolve() == Path(path).resolve():
+            # Chroma would hand back its cached in-memory index for the same directory, i.e. the stale one
+            raise ValueError(f"{path} is already being served; load the updated index from a new directory")
+
+        new = open_index(path)
+        try:
+            # never swap in an index built with another model: every query against it would be noise
+            for shard in new.shards:
+                check_model(shard.collection, settings.embedding_model)
+            warm_up(new)
+        except Exception:
+            new.retire()
+            raise
+        with self._lock:
+            old = self._handle
+            self._handle = new
+            self._state["swaps"] += 1
+            self._state["previous_version"] = old.version if old else None
+        if old is not None:
+            old.retire()
+        return new
+
+    def load_async(self, path: str) -> bool:
+        """
+        Start a background load. Returns False if another load is still running.
+        """
+        with self._lock:
+            if self._state["status"] == "loading":
+                return False
+            self._state.update(status="loading", error=None, loading_path=path)
+
+        def run() -> None:
+            try:
+                self.load(path)
+                state = {"status": "idle", "error": None}
+            except Exception as e:
+                state = {"status": "failed", "error": f"{type(e).__name__}: {e}"[:300]}
+            with self._lock:
+                self._state.update(loading_path=None, **state)
+
+        threading.Thread(target=run, name="index-loader", daemon=True).start()
+        return True
+
+    def watch(self, pointer_file: str, interval_sec: float = 5.0) -> None:
+        """
+        Poll a pointer file whose content is the path of the index directory to serve.
+        Writing a new path into it (e.g. after unpacking a release) triggers a background swap.
+        """
+        if self._watcher is not None:
+            return
+
+        def run() -> None:
+            last: str | None = None
+            while not self._stop.wait(interval_sec):
+                try:
+                    target = Path(pointer_file).read_text(encoding="utf-8").strip()
+                except OSError:
+                    continue
+                if not target or target == last:
+                    continue
+                current = self._handle.path if self._handle else None
+                if last is None and target == current:
+                    last = target
+                    continue
+                if self.load_async(target):
+                    last = target
+
+        self._watcher = threading.Thread(target=run, name="index-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def info(self) -> dict[str, Any]:
+        handle = self._handle
+        with self._lock:
+            state = dict(self._state)
+        return {**(handle.info() if handle else {"path": settings.chroma_dir, "version": None}), "manager": state}
+
+
+index_manager = IndexManager()
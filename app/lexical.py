@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import re
+
+# --- basic tokenization/keyword logic (no extra deps) ---
+# Shared by query-time scoring (app.retrieval) and ingest, so chunk stems are computed with the same rules.
+
+STOPWORDS = {
+    # Georgian (tiny list, enough to reduce noise)
+    "და", "თუ", "ან", "რომ", "რა", "როდის", "სად", "როგორ", "რამდენი", "ვის", "ვინ",
+    "არის", "იყო", "იქნება", "ეს", "ის", "მათ", "ჩვენ", "თქვენ", "მის", "მისი", "მათი",
+    "შესახებ", "მიხედვით", "დოკუმენტი", "დოკუმენტით", "მუხლი", "მუხლით", "კანონი", "კოდექსი",
+}
+
+WORD_RE = re.compile(r"[0-9]+|[ა-ჰ]+|[A-Za-z]+", flags=re.UNICODE)
+_GEORGIAN_RE = re.compile(r"[ა-ჰ]+")
+
+
+def extract_keywords(q: str, limit: int | None = 25) -> list[str]:
+    q = (q or "").lower()
+    tokens = WORD_RE.findall(q)
+    out: list[str] = []
+    for t in tokens:
+        t = t.strip()
+        if not t:
+            continue
+        if t in STOPWORDS:
+            continue
+        # keep numbers and meaningful words
+        if t.isdigit():
+            out.append(t)
+            continue
+        if len(t) < 3:
+            continue
+        out.append(t)
+    return out[:limit] if limit is not None else out
+
+
+def make_stems(tokens: list[str]) -> list[str]:
+    """
+    Georgian is inflected; a cheap trick is using prefix stems for Georgian tokens.
+    """
+    stems: list[str] = []
+    for t in tokens:
+        if t.isdigit():
+            stems.append(t)
+        elif _GEORGIAN_RE.fullmatch(t):
+            stems.append(t[:5])  # prefix stem
+        else:
+            stems.append(t.lower())
+    # unique while preserving order
+    seen = set()
+    uniq = []
+    for s in stems:
+        if s in seen:
+            continue
+        seen.add(s)
+        uniq.append(s)
+    return uniq
+
+
+# Shorter prefixes of every Georgian chunk word are indexed too: a query word shorter than the 5-char stem
+# ("წლის", "ენა") is then still found in its inflected forms ("წლისთვის", "ენაზე"), as substring matching did.
+_SHORT_PREFIXES = (3, 4)
+
+
+def chunk_stems(text: str) -> set[str]:
+    """
+    The full stem set of a chunk (no keyword limit), plus the short prefixes of its Georgian words.
+    Computed once at ingest.
+    """
+    tokens = extract_keywords(text, limit=None)
+    stems = set(make_stems(tokens))
+    for t in tokens:
+        if _GEORGIAN_RE.fullmatch(t):
+            stems.update(t[:n] for n in _SHORT_PREFIXES if len(t) > n)
+    return stems
+
+
+def stems_score(chunk_stem_set: set[str], stems: list[str]) -> int:
+    """
+    Score by how many query stems are in the chunk's stem set (numbers count double).
+    """
+    score = 0
+    for s in stems:
+        if s and s in chunk_stem_set:
+            score += 2 if s.isdigit() else 1
+    return score
+
+
+def lexical_score(text: str, stems: list[str]) -> int:
+    return stems_score(chunk_stems(text), stems)
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from app.lexical import chunk_stems
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Per-chunk lexical signatures: the chunk's stem set (see app.lexical.chunk_stems) hashed to sorted uint32 arrays.
+# Stored next to the Chroma files so it travels with the index zip.
+LEXSIG_FILENAME = "lexsig.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lexsig (
+    collection TEXT NOT NULL,
+    chunk_id TEXT NOT NULL,
+    sig BLOB NOT NULL,
+    PRIMARY KEY (collection, chunk_id)
+)
+"""
+
+
+def hash_stem(stem: str) -> int:
+    # Stable across processes (unlike hash()); collisions only cost a rare false lexical hit
+    return zlib.crc32(stem.encode("utf-8"))
+
+
+def signature(stem_set: set[str]) -> np.ndarray:
+    import numpy as np
+
+    return np.unique(np.fromiter((hash_stem(s) for s in stem_set), dtype=np.uint32, count=len(stem_set)))
+
+
+def text_signature(text: str) -> np.ndarray:
+    return signature(chunk_stems(text))
+
+
+def query_signature(stems: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns (sorted hashes, weights) for the query stems. Numbers weigh 2, words 1 (same as stems_score).
+    """
+    import numpy as np
+
+    weights: dict[int, int] = {}
+    for s in stems:
+        if s:
+            weights[hash_stem(s)] = 2 if s.isdigit() else 1
+    hashes = np.array(sorted(weights), dtype=np.uint32)
+    return hashes, np.array([weights[h] for h in hashes.tolist()], dtype=np.int32)
+
+
+def score_signatures(sigs: list[np.ndarray], q_hashes: np.ndarray, q_weights: np.ndarray) -> list[int]:
+    """
+    Weighted intersection size of each chunk signature with the query, for all chunks at once.
+    """
+    import numpy as np
+
+    if not sigs:
+        return []
+    if q_hashes.size == 0:
+        return [0] * len(sigs)
+
+    lengths = np.fromiter((s.size for s in sigs), dtype=np.int64, count=len(sigs))
+    flat = np.concatenate(sigs) if lengths.sum() else np.empty(0, dtype=np.uint32)
+
+    pos = np.searchsorted(q_hashes, flat)
+    pos_clipped = np.minimum(pos, q_hashes.size - 1)
+    hit = q_hashes[pos_clipped] == flat
+    contrib = np.where(hit, q_weights[pos_clipped], 0)
+
+    # per-chunk sums over the flattened array (empty signatures score 0)
+    owner = np.repeat(np.arange(len(sigs)), lengths)
+    return np.bincount(owner, weights=contrib, minlength=len(sigs)).astype(int).tolist()
+
+
+class LexSigStore:
+    """
+    SQLite sidecar with one row per chunk. Safe to share between threads (one connection per thread).
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.execute(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def put_many(self, collection: str, chunk_ids: list[str], texts: list[str]) -> None:
+        rows = [(collection, cid, text_signature(text or "").tobytes()) for cid, text in zip(chunk_ids, texts)]
+        conn = self._conn()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO lexsig (collection, chunk_id, sig) VALUES (?, ?, ?)", rows)
+
+    def delete_many(self, collection: str, chunk_ids: list[str]) -> None:
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "DELETE FROM lexsig WHERE collection = ? AND chunk_id = ?",
+                [(collection, cid) for cid in chunk_ids],
+            )
+
+    def get_many(self, collection: str, chunk_ids: list[str]) -> dict[str, np.ndarray]:
+        import numpy as np
+
+        out: dict[str, np.ndarray] = {}
+        conn = self._conn()
+        # stay well under SQLite's bound-parameter limit
+        for i in range(0, len(chunk_ids), 500):
+            batch = chunk_ids[i : i + 500]
+            marks = ",".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT chunk_id, sig FROM lexsig WHERE collection = ? AND chunk_id IN ({marks})",
+                [collection, *batch],
+            )
+            for cid, blob in rows:
+                out[cid] = np.frombuffer(blob, dtype=np.uint32)
+        return out
+
+    def count(self, collection: str | None = None) -> int:
+        conn = self._conn()
+        if collection is None:
+            return conn.execute("SELECT COUNT(*) FROM lexsig").fetchone()[0]
+        return conn.execute("SELECT COUNT(*) FROM lexsig WHERE collection = ?", (collection,)).fetchone()[0]
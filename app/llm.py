@@ -1,10 +1,25 @@
 from __future__ import annotations
 
+import json
+import threading
 import time
+from typing import Callable, Iterator, TypeVar
+
 import requests
+from app.circuit import CircuitBreaker
+from app.llm_cache import LLMCache, cache_key
+from app.llm_pool import EndpointPool, NoEndpointAvailable, parse_urls
 from app.settings import settings
 
 TRANSIENT_STATUS_CODES = {429, 500, 502, 503, 504}
+TEMPERATURE = 0.2
+
+_cache: LLMCache | None = None
+_init_lock = threading.Lock()
+_pools: dict[str, EndpointPool] = {}
+_breakers: dict[str, CircuitBreaker] = {}
+
+T = TypeVar("T")
 
 
 class TransientLLMError(RuntimeError):
@@ -13,21 +28,236 @@ class TransientLLMError(RuntimeError):
         self.status_code = status_code
 
 
+class CircuitOpenError(TransientLLMError):
+    # raised without calling the provider while the model's circuit breaker is open
+    def __init__(self, name: str):
+        super().__init__(None, f"Circuit open for {name}")
+
+
+class EndpointsBusy(TransientLLMError):
+    # no endpoint slot became free in time: our own back-pressure, not a provider failure
+    def __init__(self, message: str):
+        super().__init__(None, message)
+
+
+def _get_cache() -> LLMCache | None:
+    global _cache
+    if not settings.llm_cache_enabled:
+        return None
+    if _cache is None:
+        with _init_lock:
+            if _cache is None:
+                _cache = LLMCache(
+                    settings.llm_cache_path,
+                    ttl_sec=settings.llm_cache_ttl_sec,
+                    fallback_ttl_sec=settings.llm_cache_fallback_ttl_sec,
+                    max_entries=settings.llm_cache_max_entries,
+                )
+    return _cache
+
+
+def _get_pool(provider: str) -> EndpointPool:
+    pool = _pools.get(provider)
+    if pool is None:
+        with _init_lock:
+            pool = _pools.get(provider)
+            if pool is None:
+                if provider == "ollama":
+                    urls = parse_urls(settings.ollama_base_urls, settings.ollama_base_url)
+                else:
+                    urls = parse_urls(settings.llm_base_urls, settings.llm_base_url)
+                # a single endpoint keeps the old behaviour: no concurrency cap, never ejected
+                pooled = len(urls) > 1
+                pool = EndpointPool(
+                    urls,
+                    max_concurrency=settings.llm_endpoint_max_concurrency if pooled else 0,
+                    eject_after=settings.llm_endpoint_eject_after if pooled else 0,
+                    eject_sec=settings.llm_endpoint_eject_sec,
+                )
+                _pools[provider] = pool
+    return pool
+
+
+def _get_breaker(provider: str, model: str) -> CircuitBreaker | None:
+    if not settings.llm_circuit_enabled:
+        return None
+    name = f"{provider}/{model}"
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _init_lock:
+            breaker = _breakers.setdefault(
+                name,
+                CircuitBreaker(
+                    name,
+                    failure_rate=settings.llm_circuit_failure_rate,
+                    min_calls=settings.llm_circuit_min_calls,
+                    window_sec=settings.llm_circuit_window_sec,
+                    open_sec=settings.llm_circuit_open_sec,
+                    slow_call_ms=settings.llm_circuit_slow_call_ms,
+                ),
+            )
+    return breaker
+
+
+def _guarded(provider: str, model: str, call: Callable[[], T]) -> T:
+    """
+    Run one model call through its circuit breaker: refuse immediately while open, and feed the outcome
+    (transient failure or slow call) back into it. Non-transient errors (bad request) don't count.
+    """
+    breaker = _get_breaker(provider, model)
+    if breaker is None:
+        return call()
+    if not breaker.allow():
+        raise CircuitOpenError(breaker.name)
+    t0 = time.perf_counter()
+    try:
+        result = call()
+    except EndpointsBusy:
+        breaker.release()
+        raise
+    except TransientLLMError:
+        breaker.record(True, (time.perf_counter() - t0) * 1000.0)
+        raise
+    except Exception:
+        breaker.record(False, (time.perf_counter() - t0) * 1000.0)
+        raise
+    breaker.record(False, (time.perf_counter() - t0) * 1000.0)
+    return result
+
+
+def _guarded_stream(provider: str, model: str, stream: Callable[[], Iterator[T]]) -> Iterator[T]:
+    """
+    _guarded for a streamed call: the outcome is recorded when the stream ends. A stream abandoned by its
+    reader counts as a success, so a half-open breaker doesn't wait forever for its probe.
+    """
+    breaker = _get_breaker(provider, model)
+    if breaker is None:
+        yield from stream()
+        return
+    if not breaker.allow():
+        raise CircuitOpenError(breaker.name)
+    t0 = time.perf_counter()
+    failed = False
+    busy = False
+    try:
+        yield from stream()
+    except EndpointsBusy:
+        busy = True
+        raise
+    except TransientLLMError:
+        failed = True
+        raise
+    finally:
+        if busy:
+            breaker.release()
+        else:
+            breaker.record(failed, (time.perf_counter() - t0) * 1000.0)
+
+
+def circuit_info() -> dict[str, dict]:
+    return {name: breaker.info() for name, breaker in _breakers.items()}
+
+
+def _is_endpoint_failure(e: Exception) -> bool:
+    # a 400 for a bad request says nothing about the endpoint's health, and a 429 is a quota, not an outage
+    return isinstance(e, TransientLLMError) and e.status_code != 429
+
+
+def pool_info() -> dict[str, list[dict]]:
+    return {provider: pool.info() for provider, pool in _pools.items()}
+
+
+def _check_transient(r: requests.Response) -> None:
+    if r.status_code in TRANSIENT_STATUS_CODES:
+        # treat as transient (rate limit / overload / gateway issues)
+        txt = (r.text or "")[:800]
+        raise TransientLLMError(r.status_code, f"Transient LLM error {r.status_code}: {txt}")
+
+
+def _post(provider: str, path: str, **kwargs) -> tuple[requests.Response, str]:
+    """
+    POST to the least-loaded endpoint of the provider's pool. Network errors and 429/5xx raise
+    TransientLLMError (all but 429 count against that endpoint); no free endpoint raises EndpointsBusy.
+    Other responses are returned as-is.
+    """
+    try:
+        with _get_pool(provider).lease(settings.llm_pool_wait_sec, is_failure=_is_endpoint_failure) as ep:
+            try:
+                r = requests.post(ep.url + path, timeout=120, **kwargs)
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                raise TransientLLMError(None, f"Transient network error: {e}") from e
+
+            _check_transient(r)
+            return r, ep.url
+    except NoEndpointAvailable as e:
+        raise EndpointsBusy(str(e)) from e
+
+
+def _post_stream(provider: str, path: str, **kwargs) -> Iterator[tuple[str, str]]:
+    """
+    Streaming _post: yields (line, endpoint) for each non-empty line of the response body. The endpoint stays
+    leased until the body is fully read (or the reader stops). Other 4xx responses raise RuntimeError.
+    """
+    try:
+        with _get_pool(provider).lease(settings.llm_pool_wait_sec, is_failure=_is_endpoint_failure) as ep:
+            try:
+                r = requests.post(ep.url + path, timeout=120, stream=True, **kwargs)
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                raise TransientLLMError(None, f"Transient network error: {e}") from e
+
+            with r:
+                _check_transient(r)
+                if r.status_code >= 400:
+                    raise RuntimeError(f"LLM request failed {r.status_code}: {(r.text or '')[:800]}")
+                r.encoding = r.encoding or "utf-8"  # SSE / NDJSON responses often carry no charset
+                try:
+                    for line in r.iter_lines(decode_unicode=True):
+                        if line:
+                            yield line, ep.url
+                except requests.exceptions.RequestException as e:
+                    raise TransientLLMError(None, f"Stream interrupted: {e}") from e
+    except NoEndpointAvailable as e:
+        raise EndpointsBusy(str(e)) from e
+
+
+def cache_info() -> dict | None:
+    cache = _get_cache()
+    return cache.stats() if cache else None
+
+
 def chat_with_meta(messages: list[dict]) -> tuple[str, dict]:
     """
-    Returns (content, meta) where meta includes model_used and fallback_used.
+    Returns (content, meta) where meta includes model_used, fallback_used and cache_hit.
     """
     provider = (settings.llm_provider or "none").lower().strip()
 
     if provider == "none":
         raise RuntimeError("LLM_PROVIDER is none")
 
+    cache = _get_cache()
+    key = None
+    if cache is not None and provider in ("ollama", "openai_compat"):
+        model = settings.ollama_model if provider == "ollama" else settings.llm_model
+        key = cache_key(provider, model, messages, TEMPERATURE)
+        hit = cache.get(key)
+        if hit is not None:
+            content, meta = hit
+            return content, {**meta, "cache_hit": True}
+
+    content, meta = _provider_chat(provider, messages)
+    if key is not None:
+        cache.put(key, content, meta)
+    return content, {**meta, "cache_hit": False}
+
+
+def _provider_chat(provider: str, messages: list[dict]) -> tuple[str, dict]:
     if provider == "ollama":
-        content = _ollama_chat(messages)
+        content, endpoint = _guarded("ollama", settings.ollama_model, lambda: _ollama_chat(messages))
         return content, {
             "provider": "ollama",
             "model_used": settings.ollama_model,
             "fallback_used": False,
+            "endpoint": endpoint,
         }
 
     if provider == "openai_compat":
@@ -36,6 +266,51 @@ def chat_with_meta(messages: list[dict]) -> tuple[str, dict]:
     raise RuntimeError(f"Unknown LLM_PROVIDER: {settings.llm_provider}")
 
 
+def chat_stream(messages: list[dict], meta: dict) -> Iterator[str]:
+    """
+    Streaming chat_with_meta: yields the answer in pieces as the model writes it and fills `meta` in place
+    (model_used, fallback_used, endpoint, cache_hit). A cached answer comes out as one piece. The fallback
+    model is only tried when the primary fails before its first piece.
+    """
+    provider = (settings.llm_provider or "none").lower().strip()
+
+    if provider == "none":
+        raise RuntimeError("LLM_PROVIDER is none")
+
+    cache = _get_cache()
+    key = None
+    if cache is not None and provider in ("ollama", "openai_compat"):
+        model = settings.ollama_model if provider == "ollama" else settings.llm_model
+        key = cache_key(provider, model, messages, TEMPERATURE)
+        hit = cache.get(key)
+        if hit is not None:
+            content, hit_meta = hit
+            meta.update(hit_meta, cache_hit=True)
+            yield content
+            return
+
+    parts: list[str] = []
+    for piece in _provider_stream(provider, messages, meta):
+        parts.append(piece)
+        yield piece
+    meta["cache_hit"] = False
+    if key is not None:
+        cache.put(key, "".join(parts).strip(), {k: v for k, v in meta.items() if k != "cache_hit"})
+
+
+def _provider_stream(provider: str, messages: list[dict], meta: dict) -> Iterator[str]:
+    if provider == "ollama":
+        meta.update(provider="ollama", model_used=settings.ollama_model, fallback_used=False)
+        yield from _guarded_stream("ollama", settings.ollama_model, lambda: _ollama_stream(messages, meta))
+        return
+
+    if provider == "openai_compat":
+        yield from _openai_compat_stream(messages, meta)
+        return
+
+    raise RuntimeError(f"Unknown LLM_PROVIDER: {settings.llm_provider}")
+
+
 def chat(messages: list[dict]) -> str:
     # Backwards-compatible wrapper
     return chat_with_meta(messages)[0]
@@ -45,8 +320,7 @@ def _openai_compat_chat(messages: list[dict]) -> tuple[str, dict]:
     if not settings.llm_api_key:
         raise RuntimeError("LLM_API_KEY is not set")
 
-    def call_model(model: str) -> str:
-        url = settings.llm_base_url.rstrip("/") + "/chat/completions"
+    def call_model(model: str) -> tuple[str, str]:
         headers = {
             "Authorization": f"Bearer {settings.llm_api_key}",
             "Content-Type": "application/json",
@@ -54,18 +328,10 @@ def _openai_compat_chat(messages: list[dict]) -> tuple[str, dict]:
         payload = {
             "model": model,
             "messages": messages,
-            "temperature": 0.2,
+            "temperature": TEMPERATURE,
         }
 
-        try:
-            r = requests.post(url, headers=headers, json=payload, timeout=120)
-        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
-            raise TransientLLMError(None, f"Transient network error: {e}") from e
-
-        if r.status_code in TRANSIENT_STATUS_CODES:
-            # treat as transient (rate limit / overload / gateway issues)
-            txt = (r.text or "")[:800]
-            raise TransientLLMError(r.status_code, f"Transient LLM error {r.status_code}: {txt}")
+        r, endpoint = _post("openai_compat", "/chat/completions", headers=headers, json=payload)
 
         try:
             r.raise_for_status()
@@ -75,44 +341,117 @@ def _openai_compat_chat(messages: list[dict]) -> tuple[str, dict]:
 
         data = r.json()
         try:
-            return data["choices"][0]["message"]["content"].strip()
+            return data["choices"][0]["message"]["content"].strip(), endpoint
         except Exception as e:
             raise RuntimeError(f"Unexpected LLM response format: {data}") from e
 
     # Try primary
     try:
-        content = call_model(settings.llm_model)
+        content, endpoint = _guarded("openai_compat", settings.llm_model, lambda: call_model(settings.llm_model))
         return content, {
             "provider": "openai_compat",
             "model_used": settings.llm_model,
             "fallback_used": False,
+            "endpoint": endpoint,
         }
     except TransientLLMError as primary_err:
-        # For transient errors, try fallback with a tiny backoff (if available)
-        if settings.llm_fallback_model:
-            time.sleep(0.8)
-            content = call_model(settings.llm_fallback_model)
+        # For transient errors, try fallback with a tiny backoff (if available). Not when the pool is
+        # saturated: the fallback model would wait for the same endpoints.
+        if settings.llm_fallback_model and not isinstance(primary_err, EndpointsBusy):
+            # no backoff needed when the primary was refused without being called
+            if not isinstance(primary_err, CircuitOpenError):
+                time.sleep(0.8)
+            fallback = settings.llm_fallback_model
+            content, endpoint = _guarded("openai_compat", fallback, lambda: call_model(fallback))
             return content, {
                 "provider": "openai_compat",
                 "model_used": settings.llm_fallback_model,
                 "fallback_used": True,
+                "endpoint": endpoint,
             }
         raise primary_err
 
 
-def _ollama_chat(messages: list[dict]) -> str:
-    url = settings.ollama_base_url.rstrip("/") + "/api/chat"
+def _ollama_chat(messages: list[dict]) -> tuple[str, str]:
     payload = {
         "model": settings.ollama_model,
         "messages": messages,
         "stream": False,
-        "options": {"temperature": 0.2},
+        "options": {"temperature": TEMPERATURE},
     }
-    r = requests.post(url, json=payload, timeout=120)
+    r, endpoint = _post("ollama", "/api/chat", json=payload)
     r.raise_for_status()
     data = r.json()
 
     try:
-        return data["message"]["content"].strip()
+        return data["message"]["content"].strip(), endpoint
     except Exception as e:
         raise RuntimeError(f"Unexpected Ollama response format: {data}") from e
+
+
+def _openai_compat_stream(messages: list[dict], meta: dict) -> Iterator[str]:
+    if not settings.llm_api_key:
+        raise RuntimeError("LLM_API_KEY is not set")
+
+    def stream_model(model: str) -> Iterator[str]:
+        headers = {
+            "Authorization": f"Bearer {settings.llm_api_key}",
+            "Content-Type": "application/json",
+        }
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": TEMPERATURE,
+            "stream": True,
+        }
+        # server-sent events: "data: {chunk}" lines, closed by "data: [DONE]"
+        for line, endpoint in _post_stream("openai_compat", "/chat/completions", headers=headers, json=payload):
+            meta["endpoint"] = endpoint
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            try:
+                piece = (json.loads(data)["choices"][0].get("delta") or {}).get("content")
+            except Exception as e:
+                raise RuntimeError(f"Unexpected LLM stream chunk: {data[:800]}") from e
+            if piece:
+                yield piece
+
+    meta.update(provider="openai_compat", model_used=settings.llm_model, fallback_used=False)
+    started = False
+    try:
+        for piece in _guarded_stream("openai_compat", settings.llm_model, lambda: stream_model(settings.llm_model)):
+            started = True
+            yield piece
+    except TransientLLMError as primary_err:
+        # text already shown can't be taken back, so only a stream that never started falls back
+        if started or not settings.llm_fallback_model or isinstance(primary_err, EndpointsBusy):
+            raise
+        if not isinstance(primary_err, CircuitOpenError):
+            time.sleep(0.8)
+        fallback = settings.llm_fallback_model
+        meta.update(model_used=fallback, fallback_used=True)
+        yield from _guarded_stream("openai_compat", fallback, lambda: stream_model(fallback))
+
+
+def _ollama_stream(messages: list[dict], meta: dict) -> Iterator[str]:
+    payload = {
+        "model": settings.ollama_model,
+        "messages": messages,
+        "stream": True,
+        "options": {"temperature": TEMPERATURE},
+    }
+    # one JSON object per line; the last one has "done": true
+    for line, endpoint in _post_stream("ollama", "/api/chat", json=payload):
+        meta["endpoint"] = endpoint
+        try:
+            data = json.loads(line)
+            piece = (data.get("message") or {}).get("content")
+        except Exception as e:
+            raise RuntimeError(f"Unexpected Ollama stream chunk: {line[:800]}") from e
+        if piece:
+            yield piece
+        if data.get("done"):
+            break
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+# Exact-match cache for LLM answers: same provider + model + messages -> same stored answer.
+# SQLite in WAL mode so every API worker process shares one file.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    content TEXT NOT NULL,
+    meta TEXT NOT NULL,
+    fallback INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS llm_cache_expires ON llm_cache (expires_at);
+CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache (last_used);
+"""
+
+# evict every N writes per process, so max_entries is a soft cap (COUNT(*) is cheap at this size, but not free)
+_EVICT_EVERY = 100
+
+
+def cache_key(provider: str, model: str, messages: list[dict], temperature: float) -> str:
+    payload = json.dumps(
+        {"provider": provider, "model": model, "temperature": temperature, "messages": messages},
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    ttl_sec applies to answers from the requested model, fallback_ttl_sec to answers the fallback model
+    produced (they are worse, so they should be replaced by a primary answer sooner).
+    """
+
+    def __init__(self, path: str | Path, ttl_sec: float, fallback_ttl_sec: float, max_entries: int):
+        self.path = Path(path)
+        self.ttl_sec = ttl_sec
+        self.fallback_ttl_sec = fallback_ttl_sec
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # other workers may hold the write lock briefly
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> tuple[str, dict[str, Any]] | None:
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute(
+            "SELECT content, meta FROM llm_cache WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        if row is None:
+            return None
+        with conn:
+            conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+        return row[0], json.loads(row[1])
+
+    def put(self, key: str, content: str, meta: dict[str, Any]) -> None:
+        fallback = bool(meta.get("fallback_used"))
+        ttl = self.fallback_ttl_sec if fallback else self.ttl_sec
+        if ttl <= 0:
+            return
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, content, meta, fallback, created_at, expires_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, content, json.dumps(meta, ensure_ascii=False), int(fallback), now, now + ttl, now),
+            )
+        self._writes += 1
+        if self._writes % _EVICT_EVERY == 1:
+            self.evict()
+
+    def evict(self) -> None:
+        """
+        Drop expired entries, then the least recently used ones above max_entries.
+        """
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+            n = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            excess = n - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+
+    def stats(self) -> dict[str, Any]:
+        conn = self._conn()
+        n, n_fallback = conn.execute("SELECT COUNT(*), COALESCE(SUM(fallback), 0) FROM llm_cache").fetchone()
+        return {"path": str(self.path), "entries": n, "fallback_entries": n_fallback, "max_entries": self.max_entries}
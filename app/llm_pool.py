@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Iterator
+
+
+class NoEndpointAvailable(RuntimeError):
+    pass
+
+
+@dataclass
+class Endpoint:
+    url: str
+    max_concurrency: int
+    in_flight: int = 0
+    ewma_ms: float | None = None
+    requests: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    ejected_until: float = 0.0
+    ejections: int = 0
+    last_error: str | None = None
+
+    def info(self, now: float) -> dict[str, Any]:
+        return {
+            "url": self.url,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency or None,
+            "ewma_ms": round(self.ewma_ms, 1) if self.ewma_ms is not None else None,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ejected": self.ejected_until > now,
+            "ejections": self.ejections,
+            "last_error": self.last_error,
+        }
+
+
+class EndpointPool:
+    """
+    Several base URLs serving the same models. Each call leases the endpoint with the lowest expected wait,
+    (in_flight + 1) * EWMA latency, among those below their concurrency limit. An endpoint that fails
+    `eject_after` times in a row is skipped for `eject_sec`; after that one request probes it again.
+    max_concurrency <= 0 means no limit and eject_after <= 0 never ejects (a lone endpoint has no alternative).
+    """
+
+    def __init__(
+        self,
+        urls: list[str],
+        max_concurrency: int = 4,
+        eject_after: int = 3,
+        eject_sec: float = 30.0,
+        alpha: float = 0.3,
+    ):
+        if not urls:
+            raise ValueError("EndpointPool needs at least one URL")
+        self.endpoints = [Endpoint(url=u.rstrip("/"), max_concurrency=max(0, max_concurrency)) for u in urls]
+        self.eject_after = eject_after
+        self.eject_sec = eject_sec
+        self.alpha = alpha
+        self._cond = threading.Condition()
+
+    def _pick(self, now: float) -> Endpoint | None:
+        free = [e for e in self.endpoints if not e.max_concurrency or e.in_flight < e.max_concurrency]
+        healthy = [e for e in free if e.ejected_until <= now]
+        if not healthy:
+            return None
+        # endpoints without a latency sample yet borrow the best known one, so new/recovered ones get traffic
+        known = [e.ewma_ms for e in self.endpoints if e.ewma_ms is not None]
+        default_ms = min(known) if known else 1.0
+        return min(healthy, key=lambda e: ((e.in_flight + 1) * (e.ewma_ms or default_ms), e.in_flight))
+
+    def acquire(self, timeout: float) -> Endpoint:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                now = time.time()
+                ep = self._pick(now)
+                if ep is not None:
+                    ep.in_flight += 1
+                    return ep
+                if all(e.ejected_until > now for e in self.endpoints):
+                    raise NoEndpointAvailable("All LLM endpoints are ejected after repeated failures")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise NoEndpointAvailable("All LLM endpoints are at their concurrency limit")
+                # woken by release(); the cap also lets an ejection expire while waiting
+                self._cond.wait(min(remaining, 1.0))
+
+    def release(self, ep: Endpoint, ok: bool | None, latency_ms: float, error: str | None = None) -> None:
+        """
+        ok=None is a neutral outcome (rate limited, rejected request, abandoned stream): it says nothing about the
+        endpoint's health or speed, so only the slot is freed.
+        """
+        with self._cond:
+            ep.in_flight -= 1
+            ep.requests += 1
+            if ok:
+                ep.consecutive_failures = 0
+                ep.ewma_ms = latency_ms if ep.ewma_ms is None else (1 - self.alpha) * ep.ewma_ms + self.alpha * latency_ms
+            elif ok is not None:
+                ep.failures += 1
+                ep.consecutive_failures += 1
+                ep.last_error = (error or "")[:200] or None
+                now = time.time()
+                # calls already in flight when it was ejected don't extend or recount the ejection
+                if 0 < self.eject_after <= ep.consecutive_failures and ep.ejected_until <= now:
+                    ep.ejected_until = now + self.eject_sec
+                    ep.ejections += 1
+                    # a probe after the ejection needs only one more failure to be ejected again
+                    ep.consecutive_failures = self.eject_after - 1
+            self._cond.notify()
+
+    @contextmanager
+    def lease(self, timeout: float, is_failure=lambda e: True) -> Iterator[Endpoint]:
+        """
+        with pool.lease(30) as ep: ... -- latency and outcome are recorded on exit.
+        is_failure(exc) decides whether an exception counts against the endpoint (e.g. not for a 400).
+        """
+        ep = self.acquire(timeout)
+        t0 = time.perf_counter()
+        try:
+            yield ep
+        except BaseException as e:
+            # GeneratorExit: a streamed response abandoned by its reader; the slot must still be freed.
+            # Exceptions that are not the endpoint's fault are neutral: a fast 429 must not look like a fast answer.
+            failed = isinstance(e, Exception) and is_failure(e)
+            self.release(ep, ok=False if failed else None, latency_ms=(time.perf_counter() - t0) * 1000.0, error=str(e))
+            raise
+        self.release(ep, ok=True, latency_ms=(time.perf_counter() - t0) * 1000.0)
+
+    def info(self) -> list[dict[str, Any]]:
+        now = time.time()
+        with self._cond:
+            return [e.info(now) for e in self.endpoints]
+
+
+def parse_urls(value: str | None, default: str) -> list[str]:
+    urls = [u.strip() for u in (value or "").split(",") if u.strip()]
+    return urls or [default]
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import itertools
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+
+from app.settings import settings
+
+# Stdlib sampling profiler (sys._current_frames), nothing runs unless asked for:
+# - per request: /ask with "X-Profile: speedscope|collapsed" + admin token profiles that one call;
+# - continuous: PROFILE_CONTINUOUS_HZ > 0 samples every thread at a low rate and flushes aggregated stacks.
+
+T = TypeVar("T")
+
+# Threads that do work on behalf of a request (see app.retrieval pools)
+_WORKER_PREFIXES = ("shard", "retriever")
+
+_seq = itertools.count(1)
+
+Stack = tuple[tuple[str, str, int], ...]  # (function, module, first line), root -> leaf
+
+
+def _stack(frame) -> Stack:
+    out = []
+    while frame is not None:
+        code = frame.f_code
+        out.append((getattr(code, "co_qualname", code.co_name), frame.f_globals.get("__name__", "?"), code.co_firstlineno))
+        frame = frame.f_back
+    out.reverse()
+    return tuple(out)
+
+
+def _is_app_work(stack: Stack) -> bool:
+    # an idle pool worker blocked on its queue has no app.* frame
+    return any(module.startswith("app.") for _, module, _ in stack)
+
+
+class SamplingProfiler:
+    """
+    Samples Python stacks every `interval_sec` from a background thread and aggregates identical stacks.
+    thread_ids=None samples every thread (except its own); otherwise the given threads plus busy retrieval workers.
+    """
+
+    def __init__(self, interval_sec: float, thread_ids: set[int] | None = None, include_workers: bool = True):
+        self.interval_sec = interval_sec
+        self.thread_ids = thread_ids
+        self.include_workers = include_workers
+        self.counts: Counter[Stack] = Counter()
+        self.samples = 0
+        self.started_at = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def _sample_once(self) -> None:
+        own = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()} if self.include_workers else {}
+        frames = sys._current_frames()
+        with self._lock:
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                if self.thread_ids is None:
+                    stack = _stack(frame)
+                elif ident in self.thread_ids:
+                    stack = _stack(frame)
+                elif names.get(ident, "").startswith(_WORKER_PREFIXES):
+                    stack = _stack(frame)
+                    if not _is_app_work(stack):
+                        continue
+                else:
+                    continue
+                self.counts[stack] += 1
+            self.samples += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_sec):
+            self._sample_once()
+
+    def start(self) -> "SamplingProfiler":
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def take(self) -> Counter[Stack]:
+        """
+        Aggregated stacks so far, resetting the counters (continuous mode flushes with this).
+        """
+        with self._lock:
+            counts, self.counts = self.counts, Counter()
+            self.samples = 0
+        return counts
+
+
+def to_collapsed(counts: Counter[Stack]) -> str:
+    """
+    Brendan Gregg's folded format ("a;b;c 12"), input for flamegraph.pl / speedscope / inferno.
+    """
+    lines = [
+        ";".join(f"{fn} ({mod}:{line})" for fn, mod, line in stack) + f" {n}"
+        for stack, n in counts.most_common()
+    ]
+    return "\n".join(lines) + ("\n" if lines else "")
+
+
+def to_speedscope(counts: Counter[Stack], interval_sec: float, name: str) -> dict[str, Any]:
+    frames: list[dict[str, Any]] = []
+    index: dict[tuple[str, str, int], int] = {}
+    samples: list[list[int]] = []
+    weights: list[float] = []
+    for stack, n in counts.most_common():
+        ids = []
+        for fr in stack:
+            if fr not in index:
+                index[fr] = len(frames)
+                frames.append({"name": fr[0], "file": fr[1], "line": fr[2]})
+            ids.append(index[fr])
+        samples.append(ids)
+        weights.append(n * interval_sec)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "infohub-rag",
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }
+        ],
+    }
+
+
+def _write(counts: Counter[Stack], fmt: str, interval_sec: float, stem: str) -> Path:
+    out_dir = Path(settings.profile_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if fmt == "collapsed":
+        path = out_dir / f"{stem}.collapsed.txt"
+        path.write_text(to_collapsed(counts), encoding="utf-8")
+    else:
+        path = out_dir / f"{stem}.speedscope.json"
+        path.write_text(json.dumps(to_speedscope(counts, interval_sec, stem), ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def profile_call(fn: Callable[[], T], fmt: str = "speedscope", label: str = "ask") -> tuple[T, dict[str, Any]]:
+    """
+    Run fn() under a sampling profiler (current thread + busy retrieval workers) and store the profile.
+    Returns (result, {"path", "format", "samples", "duration_ms"}).
+    """
+    interval = max(0.0005, settings.profile_interval_ms / 1000.0)
+    prof = SamplingProfiler(interval, thread_ids={threading.get_ident()}).start()
+    t0 = time.perf_counter()
+    try:
+        result = fn()
+    finally:
+        prof.stop()
+    duration_ms = (time.perf_counter() - t0) * 1000.0
+    stem = f"{label}-{time.strftime('%Y%m%d-%H%M%S')}-{next(_seq)}"
+    path = _write(prof.counts, fmt, interval, stem)
+    return result, {"path": str(path), "format": fmt, "samples": prof.samples, "duration_ms": round(duration_ms, 1)}
+
+
+class ContinuousProfiler:
+    """
+    Low-rate sampling of every thread; aggregated stacks are flushed to PROFILE_DIR every flush_sec.
+    """
+
+    def __init__(self, hz: float, flush_sec: float, fmt: str = "collapsed"):
+        self.profiler = SamplingProfiler(1.0 / hz, thread_ids=None, include_workers=False)
+        self.flush_sec = flush_sec
+        self.fmt = fmt
+        self._stop = threading.Event()
+        self._flusher: threading.Thread | None = None
+        self.last_path: str | None = None
+
+    def flush(self) -> None:
+        counts = self.profiler.take()
+        if counts:
+            self.last_path = str(
+                _write(counts, self.fmt, self.profiler.interval_sec, f"continuous-{time.strftime('%Y%m%d-%H%M%S')}")
+            )
+
+    def start(self) -> None:
+        self.profiler.start()
+
+        def run() -> None:
+            while not self._stop.wait(self.flush_sec):
+                self.flush()
+
+        self._flusher = threading.Thread(target=run, name="profiler-flush", daemon=True)
+        self._flusher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.profiler.stop()
+        self.flush()
+
+    def info(self) -> dict[str, Any]:
+        return {"hz": 1.0 / self.profiler.interval_sec, "flush_sec": self.flush_sec, "last_path": self.last_path}
+
+
+def start_continuous() -> ContinuousProfiler | None:
+    if settings.profile_continuous_hz <= 0:
+        return None
+    prof = ContinuousProfiler(settings.profile_continuous_hz, settings.profile_flush_sec, settings.profile_format)
+    prof.start()
+    return prof
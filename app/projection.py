@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Compressed vector storage (see ingest.compress_index): the Chroma collections hold PCA-reduced embeddings,
+# projection.npz holds the PCA fitted on the corpus (queries must be projected the same way), and an optional
+# vectors.sqlite3 sidecar keeps the full-dimension vectors, int8 or float16, to rescore the top candidates.
+PROJECTION_FILENAME = "projection.npz"
+VECTORS_FILENAME = "vectors.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vectors (
+    collection TEXT NOT NULL,
+    chunk_id TEXT NOT NULL,
+    scale REAL NOT NULL,
+    vec BLOB NOT NULL,
+    PRIMARY KEY (collection, chunk_id)
+)
+"""
+
+
+@dataclass
+class Projection:
+    mean: np.ndarray  # (input_dims,)
+    components: np.ndarray  # (input_dims, dims)
+
+    @property
+    def input_dims(self) -> int:
+        return int(self.components.shape[0])
+
+    @property
+    def dims(self) -> int:
+        return int(self.components.shape[1])
+
+    def apply(self, x) -> np.ndarray:
+        """
+        Project (n, input_dims) embeddings and re-normalize, so cosine distance still applies.
+        """
+        import numpy as np
+
+        y = (np.asarray(x, dtype=np.float32) - self.mean) @ self.components
+        return y / np.linalg.norm(y, axis=1, keepdims=True).clip(min=1e-12)
+
+    def save(self, path: str | Path) -> None:
+        import numpy as np
+
+        np.savez(path, mean=self.mean, components=self.components)
+
+
+def load_projection(path: str | Path) -> Projection | None:
+    import numpy as np
+
+    path = Path(path)
+    if not path.exists():
+        return None
+    with np.load(path) as z:
+        return Projection(mean=z["mean"].astype(np.float32), components=z["components"].astype(np.float32))
+
+
+def fit_pca(x, dims: int, sample: int = 50000, seed: int = 0) -> tuple[Projection, float]:
+    """
+    PCA on (a sample of) the corpus embeddings. Returns (projection, share of variance kept).
+    """
+    import numpy as np
+
+    x = np.asarray(x, dtype=np.float32)
+    if dims >= x.shape[1]:
+        raise ValueError(f"dims={dims} must be below the embedding size {x.shape[1]}")
+    if len(x) > sample:
+        x = x[np.random.default_rng(seed).choice(len(x), size=sample, replace=False)]
+    mean = x.mean(axis=0)
+    _, s, vt = np.linalg.svd(x - mean, full_matrices=False)
+    var = s**2
+    kept = float(var[:dims].sum() / var.sum())
+    return Projection(mean=mean.astype(np.float32), components=vt[:dims].T.astype(np.float32)), kept
+
+
+def quantize(x, dtype: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    int8: symmetric per-vector scale (max |value| -> 127); float16: plain cast with scale 1.
+    Returns (codes, scales).
+    """
+    import numpy as np
+
+    x = np.asarray(x, dtype=np.float32)
+    if dtype == "float16":
+        return x.astype(np.float16), np.ones(len(x), dtype=np.float32)
+    if dtype != "int8":
+        raise ValueError(f"Unknown vector dtype: {dtype}")
+    scales = (np.abs(x).max(axis=1) / 127.0).clip(min=1e-12).astype(np.float32)
+    return np.round(x / scales[:, None]).astype(np.int8), scales
+
+
+class VectorStore:
+    """
+    SQLite sidecar with one full-dimension vector per chunk, for rescoring. One connection per thread.
+    """
+
+    def __init__(self, path: str | Path, dtype: str | None = None):
+        self.path = Path(path)
+        self._local = threading.local()
+        self._dtype = dtype  # read from the file when opening an existing store
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.execute(_SCHEMA)
+            conn.execute("CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._local.conn = conn
+        return conn
+
+    @property
+    def dtype(self) -> str:
+        if self._dtype is None:
+            row = self._conn().execute("SELECT value FROM info WHERE key = 'dtype'").fetchone()
+            self._dtype = row[0] if row else "int8"
+        return self._dtype
+
+    def put_many(self, collection: str, chunk_ids: list[str], x) -> None:
+        codes, scales = quantize(x, self.dtype)
+        conn = self._conn()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO info (key, value) VALUES ('dtype', ?)", (self.dtype,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO vectors (collection, chunk_id, scale, vec) VALUES (?, ?, ?, ?)",
+                [(collection, cid, float(s), c.tobytes()) for cid, s, c in zip(chunk_ids, scales, codes)],
+            )
+
+    def delete_many(self, collection: str, chunk_ids: list[str]) -> None:
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "DELETE FROM vectors WHERE collection = ? AND chunk_id = ?",
+                [(collection, cid) for cid in chunk_ids],
+            )
+
+    def get_many(self, collection: str, chunk_ids: list[str]) -> dict[str, np.ndarray]:
+        """
+        Dequantized float32 vectors for the ids that have one.
+        """
+        import numpy as np
+
+        code_dtype = np.int8 if self.dtype == "int8" else np.float16
+        out: dict[str, np.ndarray] = {}
+        conn = self._conn()
+        for i in range(0, len(chunk_ids), 500):
+            batch = chunk_ids[i : i + 500]
+            marks = ",".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT chunk_id, scale, vec FROM vectors WHERE collection = ? AND chunk_id IN ({marks})",
+                [collection, *batch],
+            )
+            for cid, scale, blob in rows:
+                out[cid] = np.frombuffer(blob, dtype=code_dtype).astype(np.float32) * scale
+        return out
+
+    def count(self, collection: str | None = None) -> int:
+        conn = self._conn()
+        if collection is None:
+            return conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+        return conn.execute("SELECT COUNT(*) FROM vectors WHERE collection = ?", (collection,)).fetchone()[0]
@@ -1,13 +1,15 @@
 from __future__ import annotations
 
 import re
-from dataclasses import dataclass
-from typing import Any
+import time
+from dataclasses import dataclass, field
+from typing import Any, Iterator
 
+from app.compression import compress
 from app.prompts import SYSTEM_PROMPT, MANDATORY_CITATION_LINE
-from app.llm import chat_with_meta
+from app.llm import CircuitOpenError, chat_stream, chat_with_meta
 from app.settings import settings
-from app.retrieval import retrieve as retrieve_chunks
+from app.retrieval import RetrievalFilters, canonical_doc_url, embed_passages, embed_query, retrieve_with_meta
 
 
 @dataclass
@@ -15,6 +17,8 @@ class Source:
     title: str
     url: str
     page: int | None = None
+    # documents whose near-identical text was collapsed into this one at ingest (--dedup)
+    duplicates: list[str] = field(default_factory=list)
 
 
 # Strip any model-written sources section so we can always render canonical links.
@@ -32,7 +36,7 @@ def _strip_model_sources_block(text: str) -> str:
 
 
 def _dedup_sources(sources: list[Source]) -> list[Source]:
-    seen: set[tuple[str, str]] = set()
+    seen: dict[tuple[str, str], Source] = {}
     out: list[Source] = []
     for s in sources:
         url = (s.url or "").strip()
@@ -41,9 +45,15 @@ def _dedup_sources(sources: list[Source]) -> list[Source]:
             continue
         key = (url, title)
         if key in seen:
+            kept = seen[key]
+            kept.duplicates += [d for d in s.duplicates if d not in kept.duplicates]
             continue
-        seen.add(key)
-        out.append(Source(title=title or "Untitled", url=url, page=s.page))
+        seen[key] = Source(title=title or "Untitled", url=url, page=s.page, duplicates=list(s.duplicates))
+        out.append(seen[key])
+    # a duplicate that is itself cited doesn't need repeating under another source
+    cited = {s.url for s in out}
+    for s in out:
+        s.duplicates = [d for d in s.duplicates if d not in cited]
     return out
 
 
@@ -57,6 +67,8 @@ def _sources_block(sources: list[Source]) -> str:
     for s in sources:
         page_part = f" — გვერდი {s.page}" if s.page is not None else ""
         lines.append(f"- {s.title} — {s.url}{page_part}")
+        if s.duplicates:
+            lines.append(f"  (იგივე ტექსტი ასევე: {', '.join(s.duplicates)})")
 
     return "წყაროები:\n" + "\n".join(lines)
 
@@ -84,32 +96,61 @@ def _build_context(snippets: list[str], max_chars: int = 12000) -> str:
     return "\n\n".join(buf) if buf else "(no context — all retrieved snippets were empty)"
 
 
-def answer(question: str, k: int = 12) -> dict[str, Any]:
+@dataclass
+class _Prepared:
+    # everything answer() / answer_stream() need around the model call
+    question: str
+    k: int
+    filters_meta: dict | None
+    retrieval_meta: dict
+    snippets: list[str]
+    sources: list[Source]
+    chunk_ids: list[str] = field(default_factory=list)
+    compression_meta: dict | None = None
+    messages: list[dict] | None = None  # None: nothing retrieved, no model call
+    # stage -> ms (retrieval, compression, llm, total); t0 is when the request started
+    timings_ms: dict[str, float] = field(default_factory=dict)
+    t0: float = 0.0
+
+
+def _prepare(question: str, k: int, filters: RetrievalFilters | None) -> _Prepared:
+    t0 = time.perf_counter()
     # Retrieve from index (hybrid retrieval lives in app.retrieval)
-    retrieved = retrieve_chunks(question, k=k)
+    retrieved, retrieval_meta = retrieve_with_meta(question, k=k, filters=filters)
+    timings = {"retrieval": _ms_since(t0)}
+    filters_meta = filters.as_dict() if filters and not filters.is_empty() else None
     if not retrieved:
-        content = (
-            f"{MANDATORY_CITATION_LINE}\n\n"
-            "InfoHub-ის ინდექსში ამ კითხვასთან დაკავშირებული სანდო ამონარიდები ვერ მოიძებნა, ამიტომ "
-            "დოკუმენტებზე დაყრდნობით ზუსტი პასუხის გაცემას ვერ ვახერხებ."
-        )
-        content = _strip_model_sources_block(content)
-        content = f"{content}\n\n{_sources_block([])}".strip()
-        return {
-            "answer": content,
-            "sources": [],
-            "meta": {
-                "provider": settings.llm_provider,
-                "model_used": None,
-                "fallback_used": False,
-                "k": k,
-            },
-        }
+        return _Prepared(question, k, filters_meta, retrieval_meta, snippets=[], sources=[], timings_ms=timings, t0=t0)
 
     snippets = [c.text for c in retrieved]
-    sources = [Source(title=c.title, url=c.url, page=getattr(c, "page", None)) for c in retrieved]
+    sources = [
+        Source(
+            title=c.title,
+            url=c.url,
+            page=getattr(c, "page", None),
+            duplicates=[canonical_doc_url(key) for key in c.duplicate_keys],
+        )
+        for c in retrieved
+    ]
     sources = _dedup_sources(sources)
 
+    compression_meta = None
+    mode = (settings.context_compression or "off").lower()
+    if mode in ("lexical", "hybrid"):
+        # every chunk keeps at least one sentence, so the sources list above stays accurate
+        t1 = time.perf_counter()
+        hybrid = mode == "hybrid"
+        compressed, compression_meta = compress(
+            question,
+            snippets,
+            budget_chars=settings.context_compression_budget_chars,
+            query_embedding=embed_query(question) if hybrid else None,
+            embed_passages=embed_passages if hybrid else None,
+        )
+        compression_meta["mode"] = mode
+        snippets = [s.text for s in compressed]
+        timings["compression"] = _ms_since(t1)
+
     context_text = _build_context(snippets, max_chars=12000)
 
     user_prompt = f"""
@@ -123,35 +164,78 @@ Return the final answer in Georgian following the rules.
 Do NOT include a 'წყაროები:' section; it will be added separately.
 """.strip()
 
+    return _Prepared(
+        question,
+        k,
+        filters_meta,
+        retrieval_meta,
+        snippets=snippets,
+        sources=sources,
+        chunk_ids=[c.chunk_id for c in retrieved if c.chunk_id],
+        compression_meta=compression_meta,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt},
+        ],
+        timings_ms=timings,
+        t0=t0,
+    )
+
+
+def _ms_since(t0: float) -> float:
+    return round((time.perf_counter() - t0) * 1000.0, 1)
+
+
+def _no_context_result(prep: _Prepared) -> dict[str, Any]:
+    content = (
+        f"{MANDATORY_CITATION_LINE}\n\n"
+        "InfoHub-ის ინდექსში ამ კითხვასთან დაკავშირებული სანდო ამონარიდები ვერ მოიძებნა, ამიტომ "
+        "დოკუმენტებზე დაყრდნობით ზუსტი პასუხის გაცემას ვერ ვახერხებ."
+    )
+    content = _strip_model_sources_block(content)
+    content = f"{content}\n\n{_sources_block([])}".strip()
+    return {
+        "answer": content,
+        "sources": [],
+        "meta": {
+            "provider": settings.llm_provider,
+            "model_used": None,
+            "fallback_used": False,
+            "k": prep.k,
+            "filters": prep.filters_meta,
+            "retrieval": prep.retrieval_meta,
+            "chunk_ids": [],
+            "timings_ms": {**prep.timings_ms, "total": _ms_since(prep.t0)},
+        },
+    }
+
+
+def _default_llm_meta() -> dict[str, Any]:
     # Default meta (in case LLM fails and we fall back)
-    llm_meta: dict[str, Any] = {
+    return {
         "provider": settings.llm_provider,
         "model_used": None,
         "fallback_used": False,
+        "cache_hit": False,
     }
 
-    try:
-        content, llm_meta = chat_with_meta(
-            [
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": user_prompt},
-            ]
+
+def _fallback_content(snippets: list[str]) -> str:
+    # Deterministic fallback (works with LLM_PROVIDER=none or temporary API failures)
+    if not snippets:
+        return (
+            f"{MANDATORY_CITATION_LINE}\n\n"
+            "ამ ეტაპზე ინდექსში შესაბამისი ამონარიდები ვერ მოიძებნა, ამიტომ "
+            "InfoHub-ის დოკუმენტებზე დაყრდნობით ზუსტი პასუხის გაცემას ვერ ვახერხებ."
         )
-    except Exception:
-        # Deterministic fallback (works with LLM_PROVIDER=none or temporary API failures)
-        if not snippets:
-            content = (
-                f"{MANDATORY_CITATION_LINE}\n\n"
-                "ამ ეტაპზე ინდექსში შესაბამისი ამონარიდები ვერ მოიძებნა, ამიტომ "
-                "InfoHub-ის დოკუმენტებზე დაყრდნობით ზუსტი პასუხის გაცემას ვერ ვახერხებ."
-            )
-        else:
-            content = (
-                f"{MANDATORY_CITATION_LINE}\n\n"
-                "ქვემოთ მოყვანილია ნაპოვნი ამონარიდები. ჩართეთ LLM_PROVIDER, რომ პასუხი უფრო ბუნებრივი იყოს.\n\n"
-                + "\n\n".join(snippets[:3])
-            )
+    return (
+        f"{MANDATORY_CITATION_LINE}\n\n"
+        "ქვემოთ მოყვანილია ნაპოვნი ამონარიდები. ჩართეთ LLM_PROVIDER, რომ პასუხი უფრო ბუნებრივი იყოს.\n\n"
+        + "\n\n".join(snippets[:3])
+    )
+
 
+def _finalize(content: str, prep: _Prepared, llm_meta: dict[str, Any]) -> dict[str, Any]:
     # ---- Compliance enforcement (always) ----
     content = (content or "").strip()
 
@@ -161,13 +245,81 @@ Do NOT include a 'წყაროები:' section; it will be added separatel
 
     # Remove any model-written sources block and ALWAYS append canonical sources.
     content = _strip_model_sources_block(content)
-    content = f"{content}\n\n{_sources_block(sources)}".strip()
+    content = f"{content}\n\n{_sources_block(prep.sources)}".strip()
 
     return {
         "answer": content,
-        "sources": [s.__dict__ for s in sources],
+        "sources": [s.__dict__ for s in prep.sources],
         "meta": {
             **llm_meta,
-            "k": k,
+            "k": prep.k,
+            "filters": prep.filters_meta,
+            "retrieval": prep.retrieval_meta,
+            "compression": prep.compression_meta,
+            "chunk_ids": prep.chunk_ids,
+            "timings_ms": {**prep.timings_ms, "total": _ms_since(prep.t0)},
         },
     }
+
+
+def answer(question: str, k: int = 12, filters: RetrievalFilters | None = None) -> dict[str, Any]:
+    prep = _prepare(question, k, filters)
+    if prep.messages is None:
+        return _no_context_result(prep)
+
+    llm_meta = _default_llm_meta()
+    t1 = time.perf_counter()
+    try:
+        content, llm_meta = chat_with_meta(prep.messages)
+    except Exception as e:
+        llm_meta["circuit_open"] = isinstance(e, CircuitOpenError)
+        content = _fallback_content(prep.snippets)
+    prep.timings_ms["llm"] = _ms_since(t1)
+
+    return _finalize(content, prep, llm_meta)
+
+
+def _lead_with_citation(pieces: Iterator[str]) -> Iterator[str]:
+    """
+    Hold back the first characters until it's clear whether the model opened with the mandatory citation
+    line, so the streamed text starts exactly like the final (compliance-enforced) answer.
+    """
+    it = iter(pieces)
+    head = ""
+    for piece in it:
+        head += piece
+        opening = head.lstrip()
+        if len(opening) >= len(MANDATORY_CITATION_LINE) or not MANDATORY_CITATION_LINE.startswith(opening):
+            break
+    head = head.lstrip()
+    if head:
+        yield head if head.startswith(MANDATORY_CITATION_LINE) else f"{MANDATORY_CITATION_LINE}\n\n{head}"
+    yield from it
+
+
+def answer_stream(question: str, k: int = 12, filters: RetrievalFilters | None = None) -> Iterator[dict[str, Any]]:
+    """
+    answer() for progressive rendering. Yields {"type": "sources", "sources": [...]} once retrieval is done,
+    {"type": "delta", "text": ...} while the model writes, and last {"type": "done", **answer()} - whose
+    answer (canonical sources block, or the snippet fallback if the model failed) replaces the streamed text.
+    """
+    prep = _prepare(question, k, filters)
+    if prep.messages is None:
+        yield {"type": "done", **_no_context_result(prep)}
+        return
+    yield {"type": "sources", "sources": [s.__dict__ for s in prep.sources]}
+
+    llm_meta = _default_llm_meta()
+    parts: list[str] = []
+    t1 = time.perf_counter()
+    try:
+        for piece in _lead_with_citation(chat_stream(prep.messages, llm_meta)):
+            parts.append(piece)
+            yield {"type": "delta", "text": piece}
+        content = "".join(parts)
+    except Exception as e:
+        llm_meta = {**_default_llm_meta(), "circuit_open": isinstance(e, CircuitOpenError)}
+        content = _fallback_content(prep.snippets)
+    prep.timings_ms["llm"] = _ms_since(t1)
+
+    yield {"type": "done", **_finalize(content, prep, llm_meta)}
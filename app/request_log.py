@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Any
+
+from app.settings import settings
+from app.version import __version__
+
+# Request threads only put a dict on a bounded queue; the listener thread serializes it and writes to
+# size-rotated JSONL files, so a slow disk never adds latency to /ask. When the queue is full the entry is
+# dropped (and counted) instead of blocking.
+
+
+def question_hash(question: str) -> str:
+    return hashlib.sha256(" ".join(question.split()).lower().encode("utf-8")).hexdigest()[:16]
+
+
+class _JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.msg, ensure_ascii=False, default=str)
+
+
+class _DroppingQueueHandler(QueueHandler):
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # keep the dict as-is: serializing is the listener's job
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RequestLog:
+    """
+    One JSON line per answered question: hash (and text), k, filters, retrieval mode, chunk ids, stage
+    timings and the model used. The format bench.replay reads and diffs.
+    """
+
+    def __init__(self, path: str | Path, max_bytes: int, backup_count: int, questions: str = "text"):
+        # "{pid}" in the path gives every uvicorn worker its own files (rotation isn't multi-process safe)
+        self.path = Path(str(path).replace("{pid}", str(os.getpid())))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.with_text = questions != "hash"
+        self._file = RotatingFileHandler(self.path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        self._file.setFormatter(_JsonFormatter())
+        self._handler = _DroppingQueueHandler(queue.Queue(maxsize=10000))
+        self._listener = QueueListener(self._handler.queue, self._file)
+        self._logger = logging.getLogger("app.request_log")
+        self._logger.setLevel(logging.INFO)
+        self._logger.propagate = False
+        self._records = 0
+
+    def start(self) -> None:
+        self._logger.addHandler(self._handler)
+        self._listener.start()
+
+    def stop(self) -> None:
+        self._logger.removeHandler(self._handler)
+        self._listener.stop()  # writes what is still queued
+        self._file.close()
+
+    def record(
+        self,
+        endpoint: str,
+        question: str,
+        k: int,
+        filters: dict | None,
+        result: dict | None,
+        total_ms: float,
+        error: str | None = None,
+    ) -> None:
+        meta = (result or {}).get("meta") or {}
+        retrieval = meta.get("retrieval") or {}
+        entry: dict[str, Any] = {
+            "ts": round(time.time(), 3),
+            "endpoint": endpoint,
+            "q_hash": question_hash(question),
+            "question": question if self.with_text else None,
+            "k": k,
+            "filters": filters,
+            "status": "error" if error else "ok",
+            "error": error,
+            "total_ms": round(total_ms, 1),
+            "timings_ms": meta.get("timings_ms"),
+            "retrieval_mode": retrieval.get("mode"),
+            "route": retrieval.get("route"),
+            "index_version": retrieval.get("index_version"),
+            "chunk_ids": meta.get("chunk_ids") or [],
+            "provider": meta.get("provider"),
+            "model_used": meta.get("model_used"),
+            "fallback_used": meta.get("fallback_used"),
+            "cache_hit": meta.get("cache_hit"),
+            "version": __version__,
+        }
+        self._logger.info(entry)
+        self._records += 1
+
+    def info(self) -> dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "questions": "text" if self.with_text else "hash",
+            "logged": self._records - self._handler.dropped,
+            "queued": self._handler.queue.qsize(),
+            "dropped": self._handler.dropped,
+        }
+
+
+def start_request_log() -> RequestLog | None:
+    if not settings.request_log_enabled:
+        return None
+    log = RequestLog(
+        settings.request_log_path,
+        max_bytes=int(settings.request_log_max_mb * 1024 * 1024),
+        backup_count=settings.request_log_backup_count,
+        questions=settings.request_log_questions,
+    )
+    log.start()
+    return log
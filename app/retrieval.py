@@ -1,19 +1,45 @@
 from __future__ import annotations
 
 import re
+import threading
+import time
 from collections import defaultdict
-from dataclasses import dataclass
-from typing import Any
-
-import chromadb
-from sentence_transformers import SentenceTransformer
-
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+
+from app.embeddings import EmbeddingModelMismatch, make_passage, make_query
+from app.index_manager import IndexHandle, Shard, index_manager
+from app.lexical import extract_keywords, lexical_score, make_stems
+from app.lexsig import query_signature, score_signatures
 from app.settings import settings
+from app.shards import route_shards
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
 DOCNO_Q_RE = re.compile(r"(?:№|N)\s*([0-9]{1,7})", flags=re.IGNORECASE)
 
 _model: SentenceTransformer | None = None
-_collection = None
+_model_lock = threading.Lock()
+
+# Shared pool for per-shard fan-out (one query per shard runs concurrently)
+_SHARD_POOL = ThreadPoolExecutor(max_workers=max(1, settings.retrieval_max_workers), thread_name_prefix="shard")
+# Separate pool for the retrievers themselves; they block on shard futures, so they must not share _SHARD_POOL.
+# One slot per retriever for each request allowed to retrieve concurrently.
+_RETRIEVER_POOL = ThreadPoolExecutor(
+    max_workers=max(1, settings.retrieval_concurrent_requests) * 3, thread_name_prefix="retriever"
+)
+
+# Reciprocal-rank fusion weights. An exact doc-number hit should outrank anything the other retrievers found.
+_RRF_WEIGHTS = {"docno": 3.0, "semantic": 1.0, "lexical": 1.0}
+_MODE_BY_RETRIEVER = {"docno": "docno_exact", "semantic": "semantic", "lexical": "lexical"}
+
+
+def canonical_doc_url(unique_key: str) -> str:
+    return f"https://infohub.rs.ge/ka/workspace/document/{unique_key}?openFromSearch=true"
 
 
 @dataclass
@@ -26,104 +52,147 @@ class RetrievedChunk:
     chunk_index: int | None = None
     unique_key: str | None = None
     lexical_score: int = 0
-    mode: str = "semantic"  # "docno_exact" | "semantic"
+    mode: str = "semantic"  # "docno_exact" | "semantic" | "lexical"
+    shard: str | None = None
+    chunk_id: str | None = None
+    fused_score: float = 0.0
+    # uniqueKeys of other documents whose near-identical chunk was collapsed into this one at ingest
+    duplicate_keys: list[str] = field(default_factory=list)
 
 
-# --- basic tokenization/keyword logic (no extra deps) ---
-_STOPWORDS = {
-    # Georgian (tiny list, enough to reduce noise)
-    "და", "თუ", "ან", "რომ", "რა", "როდის", "სად", "როგორ", "რამდენი", "ვის", "ვინ",
-    "არის", "იყო", "იქნება", "ეს", "ის", "მათ", "ჩვენ", "თქვენ", "მის", "მისი", "მათი",
-    "შესახებ", "მიხედვით", "დოკუმენტი", "დოკუმენტით", "მუხლი", "მუხლით", "კანონი", "კოდექსი",
-}
+@dataclass
+class RetrievalFilters:
+    """
+    Metadata filters pushed down into the Chroma query as a `where` clause.
+    Dates are inclusive and compared against the numeric `publishDate_ts` field.
+    """
+    species: list[str] = field(default_factory=list)
+    date_from: date | None = None
+    date_to: date | None = None
 
-_WORD_RE = re.compile(r"[0-9]+|[ა-ჰ]+|[A-Za-z]+", flags=re.UNICODE)
+    def is_empty(self) -> bool:
+        return not self.species and self.date_from is None and self.date_to is None
 
+    def to_where(self) -> dict[str, Any] | None:
+        clauses: list[dict[str, Any]] = []
 
-def _extract_keywords(q: str) -> list[str]:
-    q = (q or "").lower()
-    tokens = _WORD_RE.findall(q)
-    out: list[str] = []
-    for t in tokens:
-        t = t.strip()
-        if not t:
-            continue
-        if t in _STOPWORDS:
-            continue
-        # keep numbers and meaningful words
-        if t.isdigit():
-            out.append(t)
-            continue
-        if len(t) < 3:
-            continue
-        out.append(t)
-    return out[:25]
+        species = [s for s in self.species if s]
+        if len(species) == 1:
+            clauses.append({"species": species[0]})
+        elif species:
+            clauses.append({"species": {"$in": species}})
 
+        if self.date_from is not None:
+            clauses.append({"publishDate_ts": {"$gte": _day_start_ts(self.date_from)}})
+        if self.date_to is not None:
+            clauses.append({"publishDate_ts": {"$lte": _day_start_ts(self.date_to) + 86399}})
 
-def _make_stems(tokens: list[str]) -> list[str]:
-    """
-    Georgian is inflected; a cheap trick is using prefix stems for Georgian tokens.
-    """
-    stems: list[str] = []
-    for t in tokens:
-        if t.isdigit():
-            stems.append(t)
-        elif re.fullmatch(r"[ა-ჰ]+", t):
-            stems.append(t[:5])  # prefix stem
-        else:
-            stems.append(t.lower())
-    # unique while preserving order
-    seen = set()
-    uniq = []
-    for s in stems:
-        if s in seen:
-            continue
-        seen.add(s)
-        uniq.append(s)
-    return uniq
+        return _and_where(clauses)
 
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "species": list(self.species),
+            "date_from": self.date_from.isoformat() if self.date_from else None,
+            "date_to": self.date_to.isoformat() if self.date_to else None,
+        }
 
-def _lexical_score(text: str, stems: list[str]) -> int:
-    """
-    Score by how many stems appear in the chunk text.
-    """
-    t = (text or "").lower()
-    score = 0
-    for s in stems:
-        if not s:
-            continue
-        if s.isdigit():
-            # number match
-            if s in t:
-                score += 2
-        else:
-            if s in t:
-                score += 1
-    return score
+
+def _day_start_ts(d: date) -> int:
+    return int(datetime(d.year, d.month, d.day, tzinfo=timezone.utc).timestamp())
+
+
+def _and_where(clauses: list[dict[str, Any]]) -> dict[str, Any] | None:
+    # Chroma only accepts a single top-level operator, so several conditions need an explicit $and
+    clauses = [c for c in clauses if c]
+    if not clauses:
+        return None
+    if len(clauses) == 1:
+        return clauses[0]
+    return {"$and": clauses}
 
 
 def _get_model() -> SentenceTransformer:
     global _model
     if _model is None:
-        _model = SentenceTransformer(settings.embedding_model)
+        with _model_lock:
+            if _model is None:
+                # imported here: sentence_transformers pulls in torch, seconds of import time
+                from sentence_transformers import SentenceTransformer
+
+                _model = SentenceTransformer(settings.embedding_model)
     return _model
 
 
-def _get_collection():
-    global _collection
-    if _collection is None:
-        client = chromadb.PersistentClient(path=settings.chroma_dir)
-        _collection = client.get_or_create_collection(
-            name=settings.chroma_collection,
-            metadata={"hnsw:space": "cosine"},
-        )
-    return _collection
+def warm_up() -> None:
+    """
+    Load the embedding model and the active index ahead of the first query (see WARMUP_ON_STARTUP).
+    """
+    from app.index_manager import warm_up as warm_index
+
+    _get_model().encode([make_query("warmup", settings.embedding_model)], normalize_embeddings=True)
+    with index_manager.lease() as handle:
+        warm_index(handle)
+
+
+def _route(question: str, filters: RetrievalFilters | None, handle: IndexHandle) -> tuple[list[Shard], str]:
+    shards = handle.shards
+    if len(shards) == 1 and shards[0].species is None:
+        return shards, "single"
+
+    by_species = {s.species: s for s in shards}
+    picked, reason = route_shards(
+        question,
+        list(by_species),
+        requested=filters.species if filters else None,
+        hints=settings.shard_hints,
+    )
+    return [by_species[sp] for sp in picked], reason
+
+
+def _fan_out(shards: list[Shard], fn) -> tuple[list[RetrievedChunk], dict[str, float]]:
+    """
+    Run fn(shard) -> list[RetrievedChunk] on every shard concurrently.
+    Returns the concatenated chunks and per-shard latency in ms.
+    """
+
+    def run(shard: Shard) -> tuple[str, list[RetrievedChunk], float]:
+        t0 = time.perf_counter()
+        chunks = fn(shard)
+        for c in chunks:
+            c.shard = shard.name
+        return shard.name, chunks, (time.perf_counter() - t0) * 1000.0
+
+    if len(shards) == 1:
+        results = [run(shards[0])]
+    else:
+        results = [f.result() for f in [_SHARD_POOL.submit(run, s) for s in shards]]
+
+    merged: list[RetrievedChunk] = []
+    latency: dict[str, float] = {}
+    for name, chunks, ms in results:
+        merged.extend(chunks)
+        latency[name] = round(ms, 2)
+    return merged, latency
+
+
+@lru_cache(maxsize=256)
+def _query_embedding(question: str) -> tuple[float, ...]:
+    q = make_query(question, settings.embedding_model)
+    return tuple(_get_model().encode([q], normalize_embeddings=True)[0].tolist())
+
+
+def embed_query(question: str) -> list[float]:
+    """
+    Normalized query embedding; cached, so later stages (e.g. context compression) reuse the retrieval one.
+    """
+    return list(_query_embedding(question))
 
 
-def _make_query(q: str) -> str:
-    if "e5" in settings.embedding_model.lower():
-        return "query: " + q
-    return q
+def embed_passages(texts: list[str]):
+    """
+    Normalized passage embeddings (numpy array, one row per text).
+    """
+    return _get_model().encode([make_passage(t, settings.embedding_model) for t in texts], normalize_embeddings=True)
 
 
 def _extract_docno_digits(question: str) -> str | None:
@@ -153,111 +222,364 @@ def _select_diverse(chunks: list[RetrievedChunk], k: int, per_doc: int = 2) -> l
     return selected
 
 
-def _relevance_gate(best_score: int, stems: list[str]) -> bool:
+def _relevance_gate(best_score: int, stems: list[str], strict: bool = False) -> bool:
     """
     Decide whether retrieval is on-topic enough.
     - Short questions: require >=1 match
     - Longer questions: require >=2 matches
+    - strict (only keyword hits to judge by): one match more, capped at what the question can score
     """
     need = 1 if len(stems) <= 3 else 2
+    if strict:
+        need = min(need + 1, sum(2 if s.isdigit() else 1 for s in stems))
     return best_score >= need
 
 
-def _exact_docno_retrieve(question: str, k: int) -> list[RetrievedChunk]:
-    digits = _extract_docno_digits(question)
-    if not digits:
-        return []
-
-    col = _get_collection()
-
-    got: dict[str, Any] = col.get(
-        where={"doc_number_digits": digits},
-        include=["documents", "metadatas"],
+def _to_chunk(chunk_id: str, meta: dict[str, Any], mode: str, distance: float | None = None) -> RetrievedChunk:
+    # Text is fetched later, and only for the chunks that make the final cut (see _hydrate)
+    return RetrievedChunk(
+        text="",
+        title=meta.get("title") or "Untitled",
+        url=meta.get("url") or "",
+        distance=distance,
+        chunk_index=meta.get("chunk_index"),
+        unique_key=meta.get("uniqueKey"),
+        lexical_score=0,
+        mode=mode,
+        chunk_id=chunk_id,
+        duplicate_keys=(meta.get("dup_keys") or "").split(),
     )
 
-    docs = got.get("documents") or []
-    metas = got.get("metadatas") or []
-    if not docs or not metas:
-        return []
 
-    keywords = _extract_keywords(question)
-    stems = _make_stems(keywords)
+def _chunks_from_metadata(
+    shard: Shard,
+    ids: list[str],
+    metas: list[dict[str, Any] | None],
+    stems: list[str],
+    mode: str,
+    dists: list[float] | None = None,
+) -> list[RetrievedChunk]:
+    dists = dists if dists is not None else [None] * len(ids)
+    chunks = [
+        _to_chunk(cid, meta, mode=mode, distance=dist)
+        for cid, meta, dist in zip(ids, metas, dists)
+        if meta
+    ]
+
+    # Score from the precomputed hashed stem signatures (one vectorized pass for all candidates)
+    store = shard.lexsig
+    sigs = store.get_many(shard.name, [c.chunk_id for c in chunks]) if store else {}
+    scored = [c for c in chunks if c.chunk_id in sigs]
+    q_hashes, q_weights = query_signature(stems)
+    for c, score in zip(scored, score_signatures([sigs[c.chunk_id] for c in scored], q_hashes, q_weights)):
+        c.lexical_score = score
+
+    # Chunks without a signature (no sidecar, or not built yet): score them from their text instead.
+    missing = [c for c in chunks if c.chunk_id not in sigs]
+    if missing:
+        got = shard.collection.get(ids=[c.chunk_id for c in missing], include=["documents"])
+        text_by_id = dict(zip(got.get("ids") or [], got.get("documents") or []))
+        empty: set[str] = set()
+        for c in missing:
+            c.text = text_by_id.get(c.chunk_id) or ""
+            c.lexical_score = lexical_score(c.text, stems)
+            if not c.text:
+                empty.add(c.chunk_id)
+        chunks = [c for c in chunks if c.chunk_id not in empty]
+
+    return chunks
+
+
+def _hydrate(chunks: list[RetrievedChunk], shards: list[Shard]) -> list[RetrievedChunk]:
+    """
+    Fetch chunk text by id (one get() per shard) and drop chunks that turn out to be empty.
+    """
+    by_name = {s.name: s for s in shards}
+    need: dict[str, list[str]] = defaultdict(list)
+    for c in chunks:
+        if not c.text and c.chunk_id:
+            need[c.shard or ""].append(c.chunk_id)
 
-    chunks: list[RetrievedChunk] = []
-    for doc, meta in zip(docs, metas):
-        if not doc or not meta:
+    text_by_id: dict[str, str] = {}
+    for name, ids in need.items():
+        shard = by_name.get(name)
+        if shard is None:
             continue
-        score = _lexical_score(doc, stems)
-        chunks.append(
-            RetrievedChunk(
-                text=doc,
-                title=meta.get("title") or "Untitled",
-                url=meta.get("url") or "",
-                distance=None,
-                chunk_index=meta.get("chunk_index"),
-                unique_key=meta.get("uniqueKey"),
-                lexical_score=score,
-                mode="docno_exact",
-            )
-        )
+        got = shard.collection.get(ids=ids, include=["documents"])
+        text_by_id.update(zip(got.get("ids") or [], got.get("documents") or []))
+
+    for c in chunks:
+        if not c.text and c.chunk_id:
+            c.text = text_by_id.get(c.chunk_id) or ""
+    return [c for c in chunks if c.text]
+
+
+def _docno_candidates(
+    question: str,
+    stems: list[str],
+    filters: RetrievalFilters | None,
+    shards: list[Shard],
+) -> tuple[list[RetrievedChunk], dict[str, float]]:
+    digits = _extract_docno_digits(question)
+    if not digits:
+        return [], {}
+
+    base_where = filters.to_where() if filters else None
+    where = _and_where([{"doc_number_digits": digits}, base_where or {}])
+
+    def from_shard(shard: Shard) -> list[RetrievedChunk]:
+        got: dict[str, Any] = shard.collection.get(where=where, include=["metadatas"])
+        return _chunks_from_metadata(shard, got.get("ids") or [], got.get("metadatas") or [], stems, "docno_exact")
+
+    chunks, latency = _fan_out(shards, from_shard)
 
     # rank within the doc-number matched document(s)
     chunks.sort(key=lambda c: (-c.lexical_score, c.chunk_index is None, c.chunk_index or 0))
-    return _select_diverse(chunks, k=k, per_doc=3)
+    return chunks, latency
 
 
-def retrieve(question: str, k: int = 6) -> list[RetrievedChunk]:
-    # 1) Exact doc-number retrieval first
-    exact = _exact_docno_retrieve(question, k=k)
-    if exact:
-        return exact
+def _lexical_candidates(
+    stems: list[str],
+    n_candidates: int,
+    filters: RetrievalFilters | None,
+    shards: list[Shard],
+) -> tuple[list[RetrievedChunk], dict[str, float]]:
+    """
+    Keyword retrieval through Chroma's full-text `$contains` on chunk documents.
+    """
+    terms = [s for s in stems if len(s) >= 3 or s.isdigit()]
+    if not terms:
+        return [], {}
+
+    contains = [{"$contains": t} for t in terms]
+    where_document = contains[0] if len(contains) == 1 else {"$or": contains}
+    where = filters.to_where() if filters else None
+
+    def from_shard(shard: Shard) -> list[RetrievedChunk]:
+        got: dict[str, Any] = shard.collection.get(
+            where=where,
+            where_document=where_document,
+            limit=n_candidates,
+            include=["metadatas"],
+        )
+        return _chunks_from_metadata(shard, got.get("ids") or [], got.get("metadatas") or [], stems, "lexical")
+
+    chunks, latency = _fan_out(shards, from_shard)
+    chunks.sort(key=lambda c: -c.lexical_score)
+    return chunks[:n_candidates], latency
+
+
+def _semantic_candidates(
+    question: str,
+    stems: list[str],
+    n_candidates: int,
+    filters: RetrievalFilters | None,
+    shards: list[Shard],
+) -> tuple[list[RetrievedChunk], dict[str, float]]:
+    q_emb = embed_query(question)
+
+    # Filters are applied inside the vector search, so the candidate pool only holds matching chunks
+    where = filters.to_where() if filters else None
+
+    def from_shard(shard: Shard) -> list[RetrievedChunk]:
+        query_emb, n = q_emb, n_candidates
+        rescore = shard.projection is not None and shard.vectors is not None and settings.retrieval_rescore
+        if shard.projection is not None:
+            # compressed index: same PCA as the stored vectors; over-fetch when the rescoring pass will re-rank
+            query_emb = shard.projection.apply([q_emb])[0].tolist()
+            if rescore:
+                n = n_candidates * max(1, settings.retrieval_rescore_factor)
+
+        # No documents here: ranking only needs ids, distances, metadata and the lexsig sidecar
+        res: dict[str, Any] = shard.collection.query(
+            query_embeddings=[query_emb],
+            n_results=n,
+            where=where,
+            include=["metadatas", "distances"],
+        )
 
-    # 2) Semantic retrieval + lexical rerank
-    col = _get_collection()
-    model = _get_model()
+        ids = (res.get("ids") or [[]])[0]
+        metas = (res.get("metadatas") or [[]])[0]
+        dists = (res.get("distances") or [[]])[0]
+        if rescore and ids:
+            ids, metas, dists = _rescore(shard, q_emb, ids, metas, dists, n_candidates)
+        return _chunks_from_metadata(shard, ids, metas, stems, "semantic", dists=dists)
 
-    keywords = _extract_keywords(question)
-    stems = _make_stems(keywords)
+    # Shards share one embedding space, so distances are comparable after merging
+    chunks, latency = _fan_out(shards, from_shard)
 
-    # retrieve more candidates than k
-    n_candidates = max(40, k * 8)
+    # Rerank: lexical first, then semantic distance
+    chunks.sort(key=lambda c: (-c.lexical_score, c.distance is None, c.distance or 0.0))
+    return chunks, latency
+
+
+def _rescore(
+    shard: Shard,
+    q_emb: list[float],
+    ids: list[str],
+    metas: list[Any],
+    dists: list[float],
+    keep: int,
+) -> tuple[list[str], list[Any], list[float]]:
+    """
+    Replace reduced-space distances with cosine distances on the full-dimension sidecar vectors and keep
+    the best `keep`. Candidates without a stored vector keep their reduced-space distance.
+    """
+    import numpy as np
 
-    q_emb = model.encode([_make_query(question)], normalize_embeddings=True)[0].tolist()
+    full = shard.vectors.get_many(shard.name, ids)
+    q = np.asarray(q_emb, dtype=np.float32)
+    for i, cid in enumerate(ids):
+        v = full.get(cid)
+        if v is not None:
+            dists[i] = 1.0 - float(v @ q) / max(float(np.linalg.norm(v)), 1e-12)
+    order = sorted(range(len(ids)), key=lambda i: dists[i])[:keep]
+    return [ids[i] for i in order], [metas[i] for i in order], [dists[i] for i in order]
 
-    res: dict[str, Any] = col.query(
-        query_embeddings=[q_emb],
-        n_results=n_candidates,
-        include=["documents", "metadatas", "distances"],
-    )
 
-    docs = (res.get("documents") or [[]])[0]
-    metas = (res.get("metadatas") or [[]])[0]
-    dists = (res.get("distances") or [[]])[0]
+def _rrf_merge(ranked: dict[str, list[RetrievedChunk]], rrf_k: int) -> list[RetrievedChunk]:
+    """
+    Reciprocal-rank fusion: score(chunk) = sum over retrievers of weight / (rrf_k + rank).
+    The merged chunk keeps the semantic distance (if any) and the mode of its strongest retriever.
+    """
+    merged: dict[str, RetrievedChunk] = {}
+    best_term: dict[str, float] = {}
+
+    for name, chunks in ranked.items():
+        weight = _RRF_WEIGHTS.get(name, 1.0)
+        for rank, c in enumerate(chunks, start=1):
+            key = c.chunk_id or f"{c.shard}:{c.unique_key}:{c.chunk_index}"
+            term = weight / (rrf_k + rank)
+
+            cur = merged.get(key)
+            if cur is None:
+                cur = merged[key] = c
+                cur.fused_score = 0.0
+            elif cur.distance is None and c.distance is not None:
+                cur.distance = c.distance
+
+            cur.fused_score += term
+            if term > best_term.get(key, 0.0):
+                best_term[key] = term
+                cur.mode = _MODE_BY_RETRIEVER.get(name, cur.mode)
+
+    out = list(merged.values())
+    out.sort(key=lambda c: (-c.fused_score, -c.lexical_score, c.distance is None, c.distance or 0.0))
+    return out
+
+
+def retrieve_with_meta(
+    question: str,
+    k: int = 6,
+    filters: RetrievalFilters | None = None,
+) -> tuple[list[RetrievedChunk], dict[str, Any]]:
+    """
+    Returns (chunks, meta).
 
-    candidates: list[RetrievedChunk] = []
-    for doc, meta, dist in zip(docs, metas, dists):
-        if not doc or not meta:
-            continue
-        score = _lexical_score(doc, stems)
-        candidates.append(
-            RetrievedChunk(
-                text=doc,
-                title=meta.get("title") or "Untitled",
-                url=meta.get("url") or "",
-                distance=dist,
-                chunk_index=meta.get("chunk_index"),
-                unique_key=meta.get("uniqueKey"),
-                lexical_score=score,
-                mode="semantic",
+    The docno, lexical and semantic retrievers run concurrently and are merged with reciprocal-rank fusion.
+    Retrievers still running at the deadline (settings.retrieval_deadline_ms) are dropped, so the answer
+    degrades to whatever finished in time. meta records routing, per-retriever status and contributors.
+    """
+    # One handle for the whole request: an index hot-swap mid-query can't mix old and new shards
+    with index_manager.lease() as handle:
+        return _retrieve(handle, question, k, filters)
+
+
+def _retrieve(
+    handle: IndexHandle,
+    question: str,
+    k: int,
+    filters: RetrievalFilters | None,
+) -> tuple[list[RetrievedChunk], dict[str, Any]]:
+    shards, route_reason = _route(question, filters, handle)
+    meta: dict[str, Any] = {
+        "mode": None,
+        "index_version": handle.version,
+        "shards": [s.name for s in shards],
+        "route": route_reason,
+        "retrievers": {},
+        "contributed": [],
+        "shard_latency_ms": {},
+    }
+    if not shards:
+        return [], meta
+
+    # query vectors from one model against an index built with another would look fine and be noise
+    for shard in shards:
+        if shard.embedding_model and shard.embedding_model != settings.embedding_model:
+            raise EmbeddingModelMismatch(
+                f"Index {shard.name} was built with {shard.embedding_model}, but EMBEDDING_MODEL is "
+                f"{settings.embedding_model}"
             )
-        )
-
-    # Rerank: lexical first, then semantic distance
-    candidates.sort(key=lambda c: (-c.lexical_score, c.distance is None, c.distance or 0.0))
 
-    best_score = candidates[0].lexical_score if candidates else 0
-    if not _relevance_gate(best_score, stems):
+    keywords = extract_keywords(question)
+    stems = make_stems(keywords)
+
+    # retrieve more candidates than k (cheap: candidates carry metadata only)
+    n_candidates = max(settings.retrieval_candidates, k * 8)
+
+    jobs = {
+        "docno": lambda: _docno_candidates(question, stems, filters, shards),
+        "lexical": lambda: _lexical_candidates(stems, n_candidates, filters, shards),
+        "semantic": lambda: _semantic_candidates(question, stems, n_candidates, filters, shards),
+    }
+
+    def timed(fn):
+        t0 = time.perf_counter()
+        chunks, latency = fn()
+        return chunks, latency, (time.perf_counter() - t0) * 1000.0
+
+    # the first query after startup (no warm-up) loads the model here, outside the deadline: a load of several
+    # seconds would otherwise time out the semantic retriever and leave the gate to the lexical hits
+    _get_model()
+
+    futures = {_RETRIEVER_POOL.submit(timed, fn): name for name, fn in jobs.items()}
+    deadline = settings.retrieval_deadline_ms / 1000.0 if settings.retrieval_deadline_ms > 0 else None
+    done, _ = wait(futures, timeout=deadline)
+
+    ranked: dict[str, list[RetrievedChunk]] = {}
+    for fut, name in futures.items():
+        if fut not in done:
+            # A queued job is dropped so it can't delay later requests; a running Chroma/model call can't be
+            # interrupted, its result is simply ignored.
+            fut.cancel()
+            meta["retrievers"][name] = {"status": "timeout"}
+            continue
+        try:
+            chunks, latency, ms = fut.result()
+        except Exception as e:
+            meta["retrievers"][name] = {"status": "error", "error": f"{type(e).__name__}: {e}"[:200]}
+            continue
+        meta["retrievers"][name] = {"status": "ok", "hits": len(chunks), "ms": round(ms, 2)}
+        if latency:
+            meta["shard_latency_ms"][name] = latency
+        if chunks:
+            ranked[name] = chunks
+
+    meta["contributed"] = [name for name in jobs if name in ranked]
+    if not ranked:
+        return [], meta
+
+    candidates = _rrf_merge(ranked, rrf_k=settings.rrf_k)
+    meta["mode"] = "+".join(meta["contributed"])
+
+    if "docno" in ranked:
+        # The question names a document number that exists; no need for the topical gate.
+        return _hydrate(_select_diverse(candidates, k=k, per_doc=3), shards), meta
+
+    # The gate looks at the semantic candidates: the corpus-wide $contains scan nearly always finds some chunk
+    # sharing the stems, so lexical hits alone only decide (with a stricter bar) when the semantic retriever
+    # didn't finish.
+    gate_on = "semantic" if "semantic" in ranked else "lexical"
+    meta["gate"] = gate_on
+    best_score = max((c.lexical_score for c in ranked.get(gate_on, [])), default=0)
+    if not _relevance_gate(best_score, stems, strict=gate_on == "lexical"):
         # No on-topic evidence in retrieved text
-        return []
+        return [], meta
+
+    return _hydrate(_select_diverse(candidates, k=k, per_doc=2), shards), meta
+
 
-    return _select_diverse(candidates, k=k, per_doc=2)
+def retrieve(question: str, k: int = 6, filters: RetrievalFilters | None = None) -> list[RetrievedChunk]:
+    # Backwards-compatible wrapper
+    return retrieve_with_meta(question, k=k, filters=filters)[0]
@@ -19,17 +19,112 @@ class Settings(BaseSettings):
     llm_model: str = "llama-3.3-70b-versatile"
     llm_fallback_model: str = "llama-3.1-8b-instant"
 
+    # Exact-match answer cache (SQLite shared by all workers); keyed by provider + model + messages.
+    # Answers produced by the fallback model expire sooner so the primary gets another chance.
+    llm_cache_enabled: bool = True
+    llm_cache_path: str = "./data/llm_cache.sqlite3"
+    llm_cache_ttl_sec: int = 86400
+    llm_cache_fallback_ttl_sec: int = 3600
+    llm_cache_max_entries: int = 10000
+
     # Ollama settings (local)
     ollama_base_url: str = "http://localhost:11434"
     ollama_model: str = "llama3.1:8b-instruct"
 
+    # Endpoint pools: comma-separated base URLs serving the same models (empty = just the single base URL).
+    # Calls go to the endpoint with the lowest (in_flight + 1) * EWMA latency that is below its concurrency
+    # limit; an endpoint failing LLM_ENDPOINT_EJECT_AFTER times in a row is skipped for LLM_ENDPOINT_EJECT_SEC
+    # (429s don't count). Limits and ejection only apply with several URLs; a single endpoint is unlimited.
+    llm_base_urls: str = ""
+    ollama_base_urls: str = ""
+    llm_endpoint_max_concurrency: int = 4
+    llm_endpoint_eject_after: int = 3
+    llm_endpoint_eject_sec: float = 30.0
+    # how long a call may wait for a free endpoint slot before counting as a transient failure
+    llm_pool_wait_sec: float = 30.0
+
+    # Per-model circuit breaker: opens when, over LLM_CIRCUIT_WINDOW_SEC and at least LLM_CIRCUIT_MIN_CALLS calls,
+    # the share of transient errors / calls slower than LLM_CIRCUIT_SLOW_CALL_MS reaches LLM_CIRCUIT_FAILURE_RATE.
+    # While open, calls fail instantly (answer() serves the snippet fallback); one probe after LLM_CIRCUIT_OPEN_SEC.
+    llm_circuit_enabled: bool = True
+    llm_circuit_failure_rate: float = 0.5
+    llm_circuit_min_calls: int = 5
+    llm_circuit_window_sec: float = 60.0
+    llm_circuit_open_sec: float = 30.0
+    llm_circuit_slow_call_ms: float = 30000.0
+
     # Retrieval settings
     embedding_model: str = "intfloat/multilingual-e5-large"
     chroma_dir: str = "./data/index"
     chroma_collection: str = "infohub_docs"
+    # Give every embedding model its own collections ("<chroma_collection>.<model slug>") so indexes for several
+    # models coexist; switching EMBEDDING_MODEL then picks the matching one. Collections are tagged with the
+    # model that built them and retrieval refuses a mismatch either way.
+    embedding_index_per_model: bool = False
+    # HNSW graph parameters, 0 = Chroma default (M 16, construction_ef 100, search_ef 100). M and construction_ef
+    # only apply when a collection is created (indexer); search_ef is also applied to existing ones when opened.
+    hnsw_m: int = 0
+    hnsw_construction_ef: int = 0
+    hnsw_search_ef: int = 0
+
+    # Per-species shards: comma-separated species, each stored in "<chroma_collection>__<species slug>"
+    # (lowercased, runs of other characters than a-z0-9 -> "_"; see app.shards.shard_collection_name).
+    # Empty = single collection (legacy layout).
+    chroma_shards: str = ""
+    # Routing hints, JSON in env: {"LegislativeNews": ["კანონ", "ცვლილებ"], ...}
+    shard_hints: dict[str, list[str]] = {}
+    retrieval_max_workers: int = 8
+    # Candidate pool per retriever (max(retrieval_candidates, k * 8)); candidates carry metadata only
+    retrieval_candidates: int = 80
+    # docno/lexical/semantic retrievers run concurrently; results not ready by the deadline are dropped (0 = wait)
+    retrieval_deadline_ms: int = 3000
+    # /ask requests per worker that can run their retrievers at the same time (the retriever pool holds 3 each);
+    # jobs that miss their deadline while still queued are cancelled
+    retrieval_concurrent_requests: int = 8
+    rrf_k: int = 60
+    # Compressed indexes (ingest.compress_index with a vectors sidecar): fetch retrieval_candidates * factor from
+    # the reduced vectors and re-rank them on the full-dimension ones
+    retrieval_rescore: bool = True
+    retrieval_rescore_factor: int = 2
+
+    # Query-focused compression of retrieved chunks before the LLM call: off | lexical | hybrid
+    # (hybrid also scores sentences by embedding similarity to the question; costs one batch encode).
+    context_compression: str = "off"
+    context_compression_budget_chars: int = 4000
+
+    # Load the embedding model + open/warm the index in a background thread at API startup.
+    # Imports are deferred either way, so /health answers immediately; off = load on the first /ask.
+    warmup_on_startup: bool = True
 
     # Index bootstrap (download zip from GitHub Releases)
     index_url: str | None = None
+    # Versioned snapshots: manifest.json listing the full archive and delta packs (see ingest.export_snapshot)
+    index_manifest_url: str | None = None
+
+    # Hot-swap: a file containing the path of the index directory to serve (polled), and the admin token
+    # required by POST /admin/index/reload (admin endpoints are disabled when unset)
+    index_pointer_file: str | None = None
+    index_watch_interval_sec: float = 5.0
+    # Replicas serving a shared index directory: never create collections or persist HNSW_SEARCH_EF into it
+    index_read_only: bool = False
+    admin_token: str | None = None
+
+    # Profiling (off by default). Per request: /ask with "X-Profile: speedscope|collapsed" + X-Admin-Token.
+    # Continuous: PROFILE_CONTINUOUS_HZ > 0 samples all threads and writes aggregated stacks every PROFILE_FLUSH_SEC.
+    profile_dir: str = "./data/profiles"
+    profile_interval_ms: float = 1.0
+    profile_continuous_hz: float = 0.0
+    profile_flush_sec: float = 300.0
+    profile_format: str = "collapsed"
+
+    # Request log (off by default): one JSON line per /ask and /ask/stream for bench.replay, written from a
+    # background thread into size-rotated files. REQUEST_LOG_QUESTIONS=hash keeps only a question hash
+    # (such entries can't be replayed). "{pid}" in the path is replaced by the worker's process id.
+    request_log_enabled: bool = False
+    request_log_path: str = "./data/request_log/requests.jsonl"
+    request_log_max_mb: float = 50.0
+    request_log_backup_count: int = 10
+    request_log_questions: str = "text"  # text | hash
 
     # Optional cookie for authenticated InfoHub requests (later)
     infohub_cookie: str | None = None
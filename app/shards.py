@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import re
+
+_NAME_CHARS_RE = re.compile(r"[^a-z0-9]+")
+
+
+def parse_shard_list(raw: str | None) -> list[str]:
+    """
+    "LegislativeNews, Rulings" -> ["LegislativeNews", "Rulings"] (order kept, duplicates dropped).
+    """
+    out: list[str] = []
+    for part in (raw or "").split(","):
+        part = part.strip()
+        if part and part not in out:
+            out.append(part)
+    return out
+
+
+def shard_collection_name(base: str, species: str) -> str:
+    """
+    Per-species Chroma collection name, e.g. ("infohub_docs", "LegislativeNews") -> "infohub_docs__legislativenews".
+    Chroma only allows [a-zA-Z0-9._-] in collection names, so the species is slugified.
+    """
+    slug = _NAME_CHARS_RE.sub("_", (species or "").lower()).strip("_")
+    if not slug:
+        raise ValueError(f"Cannot build a shard name from species={species!r}")
+    return f"{base}__{slug}"
+
+
+def route_shards(
+    question: str,
+    shards: list[str],
+    requested: list[str] | None = None,
+    hints: dict[str, list[str]] | None = None,
+) -> tuple[list[str], str]:
+    """
+    Pick which species shards a query should hit. Returns (species list, reason).
+      1) explicit species from the request
+      2) species whose hint keywords (or the species name itself) appear in the question
+      3) otherwise every shard
+    Hint keywords are matched as prefixes of question words, so Georgian inflections still route.
+    """
+    if requested:
+        picked = [s for s in shards if s in requested]
+        return picked, "request"
+
+    words = re.findall(r"[0-9]+|[ა-ჰ]+|[A-Za-z]+", (question or "").lower())
+    hints = hints or {}
+
+    picked = []
+    for species in shards:
+        keywords = [species.lower(), *[h.lower() for h in hints.get(species, [])]]
+        if any(w.startswith(kw) for kw in keywords if kw for w in words):
+            picked.append(species)
+
+    if picked:
+        return picked, "hint"
+    return list(shards), "all"
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import zipfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+# Index versioning for distribution.
+#
+# Manifest (published next to the release assets, see INDEX_MANIFEST_URL):
+#   {
+#     "latest": "2026.10.19",
+#     "full": {"version": "2026.10.19", "url": ".../index.zip", "sha256": "..."},
+#     "deltas": [{"from": "2026.10.12", "to": "2026.10.19", "url": ".../delta.zip", "sha256": "..."}]
+#   }
+#
+# Delta pack (zip):
+#   delta.json                 {"format": 1, "from": ..., "to": ..., "projection": null | {"dims", "sha256"},
+#                               "collections": {name: {"dims", ...}}}
+#   <collection>.jsonl         one {"id", "document", "metadata"} per added/updated chunk
+#   <collection>.npy           float32 embeddings, same order as the jsonl rows; already PCA-reduced when
+#                              exported from a compressed index ("projection" set)
+
+VERSION_FILENAME = "INDEX_VERSION.json"
+DELTA_FORMAT = 1
+
+
+def read_local_version(chroma_dir: str | Path) -> str | None:
+    path = Path(chroma_dir) / VERSION_FILENAME
+    try:
+        return json.loads(path.read_text(encoding="utf-8")).get("version") or None
+    except (OSError, ValueError):
+        return None
+
+
+def write_local_version(chroma_dir: str | Path, version: str, **extra: Any) -> None:
+    path = Path(chroma_dir) / VERSION_FILENAME
+    payload = {"version": version, "written_at": datetime.now(timezone.utc).isoformat(), **extra}
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def sha256_file(path: str | Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def delta_chain(manifest: dict[str, Any], local_version: str, target: str) -> list[dict[str, Any]] | None:
+    """
+    Shortest sequence of manifest deltas leading from local_version to target, or None if there is none.
+    """
+    if local_version == target:
+        return []
+
+    edges: dict[str, list[dict[str, Any]]] = {}
+    for d in manifest.get("deltas") or []:
+        if d.get("from") and d.get("to") and d.get("url"):
+            edges.setdefault(d["from"], []).append(d)
+
+    frontier: list[tuple[str, list[dict[str, Any]]]] = [(local_version, [])]
+    seen = {local_version}
+    while frontier:
+        nxt: list[tuple[str, list[dict[str, Any]]]] = []
+        for version, path in frontier:
+            for d in edges.get(version, []):
+                if d["to"] == target:
+                    return path + [d]
+                if d["to"] not in seen:
+                    seen.add(d["to"])
+                    nxt.append((d["to"], path + [d]))
+        frontier = nxt
+    return None
+
+
+def apply_delta_pack(zip_path: str | Path, chroma_dir: str | Path, expected_from: str | None) -> str:
+    """
+    Apply a delta pack in place (Chroma upserts/deletes + lexsig sidecar). Returns the new version.
+    Full-dimension embeddings are projected for a compressed local index; reduced ones are only accepted
+    by an index compressed with the same projection.
+    """
+    import chromadb
+    import numpy as np
+
+    from app.lexsig import LEXSIG_FILENAME, LexSigStore
+    from app.projection import PROJECTION_FILENAME, VECTORS_FILENAME, VectorStore, load_projection
+
+    chroma_dir = Path(chroma_dir)
+    with zipfile.ZipFile(zip_path, "r") as z:
+        header = json.loads(z.read("delta.json").decode("utf-8"))
+        if header.get("format") != DELTA_FORMAT:
+            raise RuntimeError(f"Unsupported delta format: {header.get('format')}")
+        if expected_from is not None and header.get("from") != expected_from:
+            raise RuntimeError(f"Delta starts at {header.get('from')}, local index is {expected_from}")
+
+        client = chromadb.PersistentClient(path=str(chroma_dir))
+        try:
+            lexsig = LexSigStore(chroma_dir / LEXSIG_FILENAME)
+            projection = load_projection(chroma_dir / PROJECTION_FILENAME)
+            vectors = VectorStore(chroma_dir / VECTORS_FILENAME) if (chroma_dir / VECTORS_FILENAME).exists() else None
+            packed = header.get("projection")
+            if packed is not None and (
+                projection is None or sha256_file(chroma_dir / PROJECTION_FILENAME) != packed.get("sha256")
+            ):
+                raise RuntimeError("Delta embeddings are PCA-reduced with a projection this index does not use")
+
+            for name, info in (header.get("collections") or {}).items():
+                metadata = info.get("metadata") or {"hnsw:space": "cosine"}
+                col = client.get_or_create_collection(name=name, metadata=metadata)
+
+                deleted = info.get("deleted") or []
+                for i in range(0, len(deleted), 1000):
+                    col.delete(ids=deleted[i : i + 1000])
+                if deleted:
+                    lexsig.delete_many(name, deleted)
+                    if vectors is not None:
+                        vectors.delete_many(name, deleted)
+
+                if not info.get("upserts"):
+                    continue
+
+                rows = [json.loads(line) for line in z.read(f"{name}.jsonl").decode("utf-8").splitlines() if line]
+                embeddings = np.load(io.BytesIO(z.read(f"{name}.npy")))
+                project = _check_delta_dims(name, int(embeddings.shape[1]), packed, projection)
+                for i in range(0, len(rows), 500):
+                    batch = rows[i : i + 500]
+                    ids = [r["id"] for r in batch]
+                    docs = [r["document"] for r in batch]
+                    emb = embeddings[i : i + 500]
+                    col.upsert(
+                        ids=ids,
+                        documents=docs,
+                        metadatas=[r["metadata"] for r in batch],
+                        embeddings=(projection.apply(emb) if project else emb).tolist(),
+                    )
+                    lexsig.put_many(name, ids, docs)
+                    if vectors is not None and project:
+                        vectors.put_many(name, ids, emb)
+                    elif vectors is not None:
+                        # no full-dimension vectors in the pack: drop the stale ones, these rank unrescored
+                        vectors.delete_many(name, ids)
+        finally:
+            # release Chroma's cached system so the directory can be moved once the chain is done
+            client.close()
+
+    return header["to"]
+
+
+def _check_delta_dims(name: str, dims: int, packed: dict | None, projection) -> bool:
+    """
+    Whether the pack's embeddings for `name` still need projecting; raises if they fit neither the index
+    nor its projection (e.g. reduced vectors for an uncompressed index, or another embedding model).
+    """
+    if packed is not None:
+        if dims != packed.get("dims") or dims != projection.dims:
+            raise RuntimeError(f"{name}: delta embeddings have {dims} dims, the index projection {projection.dims}")
+        return False
+    if projection is not None and dims != projection.input_dims:
+        raise RuntimeError(f"{name}: delta embeddings have {dims} dims, the projection expects {projection.input_dims}")
+    return projection is not None
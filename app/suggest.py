@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Any
+
+from app.index_manager import IndexHandle, index_manager
+
+# Typeahead over document titles and numbers, built from chunk metadata (one entry per uniqueKey).
+# Instead of a trie, every word start of every normalized title/number is one (doc, offset) pair in an array
+# sorted by the text from that offset on: a prefix lookup is a binary search plus a short forward scan.
+
+_PAGE = 5000
+_MAX_SCAN = 400  # matching entries looked at per query, keeps common prefixes ("საქ") bounded
+_DOCNO_RE = re.compile(r"(?:№|\bn)\s*(?=\d)")
+_STRIP_RE = re.compile(r"[\"'«»„“”()\[\]]+")
+_SPACE_RE = re.compile(r"\s+")
+_WORD_START_RE = re.compile(r"(?:^|\s)(?=\S)")
+
+# match kinds, best first
+TITLE_START = 0
+DOC_NUMBER = 1
+TITLE_WORD = 2
+
+
+def normalize(text: str) -> str:
+    """
+    Lowercase, drop quotes/brackets, "N 304" / "№ 304" -> "№304", collapse whitespace.
+    """
+    s = _STRIP_RE.sub(" ", (text or "").lower())
+    s = _DOCNO_RE.sub("№", s)
+    return _SPACE_RE.sub(" ", s).strip()
+
+
+@dataclass
+class Suggestion:
+    title: str
+    url: str
+    unique_key: str
+    species: str | None
+    doc_number: str | None
+    publish_date: str | None
+    match: str  # "title" | "doc_number" | "title_word"
+
+
+_MATCH_NAMES = {TITLE_START: "title", DOC_NUMBER: "doc_number", TITLE_WORD: "title_word"}
+
+
+class SuggestIndex:
+    def __init__(self, docs: list[dict[str, Any]], source: tuple[str, float] | None = None):
+        self.docs = docs
+        self.source = source  # (index path, loaded_at) it was built from
+        self.texts: list[str] = []  # normalized strings; several per doc (title, doc number)
+        self.text_doc = array("I")
+        self.text_kind = array("B")
+
+        for i, d in enumerate(docs):
+            self._add(i, d["title"], TITLE_START)
+            if d.get("doc_number"):
+                self._add(i, d["doc_number"], DOC_NUMBER)
+
+        entries = [
+            (t, off)
+            for t, text in enumerate(self.texts)
+            for off in (m.end() for m in _WORD_START_RE.finditer(text))
+        ]
+        entries.sort(key=lambda e: self.texts[e[0]][e[1]:])
+        self.entry_text = array("I", (t for t, _ in entries))
+        self.entry_off = array("I", (off for _, off in entries))
+
+    def _add(self, doc: int, raw: str, kind: int) -> None:
+        text = normalize(raw)
+        if text:
+            self.texts.append(text)
+            self.text_doc.append(doc)
+            self.text_kind.append(kind)
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def lookup(self, prefix: str, limit: int = 10, species: list[str] | None = None) -> list[Suggestion]:
+        q = normalize(prefix)
+        if not q:
+            return []
+        n = len(q)
+
+        def key(i: int) -> str:
+            return self.texts[self.entry_text[i]][self.entry_off[i] : self.entry_off[i] + n]
+
+        lo = bisect_left(range(len(self.entry_text)), q, key=key)
+        best: dict[int, tuple[bool, int, float, int]] = {}  # doc -> rank
+        for i in range(lo, min(lo + _MAX_SCAN, len(self.entry_text))):
+            if key(i) != q:
+                break
+            t = self.entry_text[i]
+            doc = self.text_doc[t]
+            d = self.docs[doc]
+            if species and d.get("species") not in species:
+                continue
+            kind = self.text_kind[t]
+            if kind == TITLE_START and self.entry_off[i] > 0:
+                kind = TITLE_WORD
+            # whole-word matches first ("№304" before "№3045"), then title/number starts, newer docs, shorter titles
+            text, end = self.texts[t], self.entry_off[i] + n
+            partial = end < len(text) and text[end] != " "
+            rank = (partial, kind, -(d.get("publish_ts") or 0), len(d["title"]))
+            if doc not in best or rank < best[doc]:
+                best[doc] = rank
+
+        out: list[Suggestion] = []
+        for doc, rank in sorted(best.items(), key=lambda x: x[1])[:limit]:
+            d = self.docs[doc]
+            out.append(
+                Suggestion(
+                    title=d["title"],
+                    url=d["url"],
+                    unique_key=d["unique_key"],
+                    species=d.get("species"),
+                    doc_number=d.get("doc_number"),
+                    publish_date=d.get("publish_date"),
+                    match=_MATCH_NAMES[rank[1]],
+                )
+            )
+        return out
+
+
+def _collect_docs(handle: IndexHandle) -> list[dict[str, Any]]:
+    """
+    One entry per uniqueKey across all shards, from chunk metadata only (no documents, no embeddings).
+    """
+    docs: dict[str, dict[str, Any]] = {}
+    for shard in handle.shards:
+        offset = 0
+        while True:
+            got = shard.collection.get(include=["metadatas"], limit=_PAGE, offset=offset)
+            metas = got.get("metadatas") or []
+            for meta in metas:
+                key = (meta or {}).get("uniqueKey")
+                if not key:
+                    continue
+                d = docs.get(key)
+                if d is None:
+                    d = docs[key] = {
+                        "unique_key": key,
+                        "title": meta.get("title") or "Untitled",
+                        "url": meta.get("url") or "",
+                        "species": meta.get("species") or shard.species,
+                        "doc_number": None,
+                        "publish_date": meta.get("publishDate"),
+                        "publish_ts": meta.get("publishDate_ts"),
+                    }
+                # doc numbers are patched onto chunks later (ingest.patch_chroma_metadata), maybe not on all
+                if not d["doc_number"] and meta.get("doc_number_raw"):
+                    d["doc_number"] = str(meta["doc_number_raw"])
+            if len(metas) < _PAGE:
+                break
+            offset += _PAGE
+    return list(docs.values())
+
+
+def build(handle: IndexHandle) -> SuggestIndex:
+    # hold the handle so a swap during the build doesn't close its collections under us
+    if not handle.acquire():
+        raise RuntimeError(f"Index {handle.path} was replaced before its suggestions were built")
+    try:
+        return SuggestIndex(_collect_docs(handle), source=(handle.path, handle.loaded_at))
+    finally:
+        handle.release()
+
+
+class SuggestService:
+    """
+    Keeps the SuggestIndex of the served index. After an index swap the old one keeps answering
+    while the new one is built in the background.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._index: SuggestIndex | None = None
+        self._building = False
+        self._state: dict[str, Any] = {"build_ms": None, "error": None}
+        self._failed_source: tuple[str, float] | None = None  # not retried until the next swap
+
+    def _build(self, handle: IndexHandle) -> SuggestIndex:
+        t0 = time.perf_counter()
+        try:
+            index = build(handle)
+        except Exception as e:
+            self._state["error"] = f"{type(e).__name__}: {e}"[:300]
+            self._failed_source = (handle.path, handle.loaded_at)
+            raise
+        self._state.update(build_ms=round((time.perf_counter() - t0) * 1000.0), error=None)
+        self._index = index
+        return index
+
+    def _rebuild_async(self, handle: IndexHandle) -> None:
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+
+        def run() -> None:
+            try:
+                self._build(handle)
+            except Exception:
+                pass  # keep serving the previous index; the error is in info()
+            finally:
+                with self._lock:
+                    self._building = False
+
+        threading.Thread(target=run, name="suggest-builder", daemon=True).start()
+
+    def get(self) -> SuggestIndex:
+        handle = index_manager.current()
+        index = self._index
+        if index is not None and index.source == (handle.path, handle.loaded_at):
+            return index
+        if index is None:
+            with self._lock:
+                if self._index is None:
+                    return self._build(handle)
+                return self._index
+        if self._failed_source != (handle.path, handle.loaded_at):
+            self._rebuild_async(handle)
+        return index
+
+    def info(self) -> dict[str, Any]:
+        index = self._index
+        return {
+            "docs": len(index) if index else None,
+            "entries": len(index.entry_text) if index else None,
+            "building": self._building,
+            **self._state,
+        }
+
+
+suggest_service = SuggestService()
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from app.embeddings import make_passage, make_query
+from bench.common import doc_recall_at_k, load_corpus, percentile, print_table
+from ingest.index_infohub import make_splitter
+
+
+def main():
+    """
+    Compare the fixed-window and structure-aware chunkers on the locally cached corpus:
+    chunk count, overlap overhead, token lengths, embed time and title->document recall@k.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--species", default="LegislativeNews")
+    parser.add_argument("--raw-store", default="./data/raw.sqlite3")
+    parser.add_argument("--limit", type=int, default=200, help="documents to sample; 0 for all")
+    parser.add_argument("--embed-model", default="intfloat/multilingual-e5-large")
+    parser.add_argument("--max-tokens", type=int, default=480)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--no-embed", action="store_true", help="only chunk statistics (no model encode)")
+    args = parser.parse_args()
+
+    docs = load_corpus(args.raw_store, args.species, limit=args.limit or None)
+    if not docs:
+        raise RuntimeError(f"No texts for {args.species} in: {args.raw_store}")
+
+    model = SentenceTransformer(args.embed_model)
+    tokenizer = model.tokenizer
+    total_chars = sum(len(d.text) for d in docs)
+
+    query_embs = None
+    if not args.no_embed:
+        query_embs = model.encode([make_query(d.title, args.embed_model) for d in docs], normalize_embeddings=True)
+
+    rows = []
+    for kind in ["fixed", "structured"]:
+        split = make_splitter(kind, model, args.max_tokens)
+
+        t0 = time.perf_counter()
+        chunks: list[str] = []
+        owners: list[int] = []
+        for i, d in enumerate(docs):
+            parts = split(d.text)
+            chunks.extend(parts)
+            owners.extend([i] * len(parts))
+        chunk_ms = (time.perf_counter() - t0) * 1000.0
+
+        tokens = [len(tokenizer.encode(make_passage(c, args.embed_model))) for c in chunks]
+        row = {
+            "chunker": kind,
+            "docs": len(docs),
+            "chunks": len(chunks),
+            "chunks/doc": len(chunks) / len(docs),
+            "overlap_%": 100.0 * (sum(len(c) for c in chunks) / total_chars - 1.0),
+            "tok_p50": percentile(tokens, 50),
+            "tok_max": max(tokens) if tokens else 0,
+            "truncated": sum(t > 512 for t in tokens),
+            "chunk_ms": chunk_ms,
+        }
+
+        if query_embs is not None:
+            t0 = time.perf_counter()
+            chunk_embs = model.encode([make_passage(c, args.embed_model) for c in chunks], normalize_embeddings=True)
+            embed_s = time.perf_counter() - t0
+            row["embed_s"] = embed_s
+            row["chunks/s"] = len(chunks) / embed_s if embed_s else float("nan")
+            row[f"recall@{args.k}"] = doc_recall_at_k(
+                np.asarray(query_embs), list(range(len(docs))), np.asarray(chunk_embs), owners, args.k
+            )
+
+        rows.append(row)
+
+    columns = ["chunker", "docs", "chunks", "chunks/doc", "overlap_%", "tok_p50", "tok_max", "truncated", "chunk_ms"]
+    if query_embs is not None:
+        columns += ["embed_s", "chunks/s", f"recall@{args.k}"]
+    print_table(rows, columns)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+from ingest.raw_store import RawStore
+
+
+@dataclass
+class Doc:
+    key: str
+    title: str
+    text: str
+
+
+def load_corpus(raw_store: str, species: str, limit: int | None = None) -> list[Doc]:
+    """
+    Extracted texts written by the indexer, with titles from the cached raw details.
+    """
+    store = RawStore(raw_store)
+    docs: list[Doc] = []
+    for key, text in store.iter_texts(species):
+        if limit is not None and len(docs) >= limit:
+            break
+        if not text.strip():
+            continue
+        details = store.get_details(key) or {}
+        docs.append(Doc(key=key, title=details.get("name") or key, text=text))
+    store.close()
+    return docs
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return float("nan")
+    s = sorted(values)
+    idx = min(len(s) - 1, max(0, math.ceil(p / 100.0 * len(s)) - 1))
+    return s[idx]
+
+
+def doc_recall_at_k(
+    query_embs: np.ndarray,
+    target_docs: list[int],
+    chunk_embs: np.ndarray,
+    chunk_docs: list[int],
+    k: int,
+) -> float:
+    """
+    Share of queries whose target document owns at least one of the top-k chunks (exact cosine search;
+    embeddings are expected to be normalized).
+    """
+    if len(query_embs) == 0 or len(chunk_embs) == 0:
+        return float("nan")
+    owners = np.asarray(chunk_docs)
+    sims = query_embs @ chunk_embs.T
+    top = np.argpartition(-sims, kth=min(k, sims.shape[1] - 1), axis=1)[:, :k]
+    hits = [int(t in set(owners[row].tolist())) for t, row in zip(target_docs, top)]
+    return sum(hits) / len(hits)
+
+
+def print_table(rows: list[dict], columns: list[str]) -> None:
+    def fmt(v) -> str:
+        if isinstance(v, float):
+            return f"{v:.3f}"
+        return str(v)
+
+    widths = {c: max(len(c), *(len(fmt(r.get(c, ""))) for r in rows)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    print("  ".join("-" * widths[c] for c in columns))
+    for r in rows:
+        print("  ".join(fmt(r.get(c, "")).ljust(widths[c]) for c in columns))
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from app.compression import compress
+from app.lexical import extract_keywords, make_stems
+from app.settings import settings
+from bench.common import load_corpus, percentile, print_table
+from bench.loadgen import load_questions
+
+MODES = ["off", "lexical", "hybrid"]
+
+
+def stem_coverage(text: str, stems: list[str]) -> float:
+    """
+    Share of the given stems that occur in the text.
+    """
+    if not stems:
+        return float("nan")
+    have = set(make_stems(extract_keywords(text, limit=None)))
+    return sum(1 for s in stems if s in have) / len(stems)
+
+
+def main():
+    """
+    Full vs compressed context for the same retrieved chunks: size, compression time and grounding proxies
+    (question-stem coverage, cosine of the whole context to the question). With --llm, also answer latency
+    and the share of answer stems found in the retrieved chunks.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", default=None, help="text file, one question per line")
+    parser.add_argument("--species", default="LegislativeNews", help="titles from the raw store when no --questions")
+    parser.add_argument("--raw-store", default="./data/raw.sqlite3")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--k", type=int, default=12)
+    parser.add_argument("--budget-chars", type=int, default=settings.context_compression_budget_chars)
+    parser.add_argument("--llm", action="store_true", help="also answer every question once per mode (uses LLM_PROVIDER)")
+    args = parser.parse_args()
+
+    # imported here so the argument parsing above doesn't wait for the model
+    from app import rag
+    from app.retrieval import embed_passages, embed_query, retrieve_with_meta
+
+    if args.questions:
+        questions = load_questions(args.questions)[: args.limit]
+    else:
+        questions = [d.title for d in load_corpus(args.raw_store, args.species, limit=args.limit)]
+    if not questions:
+        raise RuntimeError("No questions (pass --questions or fill the raw store)")
+
+    if args.llm:
+        # every mode must reach the model
+        settings.llm_cache_enabled = False
+
+    stats: dict[str, dict[str, list[float]]] = {m: {} for m in MODES}
+
+    def add(mode: str, name: str, value: float) -> None:
+        stats[mode].setdefault(name, []).append(value)
+
+    for q in questions:
+        retrieved, _ = retrieve_with_meta(q, k=args.k)
+        texts = [c.text for c in retrieved]
+        if not texts:
+            continue
+        q_stems = make_stems(extract_keywords(q))
+        q_emb = np.asarray(embed_query(q))
+
+        for mode in MODES:
+            t0 = time.perf_counter()
+            if mode == "off":
+                context = texts
+            else:
+                hybrid = mode == "hybrid"
+                snippets, _ = compress(
+                    q,
+                    texts,
+                    budget_chars=args.budget_chars,
+                    query_embedding=embed_query(q) if hybrid else None,
+                    embed_passages=embed_passages if hybrid else None,
+                )
+                context = [s.text for s in snippets]
+            add(mode, "ms", (time.perf_counter() - t0) * 1000.0)
+
+            joined = "\n\n".join(context)
+            add(mode, "chars", float(len(joined)))
+            add(mode, "q_cov", stem_coverage(joined, q_stems))
+            add(mode, "cos", float(np.asarray(embed_passages([joined]))[0] @ q_emb))
+
+            if args.llm:
+                settings.context_compression = mode
+                t0 = time.perf_counter()
+                result = rag.answer(q, k=args.k)
+                add(mode, "llm_ms", (time.perf_counter() - t0) * 1000.0)
+                answer_stems = make_stems(extract_keywords(result["answer"], limit=None))
+                add(mode, "ans_grounded", stem_coverage("\n".join(texts), answer_stems))
+
+    rows = []
+    for mode in MODES:
+        s = stats[mode]
+        if not s:
+            continue
+        row = {
+            "mode": mode,
+            "questions": len(s["chars"]),
+            "chars_mean": float(np.mean(s["chars"])),
+            "ms_p50": percentile(s["ms"], 50),
+            "ms_p95": percentile(s["ms"], 95),
+            "q_cov": float(np.nanmean(s["q_cov"])),
+            "cos": float(np.mean(s["cos"])),
+        }
+        if args.llm:
+            row["llm_ms_p50"] = percentile(s["llm_ms"], 50)
+            row["ans_grounded"] = float(np.nanmean(s["ans_grounded"]))
+        rows.append(row)
+
+    if rows:
+        base = rows[0]["chars_mean"] or 1.0
+        for r in rows:
+            r["chars_%"] = 100.0 * r["chars_mean"] / base
+
+    columns = ["mode", "questions", "chars_mean", "chars_%", "ms_p50", "ms_p95", "q_cov", "cos"]
+    if args.llm:
+        columns += ["llm_ms_p50", "ans_grounded"]
+    print(f"budget_chars={args.budget_chars} k={args.k}")
+    print_table(rows, columns)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import argparse
+import shutil
+import time
+from pathlib import Path
+
+import chromadb
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from app.embeddings import EMBEDDING_MODEL_KEY, collection_base, make_passage, make_query, model_slug
+from app.hnsw import collection_metadata
+from bench.common import load_corpus, percentile, print_table
+from ingest.chunking import iter_structured_chunks
+
+DEFAULT_MODELS = "intfloat/multilingual-e5-large,intfloat/multilingual-e5-base,intfloat/multilingual-e5-small"
+
+
+def dir_mb(path: Path) -> float:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file()) / 1e6
+
+
+def main():
+    """
+    Build one index per candidate embedding model from the same chunks (character-measured, so every model
+    sees identical input) and compare encode throughput, query latency (encode + search), index size and
+    title -> document recall@k.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--models", default=DEFAULT_MODELS, help="comma-separated sentence-transformers models")
+    parser.add_argument("--species", default="LegislativeNews")
+    parser.add_argument("--raw-store", default="./data/raw.sqlite3")
+    parser.add_argument("--limit", type=int, default=200, help="documents to sample; 0 for all")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--work-dir", default="./data/embedding_bench", help="one index directory per model")
+    parser.add_argument("--collection", default="infohub_docs")
+    args = parser.parse_args()
+
+    docs = load_corpus(args.raw_store, args.species, limit=args.limit or None)
+    if not docs:
+        raise RuntimeError(f"No texts for {args.species} in: {args.raw_store}")
+
+    chunks: list[str] = []
+    owners: list[int] = []
+    for i, d in enumerate(docs):
+        parts = list(iter_structured_chunks(d.text, max_len=1200))
+        chunks.extend(parts)
+        owners.extend([i] * len(parts))
+    print(f"{len(docs)} documents, {len(chunks)} chunks")
+
+    rows = []
+    for model_name in [m.strip() for m in args.models.split(",") if m.strip()]:
+        t0 = time.perf_counter()
+        model = SentenceTransformer(model_name)
+        load_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        embs = model.encode(
+            [make_passage(c, model_name) for c in chunks], batch_size=args.batch_size, normalize_embeddings=True
+        )
+        encode_s = time.perf_counter() - t0
+
+        # tagged, per-model collection: the same layout the API reads with EMBEDDING_INDEX_PER_MODEL=true
+        path = Path(args.work_dir) / model_slug(model_name)
+        shutil.rmtree(path, ignore_errors=True)
+        client = chromadb.PersistentClient(path=str(path))
+        col = client.create_collection(
+            name=collection_base(args.collection, model_name, per_model=True),
+            metadata={**collection_metadata(), EMBEDDING_MODEL_KEY: model_name},
+        )
+        for i in range(0, len(chunks), 1000):
+            col.add(
+                ids=[f"c{j}" for j in range(i, min(i + 1000, len(chunks)))],
+                embeddings=np.asarray(embs[i : i + 1000]),
+                metadatas=[{"doc": owners[j]} for j in range(i, min(i + 1000, len(chunks)))],
+            )
+
+        hits: list[int] = []
+        lat: list[float] = []
+        for i, d in enumerate(docs):
+            t0 = time.perf_counter()
+            q = model.encode([make_query(d.title, model_name)], normalize_embeddings=True)
+            res = col.query(query_embeddings=q, n_results=min(args.k, len(chunks)), include=["metadatas"])
+            lat.append((time.perf_counter() - t0) * 1000.0)
+            hits.append(int(any(m["doc"] == i for m in res["metadatas"][0])))
+
+        rows.append(
+            {
+                "model": model_name,
+                "dim": int(embs.shape[1]),
+                "load_s": load_s,
+                "chunks/s": len(chunks) / encode_s if encode_s else float("nan"),
+                "query_p50_ms": percentile(lat, 50),
+                "query_p95_ms": percentile(lat, 95),
+                "index_mb": dir_mb(path),
+                f"recall@{args.k}": sum(hits) / len(hits),
+            }
+        )
+        del model
+
+    print_table(
+        rows, ["model", "dim", "load_s", "chunks/s", "query_p50_ms", "query_p95_ms", "index_mb", f"recall@{args.k}"]
+    )
+
+
+if __name__ == "__main__":
+    main()
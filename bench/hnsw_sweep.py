@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+from tqdm import tqdm
+
+from app.hnsw import collection_metadata
+from bench.common import percentile, print_table
+
+_PAGE = 2000
+
+
+def parse_grid(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def load_vectors(chroma_dir: str, collection: str, limit: int | None) -> tuple[list[str], np.ndarray]:
+    """
+    Ids and (normalized) embeddings of an existing collection.
+    """
+    import chromadb
+
+    col = chromadb.PersistentClient(path=chroma_dir).get_collection(collection)
+    ids: list[str] = []
+    embs: list[np.ndarray] = []
+    offset = 0
+    while limit is None or len(ids) < limit:
+        n = _PAGE if limit is None else min(_PAGE, limit - len(ids))
+        got = col.get(include=["embeddings"], limit=n, offset=offset)
+        if not got["ids"]:
+            break
+        ids.extend(got["ids"])
+        embs.append(np.asarray(got["embeddings"], dtype=np.float32))
+        offset += len(got["ids"])
+    if not ids:
+        raise RuntimeError(f"No vectors in {collection} at {chroma_dir}")
+    x = np.vstack(embs)
+    return ids, x / np.linalg.norm(x, axis=1, keepdims=True).clip(min=1e-12)
+
+
+def dir_bytes(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def build(work_dir: Path, ids: list[str], x: np.ndarray, m: int, construction_ef: int, reuse: bool):
+    """
+    One collection per parameter pair in its own directory, so the HNSW files can be measured separately.
+    Returns (path, build seconds or None when reused).
+    """
+    import chromadb
+
+    path = work_dir / f"m{m}_cef{construction_ef}"
+    if reuse and path.exists():
+        col = chromadb.PersistentClient(path=str(path)).get_or_create_collection("sweep")
+        if col.count() == len(ids):
+            return path, None
+    shutil.rmtree(path, ignore_errors=True)
+    client = chromadb.PersistentClient(path=str(path))
+    col = client.create_collection("sweep", metadata=collection_metadata(m, construction_ef))
+    t0 = time.perf_counter()
+    for i in tqdm(range(0, len(ids), _PAGE), desc=f"build M={m} cef={construction_ef}", leave=False):
+        col.add(ids=ids[i : i + _PAGE], embeddings=x[i : i + _PAGE])
+    return path, time.perf_counter() - t0
+
+
+def measure(
+    path: str, search_ef: int, q: np.ndarray, self_ids: list[str | None], truth: list[set[str]], k: int
+) -> tuple[list[float], list[float]]:
+    """
+    Per-query recall and latency at one search_ef. Runs in a fresh process: Chroma reads search_ef when it
+    loads the segment, so a process that already queried the collection keeps the old value.
+    """
+    import chromadb
+
+    col = chromadb.PersistentClient(path=path).get_collection("sweep")
+    col.modify(configuration={"hnsw": {"ef_search": search_ef}})
+    col.query(query_embeddings=[q[0]], n_results=k + 1, include=["distances"])  # segment load
+
+    recalls: list[float] = []
+    lat: list[float] = []
+    for qv, self_id, exact in zip(q, self_ids, truth):
+        t0 = time.perf_counter()
+        got = col.query(query_embeddings=[qv], n_results=k + 1, include=["distances"])
+        lat.append((time.perf_counter() - t0) * 1000.0)
+        found = [i for i in got["ids"][0] if i != self_id][:k]
+        recalls.append(len(exact.intersection(found)) / max(1, len(exact)))
+    return recalls, lat
+
+
+def main():
+    """
+    Recall@k of Chroma's HNSW against exact search over the same vectors, for a grid of M / construction_ef
+    (each built once) and search_ef (changed on the built collection), with query latency and index size.
+    Queries are held-out stored vectors (the vector itself is excluded from both result lists) or --questions.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chroma-dir", default="./data/index")
+    parser.add_argument("--collection", default="infohub_docs")
+    parser.add_argument("--limit", type=int, default=0, help="vectors to copy from the collection; 0 for all")
+    parser.add_argument("--work-dir", default="./data/hnsw_sweep")
+    parser.add_argument("--reuse", action="store_true", help="reopen collections already built in --work-dir")
+    parser.add_argument("--m", default="8,16,32")
+    parser.add_argument("--construction-ef", default="100,200")
+    parser.add_argument("--search-ef", default="10,25,50,100,200")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200, help="stored vectors sampled as queries")
+    parser.add_argument("--questions", default=None, help="text file, one question per line (embedded with --embed-model)")
+    parser.add_argument("--embed-model", default="intfloat/multilingual-e5-large")
+    parser.add_argument("--json-out", default=None, help="append one JSON line per grid point")
+    args = parser.parse_args()
+
+    ids, x = load_vectors(args.chroma_dir, args.collection, args.limit or None)
+    print(f"{len(ids)} vectors, dim {x.shape[1]} ({x.nbytes / 1e6:.1f} MB float32)")
+
+    rng = np.random.default_rng(0)
+    if args.questions:
+        from sentence_transformers import SentenceTransformer
+
+        from app.embeddings import make_query
+        from bench.loadgen import load_questions
+
+        questions = load_questions(args.questions)
+        q = SentenceTransformer(args.embed_model).encode(
+            [make_query(t, args.embed_model) for t in questions], normalize_embeddings=True
+        ).astype(np.float32)
+        self_ids: list[str | None] = [None] * len(q)
+    else:
+        pick = rng.choice(len(ids), size=min(args.queries, len(ids)), replace=False)
+        q = x[pick]
+        self_ids = [ids[i] for i in pick]
+
+    # exact top-k by brute force (cosine = dot on normalized vectors)
+    k = args.k
+    sims = q @ x.T
+    truth: list[set[str]] = []
+    for row, self_id in zip(sims, self_ids):
+        exact = [ids[i] for i in np.argsort(-row)[: k + 1] if ids[i] != self_id][:k]
+        truth.append(set(exact))
+
+    work_dir = Path(args.work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    ctx = multiprocessing.get_context("spawn")
+    rows = []
+    for m in parse_grid(args.m):
+        for cef in parse_grid(args.construction_ef):
+            path, build_sec = build(work_dir, ids, x, m, cef, args.reuse)
+            hnsw_bytes = dir_bytes(path) - (path / "chroma.sqlite3").stat().st_size
+            for sef in parse_grid(args.search_ef):
+                with ctx.Pool(1) as pool:
+                    recalls, lat = pool.apply(measure, (str(path), sef, q, self_ids, truth, k))
+
+                row = {
+                    "M": m,
+                    "construction_ef": cef,
+                    "search_ef": sef,
+                    f"recall@{k}": float(np.mean(recalls)),
+                    "p50_ms": percentile(lat, 50),
+                    "p95_ms": percentile(lat, 95),
+                    "build_s": build_sec if build_sec is not None else "reused",
+                    "hnsw_mb": hnsw_bytes / 1e6,
+                    "graph_mb": max(0, hnsw_bytes - x.nbytes) / 1e6,  # links + bookkeeping on top of the vectors
+                }
+                rows.append(row)
+                if args.json_out:
+                    with open(args.json_out, "a", encoding="utf-8") as f:
+                        f.write(json.dumps({"vectors": len(ids), "k": k, **row}) + "\n")
+
+    print_table(
+        rows, ["M", "construction_ef", "search_ef", f"recall@{k}", "p50_ms", "p95_ms", "build_s", "hnsw_mb", "graph_mb"]
+    )
+
+
+if __name__ == "__main__":
+    main()
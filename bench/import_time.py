@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import argparse
+import re
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+from bench.common import print_table
+
+ROOT = Path(__file__).resolve().parent.parent
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)\s*$")
+DEFAULT_FORBIDDEN = "torch,transformers,sentence_transformers,chromadb,numpy"
+
+
+@dataclass
+class ImportRow:
+    module: str
+    depth: int
+    self_us: int
+    cumulative_us: int
+
+
+def measure(module: str) -> list[ImportRow]:
+    """
+    Import `module` in a fresh interpreter with -X importtime and parse its stderr report.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if m:
+            # the report indents nested imports by two spaces per level
+            depth = (len(m.group(3)) - 1) // 2
+            rows.append(ImportRow(m.group(4), depth, int(m.group(1)), int(m.group(2))))
+    return rows
+
+
+def main():
+    """
+    Import-time budget check for the API (and UI) entry points. Exits non-zero when the best of --repeat
+    runs exceeds --budget-ms, or when a heavy dependency is imported eagerly; suitable for CI.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", action="append", default=[], help="default: app.api")
+    parser.add_argument("--budget-ms", type=float, default=1000.0)
+    parser.add_argument("--repeat", type=int, default=3, help="take the fastest run (disk cache noise)")
+    parser.add_argument("--top", type=int, default=15, help="rows in the breakdown")
+    parser.add_argument("--forbid", default=DEFAULT_FORBIDDEN, help="comma-separated modules that must stay lazy")
+    args = parser.parse_args()
+
+    modules = args.module or ["app.api"]
+    forbidden = {m.strip() for m in args.forbid.split(",") if m.strip()}
+    failed = False
+
+    for module in modules:
+        runs = [measure(module) for _ in range(max(1, args.repeat))]
+        # the target's own cumulative time (interpreter startup such as `site` is not charged to it)
+        totals = [next(r.cumulative_us for r in rows if r.module == module and r.depth == 0) for rows in runs]
+        best = min(range(len(runs)), key=lambda i: totals[i])
+        rows, total_ms = runs[best], totals[best] / 1000.0
+
+        print(f"\nimport {module}: {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms, best of {len(runs)})\n")
+        print("By cumulative time (packages imported directly or by app.*):")
+        top_cum = sorted(
+            (r for r in rows if r.depth <= 1 or r.module.startswith("app.")), key=lambda r: -r.cumulative_us
+        )
+        print_table(
+            [
+                {"module": "  " * r.depth + r.module, "cumulative_ms": r.cumulative_us / 1000.0, "self_ms": r.self_us / 1000.0}
+                for r in top_cum[: args.top]
+            ],
+            ["module", "cumulative_ms", "self_ms"],
+        )
+        print("\nBy self time:")
+        print_table(
+            [
+                {"module": r.module, "self_ms": r.self_us / 1000.0}
+                for r in sorted(rows, key=lambda r: -r.self_us)[: args.top]
+            ],
+            ["module", "self_ms"],
+        )
+
+        eager = sorted({r.module.split(".")[0] for r in rows} & forbidden)
+        if eager:
+            print(f"\nFAIL: heavy modules imported eagerly by {module}: {', '.join(eager)}")
+            failed = True
+        if total_ms > args.budget_ms:
+            print(f"\nFAIL: import {module} took {total_ms:.0f} ms > budget {args.budget_ms:.0f} ms")
+            failed = True
+
+    if failed:
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from bench.common import percentile, print_table
+
+DEFAULT_QUESTIONS = [
+    "რა არის დღგ-ს განაკვეთი საქართველოში?",
+    "როდის უნდა წარედგინოს საშემოსავლო დეკლარაცია?",
+    "როგორ ხდება ქონების გადასახადის გადახდა?",
+    "რა ჯარიმა ეკისრება დეკლარაციის დაგვიანებით წარდგენისთვის?",
+    "ვინ ითვლება მიკრო ბიზნესის სტატუსის მქონე პირად?",
+]
+
+
+@dataclass
+class Result:
+    started: float
+    latency_ms: float
+    status: int | None
+    model_used: str | None = None
+    fallback_used: bool = False
+    llm_failed: bool = False  # deterministic snippet answer instead of an LLM answer
+    no_context: bool = False  # nothing retrieved, answered without calling the LLM
+    error: str | None = None
+
+
+def load_questions(path: str | None) -> list[str]:
+    if not path:
+        return DEFAULT_QUESTIONS
+    lines = [ln.strip() for ln in Path(path).read_text(encoding="utf-8").splitlines()]
+    return [ln for ln in lines if ln and not ln.startswith("#")]
+
+
+def main():
+    """
+    Open-loop load against /ask: requests are issued on a fixed (or Poisson) schedule at --rps,
+    independent of how fast the server answers, so queueing shows up in the latency percentiles.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--questions", default=None, help="text file, one question per line (default: built-in list)")
+    parser.add_argument("--rps", type=float, default=2.0)
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds of load")
+    parser.add_argument("--poisson", action="store_true", help="exponential inter-arrival times instead of fixed")
+    parser.add_argument("--max-in-flight", type=int, default=64, help="client-side cap; arrivals beyond it are dropped")
+    parser.add_argument("--k", type=int, default=6)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--label", default="", help="name for this configuration in the output")
+    parser.add_argument("--json-out", default=None, help="append the summary as one JSON line (for comparing runs)")
+    args = parser.parse_args()
+
+    questions = load_questions(args.questions)
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=args.max_in_flight)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    results: list[Result] = []
+    lock = threading.Lock()
+    in_flight = threading.BoundedSemaphore(args.max_in_flight)
+    dropped = 0
+
+    def fire(question: str) -> None:
+        t0 = time.perf_counter()
+        res = Result(started=t0, latency_ms=0.0, status=None)
+        try:
+            r = session.post(f"{args.url.rstrip('/')}/ask", json={"question": question, "k": args.k}, timeout=args.timeout)
+            res.status = r.status_code
+            if r.ok:
+                body = r.json() or {}
+                meta = body.get("meta") or {}
+                res.model_used = meta.get("model_used")
+                res.fallback_used = bool(meta.get("fallback_used"))
+                res.no_context = not body.get("sources")
+                res.llm_failed = (
+                    not res.no_context and res.model_used is None and (meta.get("provider") or "none") != "none"
+                )
+        except Exception as e:
+            res.error = type(e).__name__
+        finally:
+            res.latency_ms = (time.perf_counter() - t0) * 1000.0
+            in_flight.release()
+            with lock:
+                results.append(res)
+
+    pool = ThreadPoolExecutor(max_workers=args.max_in_flight, thread_name_prefix="loadgen")
+    start = time.perf_counter()
+    next_at = start
+    sent = 0
+    while next_at - start < args.duration:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        if in_flight.acquire(blocking=False):
+            pool.submit(fire, questions[sent % len(questions)])
+            sent += 1
+        else:
+            dropped += 1
+        gap = random.expovariate(args.rps) if args.poisson else 1.0 / args.rps
+        next_at += gap
+    pool.shutdown(wait=True)
+    wall = time.perf_counter() - start
+
+    ok = [r for r in results if r.status == 200]
+    lat = [r.latency_ms for r in ok]
+    summary = {
+        "label": args.label or f"rps={args.rps:g}",
+        "target_rps": args.rps,
+        "sent": sent,
+        "dropped": dropped,
+        "ok": len(ok),
+        "http_errors": sum(1 for r in results if r.status is not None and r.status != 200),
+        "client_errors": sum(1 for r in results if r.error),
+        "throughput_rps": len(ok) / wall if wall else 0.0,
+        "p50_ms": percentile(lat, 50),
+        "p95_ms": percentile(lat, 95),
+        "p99_ms": percentile(lat, 99),
+        "fallback_model_rate": (sum(r.fallback_used for r in ok) / len(ok)) if ok else 0.0,
+        "llm_failed_rate": (sum(r.llm_failed for r in ok) / len(ok)) if ok else 0.0,
+        "no_context_rate": (sum(r.no_context for r in ok) / len(ok)) if ok else 0.0,
+    }
+
+    print_table([summary], list(summary))
+    if args.json_out:
+        with open(args.json_out, "a", encoding="utf-8") as f:
+            f.write(json.dumps(summary, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+
+from app import llm
+from app.settings import settings
+from bench.common import print_table
+from bench.stub_llm import StubConfig, make_handler
+
+PRIMARY = "primary-model"
+FALLBACK = "fallback-model"
+
+
+def start_stub(latency: str, error_rate: float = 0.0, error_status: int = 503, model_error_rate=()) -> str:
+    args = argparse.Namespace(
+        latency=latency,
+        error_rate=error_rate,
+        error_status=error_status,
+        model_error_rate=list(model_error_rate),
+        tokens=5,
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(StubConfig(args)))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def configure(
+    urls: list[str], fallback: str = "", max_concurrency: int = 4, wait_sec: float = 30.0, circuit: bool = True
+) -> None:
+    settings.llm_provider = "openai_compat"
+    settings.llm_api_key = "stub"
+    settings.llm_model = PRIMARY
+    settings.llm_fallback_model = fallback
+    settings.llm_base_url = urls[0]
+    settings.llm_base_urls = ",".join(urls) if len(urls) > 1 else ""
+    settings.llm_endpoint_max_concurrency = max_concurrency
+    settings.llm_pool_wait_sec = wait_sec
+    settings.llm_cache_enabled = False
+    settings.llm_circuit_enabled = circuit
+    llm._pools.clear()
+    llm._breakers.clear()
+
+
+def fire(n: int, concurrency: int) -> tuple[list[dict], list[Exception], float]:
+    """
+    n chat calls from `concurrency` threads. Returns (metas of successful calls, errors, wall seconds).
+    """
+    metas: list[dict] = []
+    errors: list[Exception] = []
+
+    def one(i: int) -> None:
+        try:
+            metas.append(llm.chat_with_meta([{"role": "user", "content": f"q{i}"}])[1])
+        except Exception as e:
+            errors.append(e)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(n)))
+    return metas, errors, time.perf_counter() - t0
+
+
+def main():
+    """
+    Endpoint-pool behaviour against in-process stub LLM servers: routing across several endpoints,
+    ejection of a failing one, and the single-endpoint default (no concurrency cap, no ejection, 429 falls
+    through to the fallback model). Exits non-zero if any check fails.
+    """
+    argparse.ArgumentParser().parse_args()
+    rows: list[dict] = []
+
+    def check(name: str, ok: bool, detail: str) -> None:
+        rows.append({"check": name, "result": "ok" if ok else "FAIL", "detail": detail})
+
+    # 1) one URL, as before pools existed: 12 concurrent 200 ms calls finish in about one round trip
+    configure([start_stub("fixed:200")], max_concurrency=4)
+    metas, errors, wall = fire(12, concurrency=12)
+    check("single: no concurrency cap", not errors and wall < 0.45, f"{len(metas)} ok in {wall:.2f}s")
+
+    # 2) one URL answering 429 for the primary model: never ejected, every call served by the fallback model
+    configure([start_stub("fixed:20", error_status=429, model_error_rate=[f"{PRIMARY}=1"])], fallback=FALLBACK)
+    metas, errors, _ = fire(6, concurrency=6)
+    ep = llm.pool_info()["openai_compat"][0]
+    check(
+        "single: 429 -> fallback model",
+        not errors and all(m["fallback_used"] for m in metas) and not ep["ejected"],
+        f"{sum(m['fallback_used'] for m in metas)}/6 fallback, ejected={ep['ejected']}",
+    )
+
+    # 3) three URLs: fast, slow and one always failing with 503 (breaker off: routing alone is under test)
+    fast, slow, broken = start_stub("fixed:30"), start_stub("fixed:300"), start_stub("fixed:10", error_rate=1.0)
+    configure([fast, slow, broken], circuit=False)
+    metas, errors, _ = fire(40, concurrency=4)
+    info = {e["url"]: e for e in llm.pool_info()["openai_compat"]}
+    check(
+        "pool: failing endpoint ejected",
+        info[broken]["ejected"] and len(errors) <= settings.llm_endpoint_eject_after + 4,
+        f"{len(errors)} calls failed before ejection",
+    )
+    check(
+        "pool: fast endpoint preferred",
+        info[fast]["requests"] > info[slow]["requests"],
+        f"fast={info[fast]['requests']} slow={info[slow]['requests']} broken={info[broken]['requests']}",
+    )
+
+    # 4) two URLs, one rate limiting every call: its fast 429s neither count as failures nor as fast answers
+    limited, slow = start_stub("fixed:5", error_rate=1.0, error_status=429), start_stub("fixed:150")
+    configure([limited, slow])
+    metas, errors, _ = fire(12, concurrency=2)
+    info = {e["url"]: e for e in llm.pool_info()["openai_compat"]}
+    check(
+        "pool: 429 is neutral",
+        info[limited]["ewma_ms"] is None and info[limited]["failures"] == 0 and not info[limited]["ejected"],
+        f"limited: requests={info[limited]['requests']} ewma={info[limited]['ewma_ms']}; "
+        f"slow: requests={info[slow]['requests']}",
+    )
+
+    # 5) two URLs at one slot each: calls that can't get a slot fail fast and don't trip the circuit breaker
+    configure([start_stub("fixed:400"), start_stub("fixed:400")], max_concurrency=1, wait_sec=0.1)
+    metas, errors, _ = fire(8, concurrency=8)
+    circuit = llm.circuit_info()[f"openai_compat/{PRIMARY}"]
+    check(
+        "pool: saturation is not a failure",
+        all(isinstance(e, llm.EndpointsBusy) for e in errors) and circuit["failure_rate"] == 0.0,
+        f"{len(metas)} ok, {len(errors)} busy, breaker failure_rate={circuit['failure_rate']}",
+    )
+
+    print_table(rows, ["check", "result", "detail"])
+    if any(r["result"] != "ok" for r in rows):
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
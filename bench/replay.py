@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from bench.common import percentile, print_table
+
+
+def load_entries(paths: list[str]) -> list[dict]:
+    """
+    Request-log lines (app.request_log) or the output of an earlier replay, in time order. Rotated files
+    (requests.jsonl.1, .2, ...) can be passed together.
+    """
+    entries: list[dict] = []
+    for path in paths:
+        for line in Path(path).read_text(encoding="utf-8").splitlines():
+            if line.strip():
+                entries.append(json.loads(line))
+    entries.sort(key=lambda e: e.get("ts", 0.0))
+    return entries
+
+
+def _pair_key(entries: list[dict]) -> list[tuple[str, int]]:
+    # the n-th occurrence of a question in one run pairs with its n-th occurrence in the other
+    seen: Counter = Counter()
+    keys = []
+    for e in entries:
+        keys.append((e["q_hash"], seen[e["q_hash"]]))
+        seen[e["q_hash"]] += 1
+    return keys
+
+
+def _jaccard(a: list[str], b: list[str]) -> float:
+    sa, sb = set(a or []), set(b or [])
+    return len(sa & sb) / len(sa | sb) if sa | sb else 1.0
+
+
+def diff(base: list[dict], new: list[dict], base_label: str, new_label: str, top: int) -> None:
+    """
+    Latency percentiles of both runs, then per question (paired): latency change and overlap of the
+    retrieved chunk-id sets.
+    """
+    base_ok = {k: e for k, e in zip(_pair_key(base), base) if e.get("status") == "ok"}
+    new_ok = {k: e for k, e in zip(_pair_key(new), new) if e.get("status") == "ok"}
+    rows = []
+    for label, entries in ((base_label, base), (new_label, new)):
+        lat = [e["total_ms"] for e in entries if e.get("status") == "ok"]
+        rows.append(
+            {
+                "run": label,
+                "requests": len(entries),
+                "errors": sum(1 for e in entries if e.get("status") != "ok"),
+                "p50_ms": percentile(lat, 50),
+                "p95_ms": percentile(lat, 95),
+                "p99_ms": percentile(lat, 99),
+            }
+        )
+    print_table(rows, ["run", "requests", "errors", "p50_ms", "p95_ms", "p99_ms"])
+
+    paired = [(base_ok[k], new_ok[k]) for k in base_ok if k in new_ok]
+    if not paired:
+        print("\nno requests in common")
+        return
+    deltas = [b["total_ms"] - a["total_ms"] for a, b in paired]
+    overlaps = [_jaccard(a.get("chunk_ids"), b.get("chunk_ids")) for a, b in paired]
+    print()
+    print_table(
+        [
+            {
+                "paired": len(paired),
+                "delta_p50_ms": percentile(deltas, 50),
+                "delta_p95_ms": percentile(deltas, 95),
+                "same_ids": sum(1 for a, b in paired if a.get("chunk_ids") == b.get("chunk_ids")) / len(paired),
+                "same_id_set": sum(1 for o in overlaps if o == 1.0) / len(paired),
+                "mean_jaccard": sum(overlaps) / len(overlaps),
+                "mode_changed": sum(1 for a, b in paired if a.get("retrieval_mode") != b.get("retrieval_mode")),
+            }
+        ],
+        ["paired", "delta_p50_ms", "delta_p95_ms", "same_ids", "same_id_set", "mean_jaccard", "mode_changed"],
+    )
+
+    changed = sorted(
+        ((o, a, b) for o, (a, b) in zip(overlaps, paired) if o < 1.0), key=lambda t: (t[0], -t[2]["total_ms"])
+    )
+    if changed and top > 0:
+        print(f"\nlargest retrieval changes ({len(changed)} questions differ)")
+        print_table(
+            [
+                {
+                    "question": (a.get("question") or a["q_hash"])[:60],
+                    "jaccard": o,
+                    f"{base_label}_ms": a["total_ms"],
+                    f"{new_label}_ms": b["total_ms"],
+                    f"{base_label}_mode": a.get("retrieval_mode"),
+                    f"{new_label}_mode": b.get("retrieval_mode"),
+                }
+                for o, a, b in changed[:top]
+            ],
+            ["question", "jaccard", f"{base_label}_ms", f"{new_label}_ms", f"{base_label}_mode", f"{new_label}_mode"],
+        )
+
+
+def replay(entries: list[dict], url: str, speed: float, max_in_flight: int, timeout: float) -> list[dict]:
+    """
+    Re-issue the logged requests against url. speed=1 keeps the original gaps between arrivals, 2 halves
+    them, 0 sends back-to-back (bounded by max_in_flight). Returns one entry per request in log format.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_in_flight)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    results: list[dict] = []
+    lock = threading.Lock()
+    in_flight = threading.Semaphore(max_in_flight)
+
+    def fire(src: dict, at: float) -> None:
+        body = {"question": src["question"], "k": src.get("k", 6), **(src.get("filters") or {})}
+        out = {"ts": at, "q_hash": src["q_hash"], "question": src["question"], "status": "error", "error": None}
+        t0 = time.perf_counter()
+        try:
+            if src.get("endpoint") == "/ask/stream":
+                result = None
+                with session.post(f"{url}/ask/stream", json=body, stream=True, timeout=timeout) as r:
+                    r.raise_for_status()
+                    for line in r.iter_lines():
+                        if line:
+                            e = json.loads(line)
+                            result = e if e.get("type") == "done" else result
+            else:
+                r = session.post(f"{url}/ask", json=body, timeout=timeout)
+                r.raise_for_status()
+                result = r.json()
+            meta = (result or {}).get("meta") or {}
+            out.update(
+                status="ok",
+                timings_ms=meta.get("timings_ms"),
+                retrieval_mode=(meta.get("retrieval") or {}).get("mode"),
+                chunk_ids=meta.get("chunk_ids") or [],
+                model_used=meta.get("model_used"),
+                cache_hit=meta.get("cache_hit"),
+            )
+        except Exception as e:
+            out["error"] = f"{type(e).__name__}: {e}"[:300]
+        finally:
+            out["total_ms"] = round((time.perf_counter() - t0) * 1000.0, 1)
+            in_flight.release()
+            with lock:
+                results.append(out)
+
+    pool = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="replay")
+    start = time.perf_counter()
+    ts0 = entries[0].get("ts", 0.0)
+    for src in entries:
+        if speed > 0:
+            delay = (src.get("ts", ts0) - ts0) / speed - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+        # unlike loadgen nothing is dropped: a saturated server delays the rest of the replay instead
+        in_flight.acquire()
+        pool.submit(fire, src, src.get("ts", ts0))
+    pool.shutdown(wait=True)
+    print(f"replayed {len(entries)} requests in {time.perf_counter() - start:.1f}s")
+    return sorted(results, key=lambda e: e["ts"])
+
+
+def main():
+    """
+    Replay a captured request log (REQUEST_LOG_ENABLED) against a running instance - normally one whose LLM is
+    bench.stub_llm, so only our own code is measured - and diff latency and retrieved chunk ids against the
+    log itself or an earlier replay (--baseline). --diff compares two saved runs without sending anything.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--log", nargs="+", default=[], help="request log file(s), rotated ones included")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--speed", type=float, default=1.0, help="timing scale: 1 = original, 2 = twice as fast, 0 = no gaps")
+    parser.add_argument("--max-in-flight", type=int, default=32)
+    parser.add_argument("--limit", type=int, default=0, help="replay only the first N requests")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--out", default=None, help="write this run's per-request results (JSONL) for later diffs")
+    parser.add_argument("--baseline", default=None, help="diff against this run instead of the log's own numbers")
+    parser.add_argument("--diff", nargs=2, metavar=("BASE", "NEW"), help="only compare two saved runs")
+    parser.add_argument("--top", type=int, default=10, help="questions with the largest retrieval change to list")
+    args = parser.parse_args()
+
+    if args.diff:
+        diff(load_entries([args.diff[0]]), load_entries([args.diff[1]]), "base", "new", args.top)
+        return
+    if not args.log:
+        parser.error("--log is required unless --diff is given")
+
+    logged = [e for e in load_entries(args.log) if e.get("status") == "ok"]
+    entries = [e for e in logged if e.get("question")]
+    if len(entries) < len(logged):
+        print(f"skipping {len(logged) - len(entries)} entries without question text (REQUEST_LOG_QUESTIONS=hash)")
+    if args.limit:
+        entries = entries[: args.limit]
+    if not entries:
+        raise RuntimeError("Nothing to replay")
+
+    results = replay(entries, args.url.rstrip("/"), args.speed, args.max_in_flight, args.timeout)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            for e in results:
+                f.write(json.dumps(e, ensure_ascii=False) + "\n")
+
+    base = load_entries([args.baseline]) if args.baseline else entries
+    diff(base, results, "baseline" if args.baseline else "log", "replay", args.top)
+
+
+if __name__ == "__main__":
+    main()
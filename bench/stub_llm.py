@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the LLM provider, so /ask can be load-tested without rate limits or cost.
+# Speaks the OpenAI-compatible /chat/completions and Ollama /api/chat protocols (plain and streaming).
+#
+#   python -m bench.stub_llm --port 8089 --latency lognormal:800,0.4 --error-rate 0.02
+#   LLM_PROVIDER=openai_compat LLM_BASE_URL=http://127.0.0.1:8089/v1 LLM_API_KEY=stub uvicorn app.api:app
+#   LLM_PROVIDER=ollama OLLAMA_BASE_URL=http://127.0.0.1:8089 uvicorn app.api:app
+
+_WORDS = (
+    "საინფორმაციო ბაზის მიხედვით აღნიშნული საკითხი რეგულირდება საგადასახადო კოდექსის შესაბამისი მუხლით "
+    "გადამხდელი ვალდებულია დეკლარაცია წარადგინოს დადგენილ ვადაში"
+).split()
+
+
+def parse_latency(spec: str):
+    """
+    fixed:MS | uniform:LO,HI | normal:MEAN,SD | lognormal:MEDIAN,SIGMA  ->  callable returning seconds.
+    """
+    kind, _, args = spec.partition(":")
+    vals = [float(v) for v in args.split(",") if v.strip()]
+    if kind == "fixed":
+        return lambda: vals[0] / 1000.0
+    if kind == "uniform":
+        return lambda: random.uniform(vals[0], vals[1]) / 1000.0
+    if kind == "normal":
+        return lambda: max(0.0, random.gauss(vals[0], vals[1])) / 1000.0
+    if kind == "lognormal":
+        mu = math.log(vals[0])
+        return lambda: random.lognormvariate(mu, vals[1]) / 1000.0
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+class StubConfig:
+    def __init__(self, args: argparse.Namespace):
+        self.latency = parse_latency(args.latency)
+        self.error_rate = args.error_rate
+        self.error_status = args.error_status
+        self.model_error_rates = dict(
+            (m, float(r)) for m, _, r in (spec.partition("=") for spec in args.model_error_rate)
+        )
+        self.tokens = args.tokens
+        self.lock = threading.Lock()
+        self.counts: dict[str, int] = {}
+
+    def count(self, key: str) -> None:
+        with self.lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def fails(self, model: str) -> bool:
+        return random.random() < self.model_error_rates.get(model, self.error_rate)
+
+    def answer_words(self) -> list[str]:
+        return [random.choice(_WORDS) for _ in range(self.tokens)]
+
+
+def make_handler(cfg: StubConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def _json(self, status: int, body: dict) -> None:
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self) -> None:
+            if self.path.rstrip("/") in ("", "/health", "/stats"):
+                with cfg.lock:
+                    self._json(200, {"status": "ok", "counts": dict(cfg.counts)})
+            else:
+                self._json(404, {"error": "not found"})
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._json(400, {"error": "invalid json"})
+                return
+
+            if self.path.endswith("/chat/completions"):
+                protocol = "openai"
+            elif self.path.endswith("/api/chat"):
+                protocol = "ollama"
+            else:
+                self._json(404, {"error": "not found"})
+                return
+
+            model = payload.get("model") or "stub"
+            # Ollama streams unless told otherwise, OpenAI-compatible APIs only on request
+            stream = bool(payload.get("stream", protocol == "ollama"))
+            delay = cfg.latency()
+            cfg.count(f"{protocol}:{model}")
+
+            if cfg.fails(model):
+                time.sleep(delay / 4)
+                cfg.count(f"error:{model}")
+                self._json(cfg.error_status, {"error": {"message": "stub overloaded", "type": "server_error"}})
+                return
+
+            words = cfg.answer_words()
+            if not stream:
+                time.sleep(delay)
+                content = " ".join(words)
+                if protocol == "openai":
+                    self._json(
+                        200,
+                        {
+                            "id": "stub",
+                            "object": "chat.completion",
+                            "model": model,
+                            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                            "usage": {"prompt_tokens": 0, "completion_tokens": len(words), "total_tokens": len(words)},
+                        },
+                    )
+                else:
+                    self._json(200, {"model": model, "message": {"role": "assistant", "content": content}, "done": True})
+                return
+
+            # Streaming: a third of the latency before the first token, the rest spread over the tokens
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream" if protocol == "openai" else "application/x-ndjson")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            time.sleep(delay / 3)
+            per_token = (delay * 2 / 3) / max(1, len(words))
+            for i, w in enumerate(words):
+                piece = w if i == 0 else " " + w
+                if protocol == "openai":
+                    chunk = {"id": "stub", "object": "chat.completion.chunk", "model": model,
+                             "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+                    self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+                else:
+                    chunk = {"model": model, "message": {"role": "assistant", "content": piece}, "done": False}
+                    self.wfile.write((json.dumps(chunk, ensure_ascii=False) + "\n").encode("utf-8"))
+                self.wfile.flush()
+                time.sleep(per_token)
+            if protocol == "openai":
+                self.wfile.write(b"data: [DONE]\n\n")
+            else:
+                self.wfile.write((json.dumps({"model": model, "done": True}) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", default="lognormal:800,0.4", help="fixed:MS | uniform:LO,HI | normal:MEAN,SD | lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument(
+        "--model-error-rate",
+        action="append",
+        default=[],
+        help="per-model override MODEL=RATE, e.g. to exercise LLM_FALLBACK_MODEL",
+    )
+    parser.add_argument("--tokens", type=int, default=120, help="words per answer")
+    args = parser.parse_args()
+
+    cfg = StubConfig(args)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(cfg))
+    server.daemon_threads = True
+    print(f"Stub LLM on http://{args.host}:{args.port} (OpenAI: /v1/chat/completions, Ollama: /api/chat)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(cfg.counts, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
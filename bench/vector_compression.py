@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.projection import PROJECTION_FILENAME, VECTORS_FILENAME, VectorStore, load_projection
+from bench.common import percentile, print_table
+from bench.hnsw_sweep import load_vectors
+
+
+def sizes_mb(path: Path) -> dict[str, float]:
+    files = [f for f in path.rglob("*") if f.is_file()]
+    hnsw = sum(f.stat().st_size for f in files if f.parent != path)  # per-segment directories
+    sqlite = (path / "chroma.sqlite3").stat().st_size
+    vectors = (path / VECTORS_FILENAME).stat().st_size if (path / VECTORS_FILENAME).exists() else 0
+    return {
+        "total_mb": sum(f.stat().st_size for f in files) / 1e6,
+        "sqlite_mb": sqlite / 1e6,
+        "hnsw_mb": hnsw / 1e6,
+        "vectors_mb": vectors / 1e6,
+    }
+
+
+def main():
+    """
+    Full-precision index vs its compressed copy (ingest.compress_index): size on disk, query latency and
+    recall@k against exact search on the full vectors, for reduced vectors alone and with the rescoring pass.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--full", default="./data/index")
+    parser.add_argument("--compressed", required=True)
+    parser.add_argument("--collection", default="infohub_docs")
+    parser.add_argument("--queries", type=int, default=200, help="stored vectors sampled as queries")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rescore-factor", type=int, default=2, help="candidates fetched = k * factor")
+    args = parser.parse_args()
+
+    import chromadb
+
+    full_dir, comp_dir = Path(args.full), Path(args.compressed)
+    projection = load_projection(comp_dir / PROJECTION_FILENAME)
+    if projection is None:
+        raise RuntimeError(f"No {PROJECTION_FILENAME} in {comp_dir} (build it with ingest.compress_index)")
+    vectors = VectorStore(comp_dir / VECTORS_FILENAME) if (comp_dir / VECTORS_FILENAME).exists() else None
+
+    ids, x = load_vectors(str(full_dir), args.collection, None)
+    rng = np.random.default_rng(0)
+    pick = rng.choice(len(ids), size=min(args.queries, len(ids)), replace=False)
+    k = args.k
+
+    # exact neighbours on the full vectors; the query vector itself is excluded everywhere
+    truth = []
+    for row, qi in zip(x[pick] @ x.T, pick):
+        truth.append({ids[i] for i in np.argsort(-row)[: k + 1] if i != qi})
+
+    full_col = chromadb.PersistentClient(path=str(full_dir)).get_collection(args.collection)
+    comp_col = chromadb.PersistentClient(path=str(comp_dir)).get_collection(args.collection)
+
+    def run(search) -> dict[str, float]:
+        search(pick[0])  # segment load
+        recalls, lat = [], []
+        for qi, exact in zip(pick, truth):
+            t0 = time.perf_counter()
+            found = [i for i in search(qi) if i != ids[qi]][:k]
+            lat.append((time.perf_counter() - t0) * 1000.0)
+            recalls.append(len(exact.intersection(found)) / max(1, len(exact)))
+        return {f"recall@{k}": float(np.mean(recalls)), "p50_ms": percentile(lat, 50), "p95_ms": percentile(lat, 95)}
+
+    def search_full(qi: int) -> list[str]:
+        return full_col.query(query_embeddings=[x[qi]], n_results=k + 1, include=["distances"])["ids"][0]
+
+    def search_reduced(qi: int, n: int = k + 1) -> list[str]:
+        q = projection.apply(x[qi : qi + 1])[0]
+        return comp_col.query(query_embeddings=[q], n_results=n, include=["distances"])["ids"][0]
+
+    def search_rescored(qi: int) -> list[str]:
+        cand = search_reduced(qi, n=(k + 1) * max(1, args.rescore_factor))
+        full = vectors.get_many(args.collection, cand)
+        score = {cid: float(v @ x[qi]) / max(float(np.linalg.norm(v)), 1e-12) for cid, v in full.items()}
+        return sorted(cand, key=lambda cid: -score.get(cid, -1.0))
+
+    full_size, comp_size = sizes_mb(full_dir), sizes_mb(comp_dir)
+    rows = [
+        {"index": f"full {x.shape[1]}d", **full_size, **run(search_full)},
+        {"index": f"pca {projection.dims}d", **comp_size, **run(search_reduced)},
+    ]
+    if vectors is not None:
+        rows.append({"index": f"pca {projection.dims}d + {vectors.dtype} rescore", **comp_size, **run(search_rescored)})
+
+    print(f"{len(ids)} vectors, {len(pick)} queries")
+    print_table(rows, ["index", "total_mb", "sqlite_mb", "hnsw_mb", "vectors_mb", f"recall@{k}", "p50_ms", "p95_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+import chromadb
+from tqdm import tqdm
+
+from app.lexsig import LEXSIG_FILENAME, LexSigStore
+
+# Chunk metadata that briefly carried the stem list before the sidecar replaced it; dropped when found
+_LEGACY_KEYS = ("lex_stems",)
+
+
+def main():
+    """
+    (Re)build the lexsig sidecar for collections indexed before it existed, and strip the legacy per-chunk
+    lex_stems metadata from indexes built while stems were stored in Chroma.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chroma-dir", default="./data/index")
+    parser.add_argument(
+        "--collection",
+        action="append",
+        default=[],
+        help="collection to process (repeatable); default: every collection in --chroma-dir",
+    )
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+
+    chroma_path = Path(args.chroma_dir)
+    client = chromadb.PersistentClient(path=str(chroma_path))
+    store = LexSigStore(chroma_path / LEXSIG_FILENAME)
+
+    names = args.collection or [c if isinstance(c, str) else c.name for c in client.list_collections()]
+    if not names:
+        raise RuntimeError(f"No collections found in: {chroma_path}")
+
+    for name in names:
+        col = client.get_collection(name=name)
+        total = col.count()
+        pbar = tqdm(total=total, desc=f"lexsig {name}", unit="chunk")
+
+        offset = 0
+        stripped = 0
+        while offset < total:
+            got = col.get(limit=args.batch, offset=offset, include=["documents", "metadatas"])
+            ids = got.get("ids") or []
+            if not ids:
+                break
+            store.put_many(name, ids, got.get("documents") or [""] * len(ids))
+            legacy = [
+                (cid, {key: None for key in _LEGACY_KEYS if key in (meta or {})})
+                for cid, meta in zip(ids, got.get("metadatas") or [])
+                if any(key in (meta or {}) for key in _LEGACY_KEYS)
+            ]
+            if legacy:
+                # a None value deletes the key
+                col.update(ids=[cid for cid, _ in legacy], metadatas=[patch for _, patch in legacy])
+                stripped += len(legacy)
+            offset += len(ids)
+            pbar.update(len(ids))
+
+        pbar.close()
+        removed = f", lex_stems removed from {stripped} chunks" if stripped else ""
+        print(f"{name}: {store.count(name)} signatures{removed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import re
+from typing import Callable, Iterator
+
 
 def chunk_text(text: str, max_chars: int = 1200, overlap: int = 200) -> list[str]:
     """
@@ -25,3 +28,145 @@ def chunk_text(text: str, max_chars: int = 1200, overlap: int = 200) -> list[str
         start = max(0, end - overlap)
 
     return chunks
+
+
+# --- structure-aware chunking ---
+# html_to_text keeps paragraphs/headings as separate lines, so lines are the structural blocks.
+
+# "მუხლი 5", "მუხლი 12¹.", "თავი II", "ნაწილი 3" ... start a new article/section
+_ARTICLE_RE = re.compile(r"^\s*(?:მუხლი|თავი|ნაწილი|კარი)\s+[0-9IVXLC]+", flags=re.IGNORECASE)
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?;:])\s+")
+_HEADING_MAX_CHARS = 100
+
+
+def token_length_fn(tokenizer) -> Callable[[str], int]:
+    """
+    Length in model tokens (e.g. SentenceTransformer(...).tokenizer), without special tokens.
+    """
+
+    def length(text: str) -> int:
+        return len(tokenizer.encode(text, add_special_tokens=False))
+
+    return length
+
+
+def _is_heading(line: str) -> bool:
+    if _ARTICLE_RE.match(line):
+        return True
+    # short line without sentence-ending punctuation, e.g. a section title
+    return len(line) <= _HEADING_MAX_CHARS and not line.rstrip().endswith((".", ";", ":", ",", "!", "?"))
+
+
+def _split_oversized(block: str, max_len: int, length_fn: Callable[[str], int], overlap_sentences: int) -> Iterator[str]:
+    """
+    A single paragraph longer than max_len: pack whole sentences; only here do pieces overlap
+    (the last `overlap_sentences` sentences are repeated), because the boundary is forced.
+    """
+    sentences = [s for s in _SENTENCE_SPLIT_RE.split(block) if s.strip()]
+
+    # A "sentence" that alone exceeds the limit is cut on whitespace (and an endless "word" by characters)
+    pieces: list[str] = []
+    for s in sentences:
+        s_len = length_fn(s)
+        if s_len <= max_len:
+            pieces.append(s)
+            continue
+        words, cur = [], []
+        for w in s.split():
+            w_len = length_fn(w)
+            if w_len <= max_len:
+                words.append(w)
+                continue
+            step = max(1, len(w) * max_len // w_len)
+            words.extend(w[i : i + step] for i in range(0, len(w), step))
+        for w in words:
+            if cur and length_fn(" ".join(cur + [w])) > max_len:
+                pieces.append(" ".join(cur))
+                cur = []
+            cur.append(w)
+        if cur:
+            pieces.append(" ".join(cur))
+
+    cur: list[str] = []
+    cur_len = 0
+    for p in pieces:
+        p_len = length_fn(p)
+        if cur and cur_len + p_len + 1 > max_len:
+            yield " ".join(cur)
+            carry = cur[-overlap_sentences:] if overlap_sentences else []
+            carry_len = sum(length_fn(c) + 1 for c in carry)
+            # never let the carried overlap alone push the next piece over the limit
+            if carry_len + p_len + 1 > max_len:
+                carry, carry_len = [], 0
+            cur, cur_len = list(carry), carry_len
+        cur.append(p)
+        cur_len += p_len + 1
+    if cur:
+        yield " ".join(cur)
+
+
+def iter_structured_chunks(
+    text: str,
+    max_len: int = 1200,
+    length_fn: Callable[[str], int] = len,
+    overlap_sentences: int = 1,
+) -> Iterator[str]:
+    """
+    Yield chunks that follow the document structure instead of fixed windows:
+    - articles ("მუხლი N") and headings start a new chunk once the current one is at least half full,
+      and a heading is never left dangling at the end of a chunk;
+    - paragraphs are packed greedily up to max_len (measured with length_fn, e.g. tokenizer tokens);
+    - a paragraph longer than max_len is split on sentences, the only place where chunks overlap.
+    """
+    lines = [ln.strip() for ln in (text or "").splitlines()]
+    blocks = [ln for ln in lines if ln]
+    if not blocks:
+        return
+
+    cur: list[str] = []
+    cur_len = 0
+    pending_headings: list[str] = []
+
+    def flush() -> Iterator[str]:
+        nonlocal cur, cur_len
+        if cur:
+            yield "\n".join(cur)
+        cur, cur_len = [], 0
+
+    for block in blocks:
+        b_len = length_fn(block)
+
+        if _is_heading(block) and b_len <= max_len // 4:
+            # new article: close the current chunk if it already carries enough content
+            if _ARTICLE_RE.match(block) and cur_len >= max_len // 2:
+                yield from flush()
+            pending_headings.append(block)
+            continue
+
+        # attach headings to the paragraph that follows them
+        if pending_headings:
+            block = "\n".join(pending_headings + [block])
+            b_len = length_fn(block)
+            pending_headings = []
+
+        if b_len > max_len:
+            yield from flush()
+            pieces = list(_split_oversized(block, max_len, length_fn, overlap_sentences))
+            yield from pieces[:-1]
+            # the last piece stays open so following short paragraphs can still join it
+            cur, cur_len = [pieces[-1]], length_fn(pieces[-1]) + 1
+            continue
+
+        if cur and cur_len + b_len + 1 > max_len:
+            yield from flush()
+        cur.append(block)
+        cur_len += b_len + 1
+
+    if pending_headings:
+        tail = "\n".join(pending_headings)
+        if cur and cur_len + length_fn(tail) + 1 <= max_len:
+            cur.append(tail)
+        else:
+            yield from flush()
+            cur = [tail]
+    yield from flush()
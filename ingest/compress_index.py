@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import argparse
+import shutil
+from pathlib import Path
+
+import chromadb
+import numpy as np
+from tqdm import tqdm
+
+from app.projection import PROJECTION_FILENAME, VECTORS_FILENAME, VectorStore, fit_pca
+
+
+def main():
+    """
+    Write a compressed copy of an index: PCA-reduced embeddings in Chroma (smaller HNSW files and sqlite),
+    the fitted projection for queries, and optionally the full-dimension vectors as int8/float16 for rescoring.
+    Documents, metadata and the other sidecars are copied unchanged.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--src", default="./data/index")
+    parser.add_argument("--dst", required=True)
+    parser.add_argument("--dims", type=int, default=256, help="reduced embedding size (e5-large: 1024)")
+    parser.add_argument(
+        "--vectors",
+        choices=["int8", "float16", "none"],
+        default="int8",
+        help="full-dimension sidecar for rescoring the top candidates; none = reduced vectors only",
+    )
+    parser.add_argument("--sample", type=int, default=50000, help="vectors used to fit the PCA")
+    parser.add_argument(
+        "--collection",
+        action="append",
+        default=[],
+        help="collection to copy (repeatable); default: every collection in --src",
+    )
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--overwrite", action="store_true")
+    args = parser.parse_args()
+
+    src = Path(args.src)
+    dst = Path(args.dst)
+    if dst.exists() and any(dst.iterdir()):
+        if not args.overwrite:
+            raise RuntimeError(f"{dst} is not empty (use --overwrite)")
+        shutil.rmtree(dst)
+    dst.mkdir(parents=True, exist_ok=True)
+
+    src_client = chromadb.PersistentClient(path=str(src))
+    names = args.collection or [c if isinstance(c, str) else c.name for c in src_client.list_collections()]
+    if not names:
+        raise RuntimeError(f"No collections found in: {src}")
+    cols = {name: src_client.get_collection(name=name) for name in names}
+    total = sum(c.count() for c in cols.values())
+
+    # 1) fit one PCA over all collections, so shards stay in one comparable space
+    rng = np.random.default_rng(0)
+    keep_p = min(1.0, args.sample / max(1, total))
+    sample: list[np.ndarray] = []
+    for name, col in cols.items():
+        for offset in tqdm(range(0, col.count(), args.batch), desc=f"sample {name}", leave=False):
+            got = col.get(limit=args.batch, offset=offset, include=["embeddings"])
+            emb = np.asarray(got["embeddings"], dtype=np.float32)
+            sample.append(emb[rng.random(len(emb)) < keep_p])
+    projection, kept = fit_pca(np.vstack(sample), args.dims, sample=args.sample)
+    projection.save(dst / PROJECTION_FILENAME)
+    print(f"PCA {projection.input_dims} -> {projection.dims} dims keeps {kept:.1%} of the variance")
+
+    # 2) copy every chunk with its reduced embedding (+ the full one into the sidecar)
+    dst_client = chromadb.PersistentClient(path=str(dst))
+    vectors = VectorStore(dst / VECTORS_FILENAME, dtype=args.vectors) if args.vectors != "none" else None
+    for name, col in cols.items():
+        meta = {**(col.metadata or {"hnsw:space": "cosine"}), "projection_dims": projection.dims}
+        out = dst_client.create_collection(name=name, metadata=meta)
+        n = col.count()
+        pbar = tqdm(total=n, desc=f"compress {name}", unit="chunk")
+        for offset in range(0, n, args.batch):
+            got = col.get(limit=args.batch, offset=offset, include=["embeddings", "documents", "metadatas"])
+            ids = got["ids"]
+            if not ids:
+                break
+            emb = np.asarray(got["embeddings"], dtype=np.float32)
+            out.add(
+                ids=ids,
+                documents=got["documents"],
+                metadatas=got["metadatas"],
+                embeddings=projection.apply(emb),
+            )
+            if vectors is not None:
+                vectors.put_many(name, ids, emb)
+            pbar.update(len(ids))
+        pbar.close()
+
+    # 3) sidecars and version travel with the index
+    for f in src.iterdir():
+        if f.is_file() and f.name != "chroma.sqlite3" and not (dst / f.name).exists():
+            shutil.copy2(f, dst / f.name)
+
+    def size_mb(path: Path) -> float:
+        return sum(f.stat().st_size for f in path.rglob("*") if f.is_file()) / 1e6
+
+    print(f"{total} chunks: {size_mb(src):.1f} MB -> {size_mb(dst):.1f} MB ({dst})")
+
+
+if __name__ == "__main__":
+    main()
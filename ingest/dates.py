@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import re
+from datetime import datetime, timezone
+
+
+_DMY_RE = re.compile(r"^\s*([0-9]{1,2})[./-]([0-9]{1,2})[./-]([0-9]{4})")
+
+
+def publish_date_to_epoch(raw: str | None) -> int | None:
+    """
+    Normalizes InfoHub date strings to epoch seconds (UTC), e.g.:
+      - "2026-02-10T00:00:00"
+      - "2026-02-10T08:15:00.123Z"
+      - "2026-02-10"
+      - "10/02/2026"
+    Returns None if the value can't be parsed.
+    """
+    if not raw:
+        return None
+
+    s = str(raw).strip()
+    if not s:
+        return None
+
+    dt: datetime | None = None
+    try:
+        dt = datetime.fromisoformat(s.replace("Z", "+00:00"))
+    except ValueError:
+        m = _DMY_RE.match(s)
+        if m:
+            day, month, year = (int(g) for g in m.groups())
+            try:
+                dt = datetime(year, month, day)
+            except ValueError:
+                dt = None
+
+    if dt is None:
+        return None
+
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+
+    return int(dt.timestamp())
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import re
+import sqlite3
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+# MinHash + LSH near-duplicate detection for chunks.
+# Signatures are persisted next to the index so later ingest runs dedup against everything already stored.
+DEDUP_FILENAME = "dedup.sqlite3"
+
+_PRIME = np.uint64(4294967311)  # smallest prime > 2**32
+_WS_RE = re.compile(r"\s+")
+
+
+def _shingles(text: str, size: int) -> np.ndarray:
+    t = _WS_RE.sub(" ", (text or "").lower()).strip()
+    if len(t) <= size:
+        grams = {t} if t else set()
+    else:
+        grams = {t[i : i + size] for i in range(len(t) - size + 1)}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+@dataclass
+class DedupStats:
+    checked: int = 0
+    collapsed: int = 0
+    chars_saved: int = 0
+
+    def report(self, embedding_dim: int | None = None) -> str:
+        pct = (100.0 * self.collapsed / self.checked) if self.checked else 0.0
+        msg = (
+            f"Near-duplicate chunks collapsed: {self.collapsed}/{self.checked} ({pct:.1f}%), "
+            f"text saved: {self.chars_saved} chars"
+        )
+        if embedding_dim:
+            msg += f", vectors saved: ~{self.collapsed * embedding_dim * 4 / 1e6:.1f} MB (float32)"
+        return msg
+
+
+class NearDupIndex:
+    """
+    MinHash over character 5-shingles with LSH banding.
+    A chunk is a near-duplicate when its estimated Jaccard similarity to a stored chunk >= threshold.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        num_perm: int = 64,
+        bands: int = 8,
+        threshold: float = 0.85,
+        shingle: int = 5,
+        seed: int = 1,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle = shingle
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2**31, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 2**31, size=num_perm, dtype=np.uint64)
+
+        self._conn = sqlite3.connect(Path(path))
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS minhash ("
+            " collection TEXT NOT NULL, chunk_id TEXT NOT NULL, unique_key TEXT, sig BLOB NOT NULL,"
+            " PRIMARY KEY (collection, chunk_id))"
+        )
+
+        self._sigs: dict[tuple[str, str], np.ndarray] = {}
+        self._buckets: dict[tuple[str, int, bytes], list[str]] = defaultdict(list)
+        for collection, chunk_id, blob in self._conn.execute("SELECT collection, chunk_id, sig FROM minhash"):
+            self._remember(collection, chunk_id, np.frombuffer(blob, dtype=np.uint32))
+
+        self.stats = DedupStats()
+
+    def signature(self, text: str) -> np.ndarray:
+        sh = _shingles(text, self.shingle)
+        if sh.size == 0:
+            return np.zeros(self.num_perm, dtype=np.uint32)
+        # (a * x + b) mod p for every permutation/shingle pair, then min over shingles
+        hashed = (np.outer(self._a, sh) + self._b[:, None]) % _PRIME
+        return hashed.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, sig: np.ndarray) -> list[bytes]:
+        return [sig[i * self.rows : (i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def _remember(self, collection: str, chunk_id: str, sig: np.ndarray) -> None:
+        self._sigs[(collection, chunk_id)] = sig
+        for band, key in enumerate(self._band_keys(sig)):
+            self._buckets[(collection, band, key)].append(chunk_id)
+
+    def find(self, collection: str, chunk_id: str, sig: np.ndarray) -> str | None:
+        """
+        Stored chunk this one near-duplicates (never itself, so re-ingesting a document is a no-op).
+        """
+        best_id, best_sim = None, 0.0
+        seen: set[str] = set()
+        for band, key in enumerate(self._band_keys(sig)):
+            for other in self._buckets.get((collection, band, key), []):
+                if other == chunk_id or other in seen:
+                    continue
+                seen.add(other)
+                sim = float(np.mean(self._sigs[(collection, other)] == sig))
+                if sim > best_sim:
+                    best_id, best_sim = other, sim
+        return best_id if best_sim >= self.threshold else None
+
+    def add(self, collection: str, chunk_id: str, unique_key: str, sig: np.ndarray) -> None:
+        if (collection, chunk_id) not in self._sigs:
+            self._remember(collection, chunk_id, sig)
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO minhash (collection, chunk_id, unique_key, sig) VALUES (?, ?, ?, ?)",
+                (collection, chunk_id, unique_key, sig.tobytes()),
+            )
+
+    def remove(self, collection: str, chunk_id: str) -> None:
+        sig = self._sigs.pop((collection, chunk_id), None)
+        if sig is not None:
+            for band, key in enumerate(self._band_keys(sig)):
+                bucket = self._buckets.get((collection, band, key))
+                if bucket and chunk_id in bucket:
+                    bucket.remove(chunk_id)
+        with self._conn:
+            self._conn.execute("DELETE FROM minhash WHERE collection = ? AND chunk_id = ?", (collection, chunk_id))
+
+
+def add_duplicate_refs(collection, refs: dict[str, set[str]]) -> None:
+    """
+    Record on each canonical chunk the other documents whose near-identical chunk was collapsed into it.
+    Stored as Chroma metadata: dup_keys (space-joined uniqueKeys) and dup_count.
+    Note: collapsed chunks don't carry their own doc_number, so docno lookups only see the canonical copy.
+    """
+    if not refs:
+        return
+    ids = list(refs)
+    got = collection.get(ids=ids, include=["metadatas"])
+    new_ids: list[str] = []
+    new_metas: list[dict] = []
+    for cid, meta in zip(got.get("ids") or [], got.get("metadatas") or []):
+        meta = dict(meta or {})
+        keys = set((meta.get("dup_keys") or "").split()) | refs.get(cid, set())
+        keys.discard(meta.get("uniqueKey"))
+        if " ".join(sorted(keys)) == (meta.get("dup_keys") or ""):
+            continue
+        meta["dup_keys"] = " ".join(sorted(keys))
+        meta["dup_count"] = len(keys)
+        new_ids.append(cid)
+        new_metas.append(meta)
+    if new_ids:
+        collection.update(ids=new_ids, metadatas=new_metas)
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import json
+import zipfile
+from pathlib import Path
+from typing import Any
+
+import chromadb
+import numpy as np
+from tqdm import tqdm
+
+from app.projection import PROJECTION_FILENAME, load_projection
+from app.snapshots import DELTA_FORMAT, VERSION_FILENAME, sha256_file, write_local_version
+
+
+def _iter_collection(col, batch: int = 500, include: list[str] | None = None):
+    total = col.count()
+    offset = 0
+    while offset < total:
+        got = col.get(limit=batch, offset=offset, include=include or ["documents", "metadatas", "embeddings"])
+        ids = got.get("ids") or []
+        if not ids:
+            break
+        yield got
+        offset += len(ids)
+
+
+def _fingerprint(doc: str | None, meta: dict[str, Any] | None, emb) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    h.update((doc or "").encode("utf-8"))
+    h.update(json.dumps(meta or {}, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    h.update(np.asarray(emb, dtype=np.float32).tobytes())
+    return h.digest()
+
+
+def _fingerprints(col) -> dict[str, bytes]:
+    out: dict[str, bytes] = {}
+    for got in tqdm(_iter_collection(col), desc=f"Fingerprint {col.name}", unit="batch"):
+        for cid, doc, meta, emb in zip(got["ids"], got["documents"], got["metadatas"], got["embeddings"]):
+            out[cid] = _fingerprint(doc, meta, emb)
+    return out
+
+
+def _collection_names(client) -> list[str]:
+    return [c if isinstance(c, str) else c.name for c in client.list_collections()]
+
+
+def _update_manifest(manifest_path: Path, *, full: dict | None = None, delta: dict | None = None) -> None:
+    manifest: dict[str, Any] = {}
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+
+    if full:
+        manifest["full"] = full
+        manifest["latest"] = full["version"]
+    if delta:
+        deltas = [d for d in manifest.get("deltas") or [] if (d.get("from"), d.get("to")) != (delta["from"], delta["to"])]
+        manifest["deltas"] = deltas + [delta]
+        manifest["latest"] = delta["to"]
+
+    manifest_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def cmd_full(args) -> None:
+    chroma_dir = Path(args.chroma_dir)
+    if not (chroma_dir / "chroma.sqlite3").exists():
+        raise RuntimeError(f"No chroma.sqlite3 in: {chroma_dir}")
+
+    write_local_version(chroma_dir, args.version)
+
+    out = Path(args.out)
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as z:
+        for p in sorted(chroma_dir.rglob("*")):
+            if p.is_file():
+                z.write(p, arcname=str(Path("index") / p.relative_to(chroma_dir)))
+
+    print(f"Full snapshot {args.version}: {out} ({out.stat().st_size} bytes)")
+    if args.manifest:
+        _update_manifest(
+            Path(args.manifest),
+            full={"version": args.version, "url": args.url or out.name, "sha256": sha256_file(out)},
+        )
+
+
+def cmd_delta(args) -> None:
+    old_client = chromadb.PersistentClient(path=args.old_dir)
+    new_client = chromadb.PersistentClient(path=args.new_dir)
+
+    old_names = set(_collection_names(old_client))
+    new_names = _collection_names(new_client)
+
+    header: dict[str, Any] = {"format": DELTA_FORMAT, "from": args.from_version, "to": args.to_version, "collections": {}}
+    # a compressed index stores PCA-reduced embeddings: record the projection so they are not projected twice
+    projection_path = Path(args.new_dir) / PROJECTION_FILENAME
+    projection = load_projection(projection_path)
+    header["projection"] = (
+        {"dims": projection.dims, "sha256": sha256_file(projection_path)} if projection is not None else None
+    )
+    out = Path(args.out)
+
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as z:
+        for name in new_names:
+            new_col = new_client.get_collection(name=name)
+            old_fp = _fingerprints(old_client.get_collection(name=name)) if name in old_names else {}
+
+            rows: list[str] = []
+            embeddings: list[np.ndarray] = []
+            seen: set[str] = set()
+            for got in tqdm(_iter_collection(new_col), desc=f"Diff {name}", unit="batch"):
+                for cid, doc, meta, emb in zip(got["ids"], got["documents"], got["metadatas"], got["embeddings"]):
+                    seen.add(cid)
+                    if old_fp.get(cid) == _fingerprint(doc, meta, emb):
+                        continue
+                    rows.append(json.dumps({"id": cid, "document": doc, "metadata": meta}, ensure_ascii=False))
+                    embeddings.append(np.asarray(emb, dtype=np.float32))
+
+            deleted = sorted(set(old_fp) - seen)
+            header["collections"][name] = {
+                "metadata": new_col.metadata,
+                "dims": int(embeddings[0].shape[0]) if embeddings else None,
+                "upserts": len(rows),
+                "deleted": deleted,
+            }
+            print(f"{name}: {len(rows)} added/updated, {len(deleted)} deleted")
+
+            if rows:
+                z.writestr(f"{name}.jsonl", "\n".join(rows) + "\n")
+                buf = io.BytesIO()
+                np.save(buf, np.vstack(embeddings))
+                z.writestr(f"{name}.npy", buf.getvalue())
+
+        # Collections dropped entirely in the new index
+        for name in sorted(old_names - set(new_names)):
+            ids = [cid for got in _iter_collection(old_client.get_collection(name=name), include=[]) for cid in got["ids"]]
+            header["collections"][name] = {"metadata": None, "upserts": 0, "deleted": ids}
+
+        z.writestr("delta.json", json.dumps(header, ensure_ascii=False))
+
+    # The new directory now *is* to_version; stamp it so a later full export/delta starts from it
+    write_local_version(args.new_dir, args.to_version)
+
+    print(f"Delta {args.from_version} -> {args.to_version}: {out} ({out.stat().st_size} bytes)")
+    if args.manifest:
+        _update_manifest(
+            Path(args.manifest),
+            delta={
+                "from": args.from_version,
+                "to": args.to_version,
+                "url": args.url or out.name,
+                "sha256": sha256_file(out),
+            },
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=f"Export versioned index snapshots ({VERSION_FILENAME} + manifest)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_full = sub.add_parser("full", help="zip the whole index and stamp its version")
+    p_full.add_argument("--chroma-dir", default="./data/index")
+    p_full.add_argument("--version", required=True)
+    p_full.add_argument("--out", required=True)
+    p_full.add_argument("--manifest", default="", help="manifest.json to create/update")
+    p_full.add_argument("--url", default="", help="public download URL recorded in the manifest")
+    p_full.set_defaults(func=cmd_full)
+
+    p_delta = sub.add_parser("delta", help="diff two index directories into a delta pack")
+    p_delta.add_argument("--old-dir", required=True)
+    p_delta.add_argument("--new-dir", required=True)
+    p_delta.add_argument("--from-version", required=True)
+    p_delta.add_argument("--to-version", required=True)
+    p_delta.add_argument("--out", required=True)
+    p_delta.add_argument("--manifest", default="", help="manifest.json to create/update")
+    p_delta.add_argument("--url", default="", help="public download URL recorded in the manifest")
+    p_delta.set_defaults(func=cmd_delta)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
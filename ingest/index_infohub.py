@@ -1,112 +1,157 @@
 from __future__ import annotations
 
 import argparse
-import json
+from collections import defaultdict
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 import chromadb
 from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 
+from app.embeddings import (
+    EMBEDDING_MODEL_KEY,
+    check_model,
+    collection_base,
+    collection_model,
+    make_passage,
+    tag_collection,
+)
+from app.hnsw import collection_metadata
+from app.lexsig import LEXSIG_FILENAME, LexSigStore
+from app.retrieval import canonical_doc_url
+from app.settings import settings
+from app.shards import parse_shard_list, shard_collection_name
 from ingest.infohub_client import InfoHubClient
 from ingest.html_to_text import html_to_text
-from ingest.chunking import chunk_text
-
-
-def canonical_doc_url(unique_key: str) -> str:
-    return f"https://infohub.rs.ge/ka/workspace/document/{unique_key}?openFromSearch=true"
-
-
-def make_passage(text: str, model_name: str) -> str:
-    # e5-style models work best with prefixes
-    if "e5" in model_name.lower():
-        return "passage: " + text
-    return text
-
-
-def make_query(text: str, model_name: str) -> str:
-    if "e5" in model_name.lower():
-        return "query: " + text
-    return text
-
-
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--species", default="LegislativeNews")
-    parser.add_argument("--take", type=int, default=99)
-    parser.add_argument("--max-docs", type=int, default=500, help="limit for MVP; set 0 for no limit")
-    parser.add_argument("--delay", type=float, default=0.2)
-
-    parser.add_argument("--api-base", default="https://infohubapi.rs.ge/api")
-    parser.add_argument("--lang", default="ka")
-    parser.add_argument("--cookie", default="")
-
-    parser.add_argument("--chroma-dir", default="./data/index")
-    parser.add_argument("--collection", default="infohub_docs")
-    parser.add_argument("--embed-model", default="intfloat/multilingual-e5-large")
-
-    parser.add_argument("--raw-dir", default="./data/raw")
-    parser.add_argument("--text-dir", default="./data/text")
-    args = parser.parse_args()
-
-    max_docs = None if args.max_docs == 0 else args.max_docs
-
-    raw_dir = Path(args.raw_dir) / args.species
-    text_dir = Path(args.text_dir) / args.species
-    raw_dir.mkdir(parents=True, exist_ok=True)
-    text_dir.mkdir(parents=True, exist_ok=True)
-
-    client = InfoHubClient(
-        base_url=args.api_base,
-        language_code=args.lang,
-        cookie=args.cookie.strip() or None,
-        delay_sec=args.delay,
-    )
-
-    # Chroma
-    chroma_path = Path(args.chroma_dir)
-    chroma_path.mkdir(parents=True, exist_ok=True)
-    chroma = chromadb.PersistentClient(path=str(chroma_path))
-    collection = chroma.get_or_create_collection(
-        name=args.collection,
-        metadata={"hnsw:space": "cosine"},
-    )
-
-    # Embeddings
-    model = SentenceTransformer(args.embed_model)
-
+from ingest.chunking import chunk_text, iter_structured_chunks, token_length_fn
+from ingest.dates import publish_date_to_epoch
+from ingest.dedup import DEDUP_FILENAME, NearDupIndex, add_duplicate_refs
+from ingest.raw_store import RawStore
+
+
+def make_splitter(kind: str, model: SentenceTransformer, max_tokens: int) -> Callable[[str], list[str]]:
+    if kind == "fixed":
+        return lambda text: chunk_text(text, max_chars=1200, overlap=200)
+
+    # Measure chunks in the embedding model's own tokens so nothing is silently truncated (e5: 512 max)
+    tokenizer = getattr(model, "tokenizer", None)
+    if tokenizer is None:
+        return lambda text: list(iter_structured_chunks(text, max_len=1200))
+    length = token_length_fn(tokenizer)
+    return lambda text: list(iter_structured_chunks(text, max_len=max_tokens, length_fn=length))
+
+
+def drop_stale_chunks(
+    collection, lexsig: LexSigStore, dedup: NearDupIndex | None, unique_key: str, new_ids: list[str]
+) -> dict[str, set[str]]:
+    """
+    Before a document is (re)written: delete its stored chunks that the new chunking no longer produces
+    (another chunker, amended text) and forget all of its dedup signatures, which are re-added for the chunks
+    kept. Returns the dup_keys recorded on the chunks that stay, since the upsert replaces their metadata.
+    """
+    got = collection.get(where={"uniqueKey": unique_key}, include=["metadatas"])
+    existing = got.get("ids") or []
+    if not existing:
+        return {}
+    keep = set(new_ids)
+    stale = [cid for cid in existing if cid not in keep]
+    if stale:
+        collection.delete(ids=stale)
+        lexsig.delete_many(collection.name, stale)
+    if dedup is not None:
+        for cid in existing:
+            dedup.remove(collection.name, cid)
+    return {
+        cid: set((meta or {}).get("dup_keys", "").split())
+        for cid, meta in zip(existing, got.get("metadatas") or [])
+        if cid in keep and (meta or {}).get("dup_keys")
+    }
+
+
+def ingest_species(
+    *,
+    species: str,
+    client: InfoHubClient,
+    collection,
+    lexsig: LexSigStore,
+    dedup: NearDupIndex | None,
+    model: SentenceTransformer,
+    embed_model: str,
+    split: Callable[[str], list[str]],
+    take: int,
+    max_docs: int | None,
+    store: RawStore,
+    incremental: bool = False,
+) -> int:
+    """
+    incremental: page only until the listing reaches documents indexed by an earlier run
+    (per-species watermark in the raw store), and skip those documents instead of re-embedding them.
+    """
     processed = 0
     skip = 0
-
-    pbar = tqdm(total=max_docs or 0, desc=f"Ingest {args.species}", unit="doc")
-    pbar_total_unknown = max_docs is None
-
-    while True:
-        page = client.list_documents(species=args.species, skip=skip, take=args.take)
+    truncated = False
+    failed = 0
+
+    mark = store.get_watermark(species) if incremental else {}
+    mark_ts = mark.get("publishDate_ts")
+    newest_ts, newest_raw = mark_ts, mark.get("publishDate")
+    validators: dict[str, str] = {}
+
+    pbar = tqdm(total=max_docs or 0, desc=f"Ingest {species}", unit="doc")
+
+    while not truncated:
+        if incremental and skip == 0:
+            # first page unchanged since the last complete run -> nothing new at all
+            page, validators = client.list_documents_if_changed(
+                species=species, skip=0, take=take, etag=mark.get("etag"), last_modified=mark.get("last_modified")
+            )
+            if page is None:
+                break
+        else:
+            page = client.list_documents(species=species, skip=skip, take=take)
         items: list[dict[str, Any]] = page.get("data") or []
 
         if not items:
             break
 
+        # Fetch missing details for this page concurrently (rate-limited in the client), cache them in the store
+        wanted = [
+            it["uniqueKey"]
+            for it in items
+            if it.get("uniqueKey") and not (incremental and store.is_seen(species, it["uniqueKey"]))
+        ]
+        if max_docs is not None:
+            wanted = wanted[: max(0, max_docs - processed)]
+        fetched = client.get_details_many([k for k in wanted if not store.has_details(k)])
+        for key, result in fetched.items():
+            if not isinstance(result, Exception):
+                store.put_details(species, key, result)
+
+        page_has_new = False
         for item in items:
             if max_docs is not None and processed >= max_docs:
-                pbar.close()
-                return
+                truncated = True
+                break
 
             unique_key = item.get("uniqueKey")
             if not unique_key:
                 continue
 
-            raw_path = raw_dir / f"{unique_key}.json"
-            text_path = text_dir / f"{unique_key}.txt"
-
-            # Fetch details (cache raw JSON)
-            if raw_path.exists():
-                details = json.loads(raw_path.read_text(encoding="utf-8"))
-            else:
-                details = client.get_details_by_key(unique_key)
-                raw_path.write_text(json.dumps(details, ensure_ascii=False, indent=2), encoding="utf-8")
+            item_ts = publish_date_to_epoch(item.get("publishDate"))
+            if item_ts is not None and (newest_ts is None or item_ts > newest_ts):
+                newest_ts, newest_raw = item_ts, item.get("publishDate")
+            if incremental:
+                if store.is_seen(species, unique_key):
+                    continue
+                page_has_new = True
+
+            details = store.get_details(unique_key)
+            if details is None:
+                # failed even after retries: leave it unseen so the next run tries again
+                tqdm.write(f"Skipping {unique_key}: {fetched.get(unique_key)}")
+                failed += 1
+                continue
 
             title = details.get("name") or item.get("name") or f"InfoHub {unique_key}"
             url = canonical_doc_url(unique_key)
@@ -114,26 +159,83 @@ def main():
             description_html = details.get("description") or ""
             text = html_to_text(description_html)
 
-            if text:
-                text_path.write_text(text, encoding="utf-8")
+            if not text:
+                # nothing to index any more: whatever an earlier run stored is stale
+                drop_stale_chunks(collection, lexsig, dedup, unique_key, [])
+            else:
+                store.put_text(species, unique_key, text)
+
+                chunks = split(text)
+                ids = [f"{unique_key}:{i}" for i in range(len(chunks))]
+                chunk_indexes = list(range(len(chunks)))
+                prior_refs = drop_stale_chunks(collection, lexsig, dedup, unique_key, ids)
+
+                publish_date = details.get("publishDate") or details.get("receiptDate")
+                publish_ts = publish_date_to_epoch(publish_date)
+
+                # Collapse near-duplicates (reposted boilerplate, amended text) into one stored chunk: the copy
+                # from the newest document, so the canonical text is the current one
+                refs: dict[str, set[str]] = defaultdict(set, prior_refs)
+                if dedup is not None and chunks:
+                    kept = []
+                    pending: set[str] = set()  # this document's chunks kept so far, not stored yet
+                    for i, (cid, chunk) in enumerate(zip(ids, chunks)):
+                        sig = dedup.signature(chunk)
+                        dedup.stats.checked += 1
+                        canonical = dedup.find(collection.name, cid, sig)
+                        if canonical is None:
+                            dedup.add(collection.name, cid, unique_key, sig)
+                            pending.add(cid)
+                            kept.append(i)
+                            continue
+                        keep = False
+                        if canonical not in pending:
+                            got = collection.get(ids=[canonical], include=["metadatas"])
+                            old = (got.get("metadatas") or [None])[0] or {}
+                            old_ts = old.get("publishDate_ts")
+                            if old.get("uniqueKey") == unique_key:
+                                pass  # repeated within this document as stored by an earlier run
+                            elif publish_ts is not None and (old_ts is None or publish_ts > old_ts):
+                                # this document is newer: its chunk replaces the stored one and inherits its refs
+                                refs[cid] |= {old.get("uniqueKey"), *(old.get("dup_keys") or "").split()} - {None}
+                                refs.pop(canonical, None)
+                                keep = True
+                            else:
+                                refs[canonical].add(unique_key)
+                        # otherwise a repeat within this document: the first copy is the one stored
+                        dedup.stats.collapsed += 1
+                        dedup.stats.chars_saved += len(chunk)
+                        # the newer copy replaces the stored one; otherwise a rerun may find an older stored copy
+                        # of this chunk: drop it
+                        drop = canonical if keep else cid
+                        dedup.remove(collection.name, drop)
+                        collection.delete(ids=[drop])
+                        lexsig.delete_many(collection.name, [drop])
+                        if keep:
+                            dedup.add(collection.name, cid, unique_key, sig)
+                            pending.add(cid)
+                            kept.append(i)
+                    ids = [ids[i] for i in kept]
+                    chunks = [chunks[i] for i in kept]
+                    chunk_indexes = [chunk_indexes[i] for i in kept]
 
-                chunks = chunk_text(text, max_chars=1200, overlap=200)
                 if chunks:
-                    ids = [f"{unique_key}:{i}" for i in range(len(chunks))]
                     docs = chunks
                     metadatas = [
                         {
                             "uniqueKey": unique_key,
                             "title": title,
                             "url": url,
-                            "species": args.species,
+                            "species": species,
                             "chunk_index": i,
-                            "publishDate": details.get("publishDate") or details.get("receiptDate"),
+                            "publishDate": publish_date,
+                            # numeric copy so date range filters can be pushed into the vector query
+                            **({"publishDate_ts": publish_ts} if publish_ts is not None else {}),
                         }
-                        for i in range(len(chunks))
+                        for i in chunk_indexes
                     ]
 
-                    embeddings = model.encode([make_passage(c, args.embed_model) for c in chunks], normalize_embeddings=True)
+                    embeddings = model.encode([make_passage(c, embed_model) for c in chunks], normalize_embeddings=True)
                     embeddings_list = [e.tolist() for e in embeddings]
 
                     # Upsert: safe for reruns
@@ -143,17 +245,179 @@ def main():
                         metadatas=metadatas,
                         embeddings=embeddings_list,
                     )
+                    # hashed stem signatures so query-time rerank never needs the chunk text
+                    lexsig.put_many(collection.name, ids, docs)
 
+                add_duplicate_refs(collection, refs)
+
+            store.mark_seen(species, unique_key)
             processed += 1
-            if pbar_total_unknown:
-                pbar.update(1)
-            else:
-                pbar.update(1)
+            pbar.update(1)
+
+        if incremental and not page_has_new:
+            # a page with nothing unseen that is not newer than the watermark: the rest was crawled before
+            page_ts = [publish_date_to_epoch(it.get("publishDate")) for it in items]
+            if mark_ts is None or all(ts is not None and ts <= mark_ts for ts in page_ts):
+                break
 
-        skip += args.take
+        skip += take
 
     pbar.close()
 
+    if incremental:
+        state = {"publishDate": newest_raw, "publishDate_ts": newest_ts}
+        if failed:
+            # keep the previous watermark so the next run pages down to the documents that failed again
+            state = {"publishDate": mark.get("publishDate"), "publishDate_ts": mark_ts}
+            tqdm.write(f"{species}: {failed} documents failed; the next incremental run retries them")
+        # keep the listing validators only after a complete pass, otherwise a 304 would hide the remainder
+        if not truncated and not failed:
+            state.update(validators)
+        store.set_watermark(species, state)
+    return processed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--species", default="LegislativeNews", help="one species or a comma-separated list")
+    parser.add_argument("--take", type=int, default=99)
+    parser.add_argument("--max-docs", type=int, default=500, help="limit per species for MVP; set 0 for no limit")
+    parser.add_argument("--rps", type=float, default=5.0, help="shared request rate limit (requests/second)")
+    parser.add_argument(
+        "--delay",
+        type=float,
+        default=None,
+        help="deprecated: seconds between sequential requests from before the token bucket; mapped to --rps 1/delay",
+    )
+    parser.add_argument("--concurrency", type=int, default=4, help="parallel details requests / pooled connections")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="stop paging at documents indexed by an earlier run (per-species watermark) and skip them",
+    )
+
+    parser.add_argument("--api-base", default="https://infohubapi.rs.ge/api")
+    parser.add_argument("--lang", default="ka")
+    parser.add_argument("--cookie", default="")
+
+    parser.add_argument("--chroma-dir", default="./data/index")
+    parser.add_argument("--collection", default="infohub_docs")
+    parser.add_argument(
+        "--shard-by-species",
+        action="store_true",
+        help="write each species into its own collection (<collection>__<species slug>, e.g. "
+        "infohub_docs__legislativenews); pair with CHROMA_SHARDS",
+    )
+    parser.add_argument(
+        "--hnsw-m", type=int, default=settings.hnsw_m, help="graph degree for new collections (0 = Chroma default 16)"
+    )
+    parser.add_argument(
+        "--hnsw-construction-ef", type=int, default=settings.hnsw_construction_ef, help="0 = Chroma default 100"
+    )
+    parser.add_argument(
+        "--hnsw-search-ef", type=int, default=settings.hnsw_search_ef, help="stored default beam width (0 = 100)"
+    )
+    parser.add_argument("--embed-model", default=settings.embedding_model)
+    parser.add_argument(
+        "--per-model-collection",
+        action=argparse.BooleanOptionalAction,
+        default=settings.embedding_index_per_model,
+        help="write into <collection>.<model slug> so indexes for several models can share --chroma-dir",
+    )
+    parser.add_argument(
+        "--chunker",
+        choices=["structured", "fixed"],
+        default="structured",
+        help="structured: article/paragraph-aware, token-measured; fixed: 1200 chars with 200 overlap",
+    )
+    parser.add_argument(
+        "--max-tokens",
+        type=int,
+        default=480,
+        help="structured chunk budget in model tokens (leaves room for the passage prefix + special tokens)",
+    )
+    parser.add_argument(
+        "--dedup",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="collapse near-duplicate chunks (MinHash, see --dedup-threshold) into the copy from the newest "
+        "document; the others are listed with it in the answer sources",
+    )
+    parser.add_argument("--dedup-threshold", type=float, default=0.85, help="estimated Jaccard similarity")
+
+    parser.add_argument(
+        "--raw-store",
+        default="./data/raw.sqlite3",
+        help="packed raw details + extracted texts (migrate old data/raw, data/text with ingest.migrate_raw_store)",
+    )
+    args = parser.parse_args()
+    if args.delay is not None:
+        if args.delay <= 0:
+            parser.error("--delay is deprecated and must be > 0; use --rps instead")
+        args.rps = 1.0 / args.delay
+        print(f"--delay is deprecated; using --rps {args.rps:g}")
+
+    max_docs = None if args.max_docs == 0 else args.max_docs
+    species_list = parse_shard_list(args.species)
+
+    client = InfoHubClient(
+        base_url=args.api_base,
+        language_code=args.lang,
+        cookie=args.cookie.strip() or None,
+        rps=args.rps,
+        concurrency=args.concurrency,
+    )
+
+    # Chroma
+    chroma_path = Path(args.chroma_dir)
+    chroma_path.mkdir(parents=True, exist_ok=True)
+    chroma = chromadb.PersistentClient(path=str(chroma_path))
+    lexsig = LexSigStore(chroma_path / LEXSIG_FILENAME)
+    dedup = NearDupIndex(chroma_path / DEDUP_FILENAME, threshold=args.dedup_threshold) if args.dedup else None
+
+    # Embeddings
+    model = SentenceTransformer(args.embed_model)
+    split = make_splitter(args.chunker, model, args.max_tokens)
+    store = RawStore(args.raw_store)
+
+    base = collection_base(args.collection, args.embed_model, args.per_model_collection)
+    for species in species_list:
+        name = shard_collection_name(base, species) if args.shard_by_species else base
+        # M / construction_ef only take effect for a new collection; compare settings with bench.hnsw_sweep
+        collection = chroma.get_or_create_collection(
+            name=name,
+            metadata={
+                **collection_metadata(args.hnsw_m, args.hnsw_construction_ef, args.hnsw_search_ef),
+                EMBEDDING_MODEL_KEY: args.embed_model,
+            },
+        )
+        # adding vectors from another model would silently corrupt the collection
+        check_model(collection, args.embed_model)
+        if collection_model(collection) is None:
+            tag_collection(collection, args.embed_model)
+
+        ingest_species(
+            species=species,
+            client=client,
+            collection=collection,
+            lexsig=lexsig,
+            dedup=dedup,
+            model=model,
+            embed_model=args.embed_model,
+            split=split,
+            take=args.take,
+            max_docs=max_docs,
+            store=store,
+            incremental=args.incremental,
+        )
+
+    print(client.stats.report())
+    if dedup is not None:
+        print(dedup.stats.report(embedding_dim=model.get_sentence_embedding_dimension()))
+
+    if args.shard_by_species:
+        print(f"Shards written. Set CHROMA_SHARDS={','.join(species_list)} for the API.")
+
 
 if __name__ == "__main__":
     main()
@@ -1,9 +1,70 @@
 from __future__ import annotations
 
+import random
+import threading
 import time
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from typing import Any
 
+import requests
+from requests.adapters import HTTPAdapter
+
+TRANSIENT_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Shared rate limiter: `rate` requests per second on average, bursts up to `burst`.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+@dataclass
+class ClientStats:
+    requests: int = 0
+    retries: int = 0
+    failures: int = 0
+    statuses: dict[int, int] = field(default_factory=dict)
+    started: float = field(default_factory=time.monotonic)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, status: int | None, retried: bool) -> None:
+        with self._lock:
+            self.requests += 1
+            if status is not None:
+                self.statuses[status] = self.statuses.get(status, 0) + 1
+            if retried:
+                self.retries += 1
+
+    def report(self) -> str:
+        elapsed = max(1e-9, time.monotonic() - self.started)
+        statuses = ", ".join(f"{k}: {v}" for k, v in sorted(self.statuses.items())) or "-"
+        return (
+            f"InfoHub requests: {self.requests} in {elapsed:.1f}s ({self.requests / elapsed:.2f} req/s), "
+            f"retries: {self.retries}, failed: {self.failures}, statuses: {statuses}"
+        )
+
 
 class InfoHubClient:
     def __init__(
@@ -11,16 +72,32 @@ class InfoHubClient:
         base_url: str = "https://infohubapi.rs.ge/api",
         language_code: str = "ka",
         cookie: str | None = None,
-        delay_sec: float = 0.2,
+        rps: float = 5.0,
+        concurrency: int = 4,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
         timeout: int = 60,
     ):
         self.base_url = base_url.rstrip("/")
         self.language_code = language_code
         self.cookie = cookie
-        self.delay_sec = delay_sec
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
         self.timeout = timeout
 
+        # One pooled session shared by all workers (connection reuse, no per-thread handshakes)
         self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.limiter = TokenBucket(rps, burst=self.concurrency)
+        self.stats = ClientStats()
+        # index into the details-by-key URL variants that answered last; tried first from then on
+        self._details_variant = 0
 
     def _headers(self) -> dict[str, str]:
         h = {
@@ -31,20 +108,88 @@ class InfoHubClient:
             h["cookie"] = self.cookie
         return h
 
+    def _backoff(self, attempt: int, retry_after: str | None) -> float:
+        if retry_after:
+            try:
+                return min(self.backoff_max, float(retry_after))
+            except ValueError:
+                pass
+        # exponential backoff with full jitter
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2**attempt)))
+
+    def _get(self, url: str, *, params: dict[str, Any], headers: dict[str, str] | None = None) -> requests.Response:
+        """
+        Rate-limited GET that retries connection errors and 429/5xx; other responses are returned as-is.
+        """
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            try:
+                r = self.session.get(url, headers=headers or self._headers(), params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    self.stats.record(None, retried=False)
+                    raise
+                self.stats.record(None, retried=True)
+                time.sleep(self._backoff(attempt, None))
+                attempt += 1
+                continue
+
+            if r.status_code in TRANSIENT_STATUSES and attempt < self.max_retries:
+                self.stats.record(r.status_code, retried=True)
+                time.sleep(self._backoff(attempt, r.headers.get("Retry-After")))
+                attempt += 1
+                continue
+
+            self.stats.record(r.status_code, retried=False)
+            return r
+
     def list_documents(self, *, species: str, skip: int, take: int = 99) -> dict[str, Any]:
         url = f"{self.base_url}/documents"
         params = {"skip": skip, "take": take, "species": species}
 
-        r = self.session.get(url, headers=self._headers(), params=params, timeout=self.timeout)
+        r = self._get(url, params=params)
         r.raise_for_status()
-        time.sleep(self.delay_sec)
         return r.json()
 
+    def list_documents_if_changed(
+        self,
+        *,
+        species: str,
+        skip: int,
+        take: int = 99,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> tuple[dict[str, Any] | None, dict[str, str]]:
+        """
+        Conditional listing: sends If-None-Match / If-Modified-Since when validators are known.
+        Returns (None, validators) on 304 Not Modified, else (page, validators from the response).
+        Servers that ignore the headers simply answer 200, so this is always safe to call.
+        """
+        url = f"{self.base_url}/documents"
+        params = {"skip": skip, "take": take, "species": species}
+        headers = self._headers()
+        if etag:
+            headers["if-none-match"] = etag
+        if last_modified:
+            headers["if-modified-since"] = last_modified
+
+        r = self._get(url, params=params, headers=headers)
+        validators = {
+            k: v
+            for k, v in (("etag", r.headers.get("ETag")), ("last_modified", r.headers.get("Last-Modified")))
+            if v
+        }
+        if r.status_code == 304:
+            return None, validators or {k: v for k, v in (("etag", etag), ("last_modified", last_modified)) if v}
+        r.raise_for_status()
+        return r.json(), validators
+
     def get_details_by_key(self, unique_key: str) -> dict[str, Any]:
         """
         Your discovery showed a details-by-key endpoint.
         Some environments might use /documents/{key}/... or /documents/e{key}/...
-        We'll try both to be robust.
+        We'll try both to be robust, starting with the variant that worked last time.
         """
         candidates = [
             f"{self.base_url}/documents/{unique_key}/details-by-key",
@@ -52,16 +197,38 @@ class InfoHubClient:
         ]
         params = {"openFromSearch": "true"}
 
+        preferred = self._details_variant
+        order = [preferred] + [i for i in range(len(candidates)) if i != preferred]
+
         last_err: Exception | None = None
-        for url in candidates:
+        for i in order:
             try:
-                r = self.session.get(url, headers=self._headers(), params=params, timeout=self.timeout)
+                r = self._get(candidates[i], params=params)
                 if r.status_code == 404:
                     continue
                 r.raise_for_status()
-                time.sleep(self.delay_sec)
+                self._details_variant = i
                 return r.json()
             except Exception as e:
                 last_err = e
 
+        with self.stats._lock:
+            self.stats.failures += 1
         raise RuntimeError(f"Failed to fetch details for uniqueKey={unique_key}") from last_err
+
+    def get_details_many(self, unique_keys: list[str]) -> dict[str, dict[str, Any] | Exception]:
+        """
+        Fetch details for several documents on `concurrency` workers (still bound by the shared rate limit).
+        A document that fails after retries maps to its exception instead of aborting the batch.
+        """
+
+        def fetch(key: str) -> dict[str, Any] | Exception:
+            try:
+                return self.get_details_by_key(key)
+            except Exception as e:
+                return e
+
+        if len(unique_keys) <= 1 or self.concurrency == 1:
+            return {k: fetch(k) for k in unique_keys}
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="infohub") as pool:
+            return dict(zip(unique_keys, pool.map(fetch, unique_keys)))
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+
+from tqdm import tqdm
+
+from ingest.raw_store import RawStore
+
+
+def _dir_bytes(paths: list[Path]) -> int:
+    return sum(p.stat().st_size for p in paths)
+
+
+def main():
+    """
+    Move the legacy data/raw/<species>/<key>.json + data/text/<species>/<key>.txt layout into a RawStore.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--raw-dir", default="./data/raw")
+    parser.add_argument("--text-dir", default="./data/text")
+    parser.add_argument("--store", default="./data/raw.sqlite3")
+    parser.add_argument("--species", action="append", default=[], help="default: every species directory found")
+    parser.add_argument("--delete-source", action="store_true", help="remove migrated files afterwards")
+    args = parser.parse_args()
+
+    raw_root = Path(args.raw_dir)
+    text_root = Path(args.text_dir)
+    species_list = args.species or sorted(p.name for p in raw_root.iterdir() if p.is_dir())
+
+    store = RawStore(args.store)
+    migrated: list[Path] = []
+    failed = 0
+
+    for species in species_list:
+        raw_files = sorted((raw_root / species).glob("*.json"))
+        for fp in tqdm(raw_files, desc=f"Migrate raw {species}", unit="doc"):
+            try:
+                details = json.loads(fp.read_text(encoding="utf-8"))
+            except Exception:
+                failed += 1
+                continue
+            store.put_details(species, fp.stem, details, fetched_at=fp.stat().st_mtime)
+            migrated.append(fp)
+
+        text_files = sorted((text_root / species).glob("*.txt"))
+        for fp in tqdm(text_files, desc=f"Migrate text {species}", unit="doc"):
+            store.put_text(species, fp.stem, fp.read_text(encoding="utf-8"))
+            migrated.append(fp)
+
+    before = _dir_bytes(migrated)
+    stats = store.stats()
+    print(
+        f"\nDone. {stats['details']} details, {stats['texts']} texts, {len(migrated)} files ({before} bytes) "
+        f"-> {store.path} ({stats['bytes']} bytes). Failed: {failed}"
+    )
+
+    if args.delete_source:
+        for fp in migrated:
+            fp.unlink(missing_ok=True)
+        print(f"Removed {len(migrated)} migrated files.")
+
+
+if __name__ == "__main__":
+    main()
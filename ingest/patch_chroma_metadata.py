@@ -1,51 +1,70 @@
 from __future__ import annotations
 
 import argparse
-import json
-from pathlib import Path
 
 import chromadb
 from tqdm import tqdm
 
+from app.embeddings import collection_base
+from app.settings import settings
+from app.shards import shard_collection_name
+from ingest.dates import publish_date_to_epoch
 from ingest.doc_numbers import extract_doc_number_digits
+from ingest.raw_store import RawStore
 
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--species", default="LegislativeNews")
-    parser.add_argument("--raw-dir", default="./data/raw")
+    parser.add_argument("--raw-store", default="./data/raw.sqlite3")
     parser.add_argument("--chroma-dir", default="./data/index")
-    parser.add_argument("--collection", default="infohub_docs")
+    parser.add_argument("--collection", default=settings.chroma_collection)
+    parser.add_argument("--embed-model", default=settings.embedding_model)
+    parser.add_argument(
+        "--per-model-collection",
+        action=argparse.BooleanOptionalAction,
+        default=settings.embedding_index_per_model,
+        help="patch <collection>.<model slug>, as written by the indexer with the same flag",
+    )
+    parser.add_argument(
+        "--shard-by-species",
+        action="store_true",
+        help="patch the <collection>__<species slug> shard (e.g. infohub_docs__legislativenews)",
+    )
     args = parser.parse_args()
 
-    raw_species_dir = Path(args.raw_dir) / args.species
-    if not raw_species_dir.exists():
-        raise RuntimeError(f"Raw dir not found: {raw_species_dir}")
+    store = RawStore(args.raw_store)
+    keys = store.keys(args.species)
+    if not keys:
+        raise RuntimeError(f"No raw details for {args.species} in: {args.raw_store}")
 
     client = chromadb.PersistentClient(path=args.chroma_dir)
-    col = client.get_or_create_collection(name=args.collection)
-
-    files = sorted(raw_species_dir.glob("*.json"))
-    if not files:
-        raise RuntimeError(f"No raw json files found in: {raw_species_dir}")
+    # same name resolution as the indexer and the API (app.index_manager.open_index)
+    base = collection_base(args.collection, args.embed_model, args.per_model_collection)
+    name = shard_collection_name(base, args.species) if args.shard_by_species else base
+    # never create an empty collection under a mistyped name and report every document as skipped
+    col = client.get_collection(name=name)
 
     updated_docs = 0
     skipped_docs = 0
 
-    for fp in tqdm(files, desc=f"Patching metadata for {args.species}", unit="doc"):
-        unique_key = fp.stem
-
-        try:
-            details = json.loads(fp.read_text(encoding="utf-8"))
-        except Exception:
-            skipped_docs += 1
-            continue
-
+    for unique_key, details in tqdm(
+        store.iter_details(args.species), total=len(keys), desc=f"Patching metadata for {args.species}", unit="doc"
+    ):
         # Prefer explicit documentNumber, otherwise try name/title
         doc_number_raw = details.get("documentNumber") or details.get("name") or ""
         doc_number_digits = extract_doc_number_digits(doc_number_raw)
 
-        if not doc_number_digits:
+        publish_ts = publish_date_to_epoch(details.get("publishDate") or details.get("receiptDate"))
+
+        patch: dict[str, str | int] = {}
+        if doc_number_digits:
+            patch["doc_number_digits"] = doc_number_digits
+            patch["doc_number_raw"] = str(doc_number_raw)
+        if publish_ts is not None:
+            patch["publishDate_ts"] = publish_ts
+
+        if not patch:
             skipped_docs += 1
             continue
 
@@ -68,9 +87,8 @@ def main():
 
         for m in metas:
             m = dict(m or {})
-            if m.get("doc_number_digits") != doc_number_digits or m.get("doc_number_raw") != str(doc_number_raw):
-                m["doc_number_digits"] = doc_number_digits
-                m["doc_number_raw"] = str(doc_number_raw)
+            if any(m.get(key) != value for key, value in patch.items()):
+                m.update(patch)
                 changed_any = True
             new_metas.append(m)
 
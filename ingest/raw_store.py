@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Iterator
+
+# One SQLite file for every raw details response and extracted text (zlib-compressed JSON / UTF-8),
+# instead of two loose files per document. Random access by uniqueKey, ordered iteration per species.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS details (
+    unique_key TEXT PRIMARY KEY,
+    species TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS details_species ON details (species, unique_key);
+CREATE TABLE IF NOT EXISTS texts (
+    unique_key TEXT PRIMARY KEY,
+    species TEXT NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS texts_species ON texts (species, unique_key);
+CREATE TABLE IF NOT EXISTS crawl_state (
+    species TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS crawl_seen (
+    species TEXT NOT NULL,
+    unique_key TEXT NOT NULL,
+    PRIMARY KEY (species, unique_key)
+);
+"""
+
+
+def _pack(obj: Any) -> bytes:
+    return zlib.compress(json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 6)
+
+
+def _unpack(blob: bytes) -> Any:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class RawStore:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    # --- details ---
+
+    def has_details(self, unique_key: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM details WHERE unique_key = ?", (unique_key,)).fetchone()
+        return row is not None
+
+    def get_details(self, unique_key: str) -> dict[str, Any] | None:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM details WHERE unique_key = ?", (unique_key,)).fetchone()
+        return _unpack(row[0]) if row else None
+
+    def put_details(self, species: str, unique_key: str, details: dict[str, Any], fetched_at: float | None = None) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO details (unique_key, species, fetched_at, data) VALUES (?, ?, ?, ?)",
+                (unique_key, species, fetched_at or time.time(), _pack(details)),
+            )
+
+    def iter_details(self, species: str) -> Iterator[tuple[str, dict[str, Any]]]:
+        # fetch in key order pages so a long scan doesn't hold the lock
+        last = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT unique_key, data FROM details WHERE species = ? AND unique_key > ? ORDER BY unique_key LIMIT 500",
+                    (species, last),
+                ).fetchall()
+            if not rows:
+                return
+            for key, blob in rows:
+                yield key, _unpack(blob)
+            last = rows[-1][0]
+
+    def keys(self, species: str) -> list[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT unique_key FROM details WHERE species = ? ORDER BY unique_key", (species,)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    # --- extracted text ---
+
+    def get_text(self, unique_key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM texts WHERE unique_key = ?", (unique_key,)).fetchone()
+        return zlib.decompress(row[0]).decode("utf-8") if row else None
+
+    def put_text(self, species: str, unique_key: str, text: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO texts (unique_key, species, data) VALUES (?, ?, ?)",
+                (unique_key, species, zlib.compress(text.encode("utf-8"), 6)),
+            )
+
+    def iter_texts(self, species: str) -> Iterator[tuple[str, str]]:
+        last = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT unique_key, data FROM texts WHERE species = ? AND unique_key > ? ORDER BY unique_key LIMIT 500",
+                    (species, last),
+                ).fetchall()
+            if not rows:
+                return
+            for key, blob in rows:
+                yield key, zlib.decompress(blob).decode("utf-8")
+            last = rows[-1][0]
+
+    # --- incremental crawl state ---
+
+    def get_watermark(self, species: str) -> dict[str, Any]:
+        """
+        {"publishDate": ..., "publishDate_ts": ..., "etag": ..., "last_modified": ...} of the last crawl, or {}.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM crawl_state WHERE species = ?", (species,)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def set_watermark(self, species: str, state: dict[str, Any]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO crawl_state (species, data) VALUES (?, ?)",
+                (species, json.dumps(state, ensure_ascii=False)),
+            )
+
+    def is_seen(self, species: str, unique_key: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM crawl_seen WHERE species = ? AND unique_key = ?", (species, unique_key)
+            ).fetchone()
+        return row is not None
+
+    def mark_seen(self, species: str, unique_key: str) -> None:
+        """
+        Called once a document is fully indexed, so an interrupted run re-processes it next time.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO crawl_seen (species, unique_key) VALUES (?, ?)", (species, unique_key)
+            )
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            n_details = self._conn.execute("SELECT COUNT(*) FROM details").fetchone()[0]
+            n_texts = self._conn.execute("SELECT COUNT(*) FROM texts").fetchone()[0]
+            # fold the WAL back in so the file size is the real footprint
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return {"details": n_details, "texts": n_texts, "bytes": self.path.stat().st_size}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import json
 import os
 import sys
 from pathlib import Path
+from typing import Iterator
 
+import requests
 import streamlit as st
 from dotenv import load_dotenv
 
@@ -32,32 +35,78 @@ def _secrets_to_env() -> None:
 
 _secrets_to_env()
 
+# With API_URL set the UI is a thin client of a running FastAPI backend: every session shares its warmed
+# models and index, and this process loads neither.
+API_URL = os.getenv("API_URL", "").strip().rstrip("/")
 
-from app.bootstrap_index import ensure_chroma_index  # noqa: E402
-
-ok = ensure_chroma_index()
-chroma_dir = Path(os.getenv("CHROMA_DIR", "./data/index"))
-db_path = chroma_dir / "chroma.sqlite3"
-
-if not ok or not db_path.exists():
-    st.set_page_config(page_title="InfoHub RAG", page_icon="📚", layout="wide")
-    st.title("📚 InfoHub RAG (Demo)")
-    st.error(
-        "ინდექსი ვერ ჩაიტვირთა.\n\n"
-        "შეამოწმეთ:\n"
-        "- INDEX_URL (GitHub Release zip)\n"
-        "- CHROMA_DIR (მაგ: ./data/index)\n\n"
-        f"მოსალოდნელი ფაილი: {db_path}"
-    )
-    st.stop()
+from app.prompts import MANDATORY_CITATION_LINE  # noqa: E402
 
-# Optional: show DB size so you can confirm it’s not the tiny empty DB
 st.set_page_config(page_title="InfoHub RAG", page_icon="📚", layout="wide")
 st.title("📚 InfoHub RAG (Demo)")
-st.caption(f"✅ Index ready: {db_path} ({db_path.stat().st_size} bytes)")
 
-from app.rag import answer  # noqa: E402
-from app.prompts import MANDATORY_CITATION_LINE  # noqa: E402
+
+@st.cache_resource(show_spinner="Loading index and embedding model…")
+def load_local_backend() -> Path:
+    """
+    Runs once per server process, not on every rerun or session: fetch/open the index and warm the embedding
+    model. Raises (and is retried on the next rerun) if the index is missing.
+    """
+    from app.bootstrap_index import ensure_chroma_index
+    from app.retrieval import warm_up
+
+    ok = ensure_chroma_index()
+    db_path = Path(os.getenv("CHROMA_DIR", "./data/index")) / "chroma.sqlite3"
+    if not ok or not db_path.exists():
+        raise FileNotFoundError(str(db_path))
+    warm_up()
+    return db_path
+
+
+if API_URL:
+    st.caption(f"✅ Backend: {API_URL}")
+else:
+    try:
+        db_path = load_local_backend()
+    except FileNotFoundError as e:
+        st.error(
+            "ინდექსი ვერ ჩაიტვირთა.\n\n"
+            "შეამოწმეთ:\n"
+            "- INDEX_URL (GitHub Release zip)\n"
+            "- CHROMA_DIR (მაგ: ./data/index)\n\n"
+            f"მოსალოდნელი ფაილი: {e}"
+        )
+        st.stop()
+    # Optional: show DB size so you can confirm it’s not the tiny empty DB
+    st.caption(f"✅ Index ready: {db_path} ({db_path.stat().st_size} bytes)")
+
+
+def _remote_events(question: str, k: int) -> Iterator[dict]:
+    with requests.post(
+        f"{API_URL}/ask/stream", json={"question": question, "k": k}, stream=True, timeout=(5, 180)
+    ) as r:
+        r.raise_for_status()
+        for line in r.iter_lines():
+            if line:
+                yield json.loads(line)
+
+
+def stream_answer(question: str, k: int, final: dict) -> Iterator[str]:
+    """
+    Answer text as the model writes it (see rag.answer_stream); the closing event - full answer, sources and
+    meta, same shape as /ask - is stored in `final`.
+    """
+    if API_URL:
+        events = _remote_events(question, k)
+    else:
+        from app.rag import answer_stream
+
+        events = answer_stream(question, k=k)
+    for e in events:
+        if e.get("type") == "delta":
+            yield e["text"]
+        elif e.get("type") == "done":
+            final.update({key: v for key, v in e.items() if key != "type"})
+
 
 st.info(
     "ℹ️ **შენიშვნა:** ეს დემო მუშაობს InfoHub-ის დოკუმენტების *ინდექსირებულ* ნაწილზე "
@@ -90,10 +139,6 @@ with col1:
 with col2:
     run = st.button("Ask")
 
-if run and q.strip():
-    res = answer(q.strip(), k=int(k))
-    st.session_state.history.append((q.strip(), res))
-
 
 def render_sources(sources: list[dict]) -> None:
     if not sources:
@@ -106,28 +151,21 @@ def render_sources(sources: list[dict]) -> None:
         page = s.get("page", None)
         suffix = f" — გვერდი {page}" if page is not None else ""
         st.markdown(f"- **{title}** — {url}{suffix}")
+        duplicates = s.get("duplicates") or []
+        if duplicates:
+            st.caption("იგივე ტექსტი ასევე: " + ", ".join(duplicates))
 
 
-for user_q, res in reversed(st.session_state.history):
-    st.markdown("### Question")
-    st.write(user_q)
-
+def render_details(res: dict) -> None:
     meta = (res.get("meta", {}) or {})
-    provider = meta.get("provider")
-    model_used = meta.get("model_used")
-    fallback_used = meta.get("fallback_used")
-    k_used = meta.get("k")
-
-    st.markdown("### Answer")
-    st.write(res.get("answer", ""))
 
     with st.expander("Run metadata", expanded=False):
         st.write(
             {
-                "provider": provider,
-                "model_used": model_used,
-                "fallback_used": fallback_used,
-                "k": k_used,
+                "provider": meta.get("provider"),
+                "model_used": meta.get("model_used"),
+                "fallback_used": meta.get("fallback_used"),
+                "k": meta.get("k"),
             }
         )
 
@@ -135,3 +173,35 @@ for user_q, res in reversed(st.session_state.history):
         render_sources(res.get("sources", []) or [])
 
     st.divider()
+
+
+past = list(st.session_state.history)
+
+if run and q.strip():
+    question = q.strip()
+    st.markdown("### Question")
+    st.write(question)
+
+    st.markdown("### Answer")
+    final: dict = {}
+    answer_slot = st.empty()
+    try:
+        with answer_slot.container():
+            st.write_stream(stream_answer(question, int(k), final))
+    except Exception as e:
+        answer_slot.error(f"{type(e).__name__}: {e}")
+
+    if final:
+        # the final answer has the canonical sources block (or the snippet fallback) - show that one
+        answer_slot.write(final.get("answer", ""))
+        render_details(final)
+        st.session_state.history.append((question, final))
+
+for user_q, res in reversed(past):
+    st.markdown("### Question")
+    st.write(user_q)
+
+    st.markdown("### Answer")
+    st.write(res.get("answer", ""))
+
+    render_details(res)